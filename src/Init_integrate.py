@@ -1,22 +1,19 @@
 import os
 import yt_dlp
-import cv2
 import json
-from PIL import Image
-import pytesseract
-from moviepy.editor import VideoFileClip
-import whisper
+from whisper_models import DEFAULT_WHISPER_MODEL
+from frame_provider import iter_frames, probe_video
+from audio_decoder import decode_audio, write_mp3
+from pipeline import ocr_text_from_frames, transcribe_samples, run_extraction_pipeline
 
 # Constants
-VIDEO_FILE = "video.mp4"
-AUDIO_FILE = "audio.mp3"
-IMAGE_FRAMES_DIR = "image_frames"
-JSON_FILE = "data.json"
+# File paths come from the caller (app.py passes a JobWorkspace's), so
+# concurrent jobs never share a video or JSON file in the working directory
 MAX_FRAMES_SHORT = 15
 MAX_FRAMES_LONG = 50
 
 # 1️⃣ Download Instagram Reel
-def download_instagram_reel(url, output_filename=VIDEO_FILE):
+def download_instagram_reel(url, output_filename):
     """Download Instagram Reel and overwrite the existing file."""
     if os.path.exists(output_filename):
         os.remove(output_filename)
@@ -33,90 +30,105 @@ def download_instagram_reel(url, output_filename=VIDEO_FILE):
         print(f"Downloaded: {output_filename}")
 
 # 2️⃣ Extract Frames
-def extract_frames_from_video(video_path):
-    """Extract frames from a video at an optimized interval."""
-    if not os.path.exists(video_path):
-        print(f"Error: {video_path} not found!")
-        return False
-
-    cap = cv2.VideoCapture(video_path)
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
-    duration = total_frames / fps
-
-    frame_skip = max(1, total_frames // MAX_FRAMES_SHORT if duration <= 60 else total_frames // MAX_FRAMES_LONG)
-
-    os.makedirs(IMAGE_FRAMES_DIR, exist_ok=True)
-    for file in os.listdir(IMAGE_FRAMES_DIR):
-        os.remove(os.path.join(IMAGE_FRAMES_DIR, file))
+def extract_frames_from_video(video_path, debug_dir=None):
+    """
+    Sample frames uniformly across the whole video.
 
-    index, frame_count = 0, 0
-    max_frames = MAX_FRAMES_SHORT if duration <= 60 else MAX_FRAMES_LONG
+    Frames are kept in memory and handed straight to OCR. Pass `debug_dir`
+    (e.g. a JobWorkspace's frames_dir) to also dump them to disk as PNGs.
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret or frame_count >= max_frames:
-            break
+    Returns:
+        generator of Frame, or None if the video does not exist or cannot be opened
+    """
+    if not os.path.exists(video_path):
+        print(f"Error: {video_path} not found!")
+        return None
 
-        if index % frame_skip == 0:
-            frame_path = os.path.join(IMAGE_FRAMES_DIR, f"frame{index}.png")
-            cv2.imwrite(frame_path, frame)
-            frame_count += 1
-            print(f"Extracted: {frame_path}")
+    info = probe_video(video_path)
+    if info is None:
+        print(f"Error: Failed to open {video_path}.")
+        return None
 
-        index += 1
+    _, _, duration = info
+    num_frames = MAX_FRAMES_SHORT if duration <= 60 else MAX_FRAMES_LONG
 
-    cap.release()
-    return True
+    return iter_frames(video_path, num_frames, debug_dir=debug_dir)
 
 # 3️⃣ Extract Text
-def extract_text_from_frames():
-    """Extract text from frames using Tesseract OCR."""
-    extracted_texts = []
-    
-    for filename in sorted(os.listdir(IMAGE_FRAMES_DIR)):
-        image_path = os.path.join(IMAGE_FRAMES_DIR, filename)
-        text = pytesseract.image_to_string(Image.open(image_path)).strip()
-        if text:
-            extracted_texts.append(text)
-
-    update_json_file({"extracted_text": "\n".join(extracted_texts)})
+def extract_text_from_frames(frames, json_file, workers=None):
+    """Extract text from in-memory frames using Tesseract OCR, skipping near-duplicate frames."""
+    extracted_text, caption_timeline = ocr_text_from_frames(frames, workers)
+    update_json_file({"extracted_text": extracted_text, "caption_timeline": caption_timeline}, json_file)
 
 # 4️⃣ Extract & Transcribe Audio
-def extract_audio_from_video(video_path, audio_path):
-    """Extract audio and save as MP3."""
-    if not os.path.exists(video_path):
-        return False
-
-    video_clip = VideoFileClip(video_path)
-    if video_clip.audio is None:
-        update_json_file({"transcription": ""})
-        return False
+def extract_audio_from_video(video_path, json_file, audio_path=None):
+    """
+    Decode the soundtrack to 16 kHz mono float32 samples for Whisper.
 
-    video_clip.audio.write_audiofile(audio_path, codec="mp3", verbose=False)
-    return True
+    An MP3 is only written when `audio_path` is given.
 
-def transcribe_audio_with_whisper(audio_path):
-    """Transcribe audio using Whisper AI."""
-    if not os.path.exists(audio_path):
+    Returns:
+        numpy.ndarray of samples, or None if there is no (decodable) audio
+    """
+    if not os.path.exists(video_path):
+        return None
+
+    try:
+        samples = decode_audio(video_path)
+    except RuntimeError as e:
+        print(f"Skipping audio: {e}")
+        samples = None
+    if samples is None:
+        update_json_file({"transcription": ""}, json_file)
+        return None
+
+    if audio_path:
+        write_mp3(video_path, audio_path)
+    return samples
+
+def transcribe_audio_with_whisper(audio, json_file, model_name=DEFAULT_WHISPER_MODEL):
+    """Transcribe audio samples (or an audio file path) using Whisper AI (the model is loaded once per process)."""
+    if audio is None or (isinstance(audio, str) and not os.path.exists(audio)):
         return
 
-    model = whisper.load_model("tiny")
-    result = model.transcribe(audio_path, language="en", verbose=False)
-    update_json_file({"transcription": result["text"]})
+    update_json_file({"transcription": transcribe_samples(audio, model_name)}, json_file)
 
 # 5️⃣ Update JSON File
-def update_json_file(new_data):
-    """Update JSON file with extracted text or transcription."""
-    allowed_keys = {"transcription", "extracted_text"}
+def update_json_file(new_data, json_file):
+    """Update JSON file with extracted text, caption timeline or transcription."""
+    allowed_keys = {"transcription", "extracted_text", "caption_timeline"}
 
-    if os.path.exists(JSON_FILE):
-        with open(JSON_FILE, "r", encoding="utf-8") as f:
+    if os.path.exists(json_file):
+        with open(json_file, "r", encoding="utf-8") as f:
             data = json.load(f)
     else:
         data = {}
 
     data.update({k: v for k, v in new_data.items() if k in allowed_keys})
 
-    with open(JSON_FILE, "w", encoding="utf-8") as f:
+    with open(json_file, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=4)
+
+# 6️⃣ Run Visual & Audio Branches Concurrently
+def process_video(video_path, json_file, workers=None, model_name=DEFAULT_WHISPER_MODEL):
+    """
+    Run frame OCR and audio transcription in parallel and save both to JSON.
+
+    If OpenCV cannot read the video's frames, the audio is still transcribed
+    and the visual branch contributes no text.
+
+    Returns:
+        dict: Per-branch and critical-path timings, or None if the video file does not exist
+    """
+    if not os.path.exists(video_path):
+        print(f"Error: {video_path} not found!")
+        return None
+
+    frames = extract_frames_from_video(video_path)
+    if frames is None:
+        print("Continuing with the audio only.")
+        frames = []
+
+    payload, timings = run_extraction_pipeline(video_path, frames, workers=workers, model_name=model_name)
+    update_json_file(payload, json_file)
+    return timings
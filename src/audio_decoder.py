@@ -0,0 +1,51 @@
+import numpy as np
+import ffmpeg
+
+# Whisper expects 16 kHz mono float32 samples in [-1, 1]
+SAMPLE_RATE = 16000
+
+
+def decode_audio(video_path, sample_rate=SAMPLE_RATE):
+    """
+    Demux and decode a video's soundtrack straight into memory.
+
+    A single ffmpeg pass resamples to mono float32 PCM on stdout, so there is
+    no intermediate audio file and no lossy re-encode.
+
+    Args:
+        video_path (str): Path to the video file
+        sample_rate (int): Output sample rate in Hz
+
+    Returns:
+        numpy.ndarray: float32 mono samples, or None if the video has no audio track
+
+    Raises:
+        RuntimeError: If ffmpeg is not installed or fails for any other reason
+            (missing or corrupt file, unsupported codec, ...)
+    """
+    try:
+        out, _ = (
+            ffmpeg.input(video_path)
+            .output("-", format="f32le", acodec="pcm_f32le", ac=1, ar=sample_rate, map="0:a:0")
+            .run(capture_stdout=True, capture_stderr=True)
+        )
+    except FileNotFoundError as e:
+        raise RuntimeError("ffmpeg executable not found; install ffmpeg to decode audio") from e
+    except ffmpeg.Error as e:
+        stderr = e.stderr.decode("utf-8", errors="ignore") if e.stderr else ""
+        if "matches no streams" in stderr:
+            return None
+        raise RuntimeError(f"Error decoding audio from {video_path}: {stderr.strip()[-500:]}") from e
+
+    samples = np.frombuffer(out, dtype=np.float32)
+    return samples if samples.size else None
+
+
+def write_mp3(video_path, audio_path):
+    """Encode a video's soundtrack to an MP3 file (only needed for debugging or export)."""
+    (
+        ffmpeg.input(video_path)
+        .output(audio_path, acodec="libmp3lame", vn=None)
+        .overwrite_output()
+        .run(capture_stdout=True, capture_stderr=True)
+    )
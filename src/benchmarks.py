@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the DeepContext extraction pipeline.
+
+Usage:
+  # Compare full-decode vs. seek-based frame sampling on synthetic 60s and 10-minute clips
+  python benchmarks.py frames
+
+  # Same comparison on real videos
+  python benchmarks.py frames --video ../media/video.mp4 --video long_clip.mp4
+
+  # Compare full-frame OCR with text-region OCR (speed and useful-token yield)
+  python benchmarks.py ocr --video ../media/video.mp4
+
+  # Precision/recall of the triage pre-filter against LLM verdicts (labels come
+  # from main.py --output-dir results, or from the configured LLM backend)
+  python benchmarks.py triage --json-dir videos_folder --results-dir results
+
+  # Single-pass JSON extraction vs. the old regex strategies on large and adversarial responses
+  python benchmarks.py json
+"""
+
+import os
+import re
+import json
+import time
+import argparse
+import tempfile
+import cv2
+import numpy as np
+from pytesseract import TesseractNotFoundError
+from frame_provider import iter_frames, probe_video
+from ocr import ocr_frame
+from text_regions import crop_to_text_regions
+from text_compaction import is_word_like
+from triage import ClaimTriage, DEFAULT_THRESHOLD, triage_report
+from json_extract import extract_json
+
+
+def make_synthetic_video(path, duration, fps=30, width=540, height=960):
+    """Write a synthetic clip with moving content so every frame differs."""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+
+    for i in range(int(duration * fps)):
+        frame = np.roll(background, i * 4, axis=1)
+        cv2.putText(frame, f"frame {i}", (40, height // 2), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 3)
+        writer.write(frame)
+
+    writer.release()
+
+
+def sample_by_full_decode(video_path, num_frames):
+    """The previous strategy: read() every frame and keep every Nth one."""
+    cap = cv2.VideoCapture(video_path)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    frame_skip = max(1, total_frames // num_frames)
+
+    kept, index = [], 0
+    while cap.isOpened():
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if index % frame_skip == 0:
+            kept.append(frame)
+        index += 1
+
+    cap.release()
+    return kept
+
+
+def bench_frames(args):
+    """Time both sampling strategies on each clip."""
+    videos = list(args.video or [])
+    tmp_dir = None
+
+    if not videos:
+        tmp_dir = tempfile.TemporaryDirectory()
+        for duration in (60, 600):
+            path = os.path.join(tmp_dir.name, f"synthetic_{duration}s.mp4")
+            print(f"Generating {duration}s synthetic clip...")
+            make_synthetic_video(path, duration)
+            videos.append(path)
+
+    print(f"\n{'video':<28} {'duration':>9} {'full decode':>12} {'seek/grab':>10} {'speedup':>8}")
+    for video_path in videos:
+        _, _, duration = probe_video(video_path)
+
+        start = time.perf_counter()
+        sample_by_full_decode(video_path, args.num_frames)
+        full_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        frames = list(iter_frames(video_path, args.num_frames))
+        seek_time = time.perf_counter() - start
+
+        print(f"{os.path.basename(video_path):<28} {duration:>8.1f}s {full_time:>11.2f}s "
+              f"{seek_time:>9.2f}s {full_time / max(seek_time, 1e-9):>7.1f}x  ({len(frames)} frames)")
+
+    if tmp_dir:
+        tmp_dir.cleanup()
+
+
+def useful_tokens(text):
+    """Count OCR tokens that look like real words (letters only, 2+ chars, contains a vowel)."""
+    return sum(1 for token in text.split() if is_word_like(token))
+
+
+def bench_regions(video_path, frames):
+    """Report text-region detection cost and how much of each frame is left for Tesseract."""
+    start = time.perf_counter()
+    crops = [crop_to_text_regions(frame.image) for frame in frames]
+    elapsed = time.perf_counter() - start
+
+    frame_pixels = sum(frame.image.shape[0] * frame.image.shape[1] for frame in frames)
+    crop_pixels = sum(crop.shape[0] * crop.shape[1] for crop in crops if crop is not None)
+    skipped = sum(1 for crop in crops if crop is None)
+    print(f"{os.path.basename(video_path):<20} {len(frames)} frames: detection {elapsed * 1000 / max(len(frames), 1):.1f} ms/frame, "
+          f"{crop_pixels / max(frame_pixels, 1):.0%} of pixels sent to OCR, {skipped} frames without text skipped")
+
+
+def bench_ocr(args):
+    """
+    Time full-frame vs. text-region OCR and compare how many useful tokens each yields.
+
+    The region statistics need only OpenCV, so they are printed even when
+    Tesseract is not installed.
+    """
+    videos = args.video or ["../media/video.mp4"]
+    frames_by_video = {video_path: list(iter_frames(video_path, args.num_frames)) for video_path in videos}
+
+    print()
+    for video_path, frames in frames_by_video.items():
+        bench_regions(video_path, frames)
+
+    print(f"\n{'video':<20} {'mode':<13} {'time':>8} {'per frame':>10} {'tokens':>7} {'useful':>7} {'yield':>6}")
+    for video_path, frames in frames_by_video.items():
+        for mode, text_regions in (("full frame", False), ("text regions", True)):
+            start = time.perf_counter()
+            try:
+                texts = [ocr_frame(frame, text_regions) for frame in frames]
+            except TesseractNotFoundError:
+                print("Tesseract is not installed; OCR timings skipped")
+                return
+            elapsed = time.perf_counter() - start
+
+            tokens = sum(len(text.split()) for text in texts)
+            useful = sum(useful_tokens(text) for text in texts)
+            print(f"{os.path.basename(video_path):<20} {mode:<13} {elapsed:>7.2f}s {elapsed / max(len(frames), 1):>9.3f}s "
+                  f"{tokens:>7} {useful:>7} {useful / max(tokens, 1):>6.0%}")
+
+
+def load_triage_labels(args, json_files, texts):
+    """LLM verdicts for each file: from saved analyses if --results-dir is given, else from the detector."""
+    if args.results_dir:
+        labels = []
+        for json_file in json_files:
+            path = os.path.join(args.results_dir, json_file.replace('.json', '_analysis.json'))
+            with open(path, 'r', encoding='utf-8') as f:
+                labels.append(json.load(f).get("misinformation_analysis", {}).get("contains_misinformation") is True)
+        return labels
+
+    from misinformation_detector import MisinformationDetector
+    detector = MisinformationDetector()
+    return [detector.analyze_text(text).get("contains_misinformation") is True for text in texts]
+
+
+def bench_triage(args):
+    """Score every file with the triage heuristic and compare its routing with the LLM's verdicts."""
+    from misinformation_detector import MisinformationDetector
+    from llm_backend import StubBackend
+
+    # Only process_json_input is used here, so no real backend is needed
+    text_builder = MisinformationDetector(cache=False, backend=StubBackend())
+    json_files = sorted(f for f in os.listdir(args.json_dir) if f.endswith('.json'))
+    texts = []
+    for json_file in json_files:
+        with open(os.path.join(args.json_dir, json_file), 'r', encoding='utf-8') as f:
+            texts.append(text_builder.process_json_input(json.load(f)))
+
+    triage = ClaimTriage()
+    start = time.perf_counter()
+    scores = [triage.score(text) for text in texts]
+    elapsed = time.perf_counter() - start
+
+    labels = load_triage_labels(args, json_files, texts)
+    print(f"\n{len(texts)} documents, {sum(labels)} flagged by the LLM; triage took "
+          f"{elapsed * 1000 / max(len(texts), 1):.2f} ms per document")
+
+    thresholds = sorted(set(args.threshold or [0.5, 1.0, DEFAULT_THRESHOLD, 3.0, 4.0, 6.0]))
+    print(f"\n{'threshold':>9} {'routed':>7} {'skipped':>8} {'skip rate':>10} {'precision':>10} {'recall':>7}")
+    for row in triage_report(scores, labels, thresholds):
+        marker = "  (default)" if row["threshold"] == DEFAULT_THRESHOLD else ""
+        print(f"{row['threshold']:>9.2f} {row['routed']:>7} {row['skipped']:>8} {row['skip_rate']:>10.0%} "
+              f"{row['precision']:>10.0%} {row['recall']:>7.0%}{marker}")
+
+
+def extract_json_by_regex(text):
+    """The detector's previous strategy: language-tagged fences, any fence, greedy braces, whole text."""
+    for pattern in (r"```json\s*(.+?)```", r"```javascript\s*(.+?)```", r"```js\s*(.+?)```", r"```\s*(.+?)```"):
+        matches = re.findall(pattern, text, re.DOTALL)
+        if matches:
+            try:
+                return json.loads(matches[0].strip())
+            except json.JSONDecodeError:
+                continue
+    brace_content = re.search(r"\{.+\}", text, re.DOTALL)
+    if brace_content:
+        try:
+            return json.loads(brace_content.group(0))
+        except (json.JSONDecodeError, RecursionError):
+            pass
+    try:
+        return json.loads(text)
+    except (json.JSONDecodeError, RecursionError):
+        return None
+
+
+def json_benchmark_responses(size):
+    """Named model responses of roughly `size` characters, from typical to adversarial."""
+    verdict = {"contains_misinformation": True, "confidence_score": 0.9, "detected_criteria": ["health"],
+               "explanation": "Claims a cure {with braces} and \"quotes\". " * (size // 50), "prompt_for_context": True}
+    body = json.dumps(verdict)
+    return {
+        "fenced": f"Here is my analysis:\n```json\n{body}\n```\nLet me know if you need more.",
+        "bare": body,
+        "prose braces": "Note {this} and {that}. " * (size // 25) + body,
+        "unclosed braces": "{ " * (size // 2) + body,
+        "deep nesting": '{"a": ' * (size // 6) + '1' + '}' * (size // 6),
+        "unbalanced": '{"a": ' * (size // 6),
+        "unclosed fence": "```json\n" + "text without closing fence " * (size // 27),
+        "no json": "The model refused to answer in the requested format. " * (size // 52),
+    }
+
+
+def bench_json(args):
+    """Time the single-pass extractor against the old regex strategies on each response shape."""
+    print(f"\n{'response':<16} {'size':>9} {'regex':>10} {'found':>6} {'single pass':>12} {'found':>6}")
+    for size in args.size or [2000, 200000]:
+        for name, text in json_benchmark_responses(size).items():
+            timings = []
+            results = []
+            for extract in (extract_json_by_regex, extract_json):
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    result = extract(text)
+                timings.append((time.perf_counter() - start) / args.repeat)
+                results.append(result)
+            found = ["yes" if result is not None else "no" for result in results]
+            print(f"{name:<16} {len(text):>9} {timings[0] * 1000:>8.2f}ms {found[0]:>6} "
+                  f"{timings[1] * 1000:>10.2f}ms {found[1]:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='DeepContext pipeline benchmarks',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    frames_parser = subparsers.add_parser('frames', help='Full-decode vs. seek-based frame sampling')
+    frames_parser.add_argument('--video', action='append', help='Video to benchmark (repeatable); defaults to synthetic 60s and 600s clips')
+    frames_parser.add_argument('--num-frames', type=int, default=50, help='Frames to sample per video (default: 50)')
+    frames_parser.set_defaults(func=bench_frames)
+
+    ocr_parser = subparsers.add_parser('ocr', help='Full-frame vs. text-region OCR')
+    ocr_parser.add_argument('--video', action='append', help='Video to benchmark (repeatable); defaults to ../media/video.mp4')
+    ocr_parser.add_argument('--num-frames', type=int, default=15, help='Frames to sample per video (default: 15)')
+    ocr_parser.set_defaults(func=bench_ocr)
+
+    triage_parser = subparsers.add_parser('triage', help='Precision/recall of the triage pre-filter against LLM verdicts')
+    triage_parser.add_argument('--json-dir', required=True, help='Directory of JSON files (as produced by text_gen.py)')
+    triage_parser.add_argument('--results-dir', help='Saved analyses from main.py --output-dir to use as labels (default: run the detector)')
+    triage_parser.add_argument('--threshold', type=float, action='append', help='Threshold to evaluate (repeatable)')
+    triage_parser.set_defaults(func=bench_triage)
+
+    json_parser = subparsers.add_parser('json', help='Single-pass JSON extraction vs. the old regex strategies')
+    json_parser.add_argument('--size', type=int, action='append', help='Approximate response size in characters (repeatable)')
+    json_parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement (default: 5)')
+    json_parser.set_defaults(func=bench_json)
+
+    args = parser.parse_args()
+    args.func(args)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
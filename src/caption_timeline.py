@@ -0,0 +1,107 @@
+import re
+from difflib import SequenceMatcher
+
+# Lines at least this similar (0-1) are treated as the same caption
+SIMILARITY_THRESHOLD = 0.85
+# A line shorter than this (in letters/digits) is OCR noise, not a caption
+MIN_ALNUM_CHARS = 3
+# Partial-reveal merges ("shocking turn" then "shocking turn of") need a line at least this long
+MIN_CONTAINED_LENGTH = 8
+# A line is only merged with captions seen within this many preceding OCR'd frames,
+# so a caption that returns later (A, B, A) gets a new entry
+MERGE_WINDOW_FRAMES = 2
+
+# Words that flip a caption's meaning; two lines differing in them are never merged
+NEGATIONS = frozenset(["not", "no", "never", "none", "nothing", "nobody", "neither", "nor", "without", "cannot"])
+
+
+def normalize_line(line):
+    """Lowercase a line and reduce it to words, for fuzzy comparison."""
+    return " ".join(re.findall(r"[a-z0-9@#']+", line.lower()))
+
+
+def is_noise(line):
+    """Whether an OCR line is too short to be real text (e.g. 'q', '=z', '—_ }')."""
+    return len(re.findall(r"[A-Za-z0-9]", line)) < MIN_ALNUM_CHARS
+
+
+def _meaning_tokens(key):
+    """Numbers and negations of a normalized line, which a fuzzy match must not paper over."""
+    return [word for word in key.split()
+            if word[0].isdigit() or word in NEGATIONS or word.endswith("n't")]
+
+
+def _same_caption(key, other_key, threshold):
+    """
+    Fuzzy-match two normalized lines, treating a partial reveal as the same caption.
+
+    A partial reveal is a line that starts the other one at a word boundary.
+    Otherwise both lines must carry the same numbers and negations and be at
+    least `threshold` similar, so "90%" vs "9%" or "safe" vs "not safe" stay apart.
+    """
+    shorter, longer = sorted((key, other_key), key=len)
+    if len(shorter) >= MIN_CONTAINED_LENGTH and (longer == shorter or longer.startswith(shorter + " ")):
+        return True
+
+    if _meaning_tokens(key) != _meaning_tokens(other_key):
+        return False
+
+    matcher = SequenceMatcher(None, key, other_key, autojunk=False)
+    return matcher.real_quick_ratio() >= threshold and matcher.quick_ratio() >= threshold and matcher.ratio() >= threshold
+
+
+def build_caption_timeline(ocr_results, threshold=SIMILARITY_THRESHOLD, window=MERGE_WINDOW_FRAMES):
+    """
+    Merge OCR lines from consecutive frames into a deduplicated caption timeline.
+
+    Every line is compared with the captions seen in the last `window` frames.
+    Repeats, including a watermark present throughout and slightly different
+    OCR readings of the same caption, extend the existing entry instead of
+    being added again. Only recent captions are compared, so the cost stays
+    linear in the number of lines.
+
+    Args:
+        ocr_results (iterable): (timestamp, text) pairs in frame order
+        threshold (float): Minimum similarity for two lines to be merged
+        window (int): How many preceding frames a caption stays mergeable for
+
+    Returns:
+        list: Dicts with 'start', 'end', 'text' and 'frames', ordered by first appearance
+    """
+    captions = []
+    active = []
+
+    for frame_number, (timestamp, text) in enumerate(ocr_results):
+        active = [caption for caption in active if frame_number - caption["last_frame"] <= window]
+
+        for line in text.splitlines():
+            line = " ".join(line.split())
+            if is_noise(line):
+                continue
+
+            key = normalize_line(line)
+            match = next((caption for caption in active if _same_caption(key, caption["key"], threshold)), None)
+
+            if match is None:
+                caption = {"key": key, "start": timestamp, "end": timestamp, "text": line, "frames": 1,
+                           "last_frame": frame_number}
+                captions.append(caption)
+                active.append(caption)
+                continue
+
+            match["end"] = max(match["end"], timestamp)
+            match["last_frame"] = frame_number
+            match["frames"] += 1
+            # Keep the most complete reading of the caption
+            if len(key) > len(match["key"]):
+                match["key"], match["text"] = key, line
+
+    return [
+        {"start": round(c["start"], 2), "end": round(c["end"], 2), "text": c["text"], "frames": c["frames"]}
+        for c in captions
+    ]
+
+
+def timeline_to_text(timeline):
+    """Join a caption timeline into the newline-separated text used for 'extracted_text'."""
+    return "\n".join(caption["text"] for caption in timeline)
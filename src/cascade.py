@@ -0,0 +1,134 @@
+import os
+import threading
+
+SMALL_MODEL = "llama3-8b-8192"
+LARGE_MODEL = "llama3-70b-8192"
+
+# Escalate verdicts the small model is less sure of than this
+DEFAULT_MIN_CONFIDENCE = 0.8
+
+# Groq list prices in USD per million (input, output) tokens
+MODEL_PRICES = {
+    "llama3-8b-8192": (0.05, 0.08),
+    "llama3-70b-8192": (0.59, 0.79),
+}
+
+
+class ModelCascade:
+    def __init__(self, small_model=SMALL_MODEL, large_model=LARGE_MODEL, min_confidence=None,
+                 escalate_positive=True, prices=None):
+        """
+        Route detection to a small model first and escalate to a large one when needed.
+
+        A text is re-analyzed by the large model when the small model's verdict
+        is positive (so every flag is confirmed by the stronger model), when its
+        confidence_score is below `min_confidence`, or when it failed to produce
+        a usable verdict. Everything else keeps the small model's answer.
+
+        Args:
+            small_model (str): First-tier model
+            large_model (str): Model escalations go to
+            min_confidence (float, optional): Confidence below which a verdict is
+                escalated. Defaults to $DEEPCONTEXT_CASCADE_MIN_CONFIDENCE, then 0.8.
+            escalate_positive (bool): Escalate every positive verdict regardless of confidence
+            prices (dict, optional): {model: (input, output) USD per million tokens},
+                used for the cost report. Defaults to MODEL_PRICES.
+        """
+        if min_confidence is None:
+            min_confidence = float(os.getenv("DEEPCONTEXT_CASCADE_MIN_CONFIDENCE", DEFAULT_MIN_CONFIDENCE))
+        self.small_model = small_model
+        self.large_model = large_model
+        self.min_confidence = min_confidence
+        self.escalate_positive = escalate_positive
+        self.prices = prices or MODEL_PRICES
+
+        self._lock = threading.Lock()
+        self.stats = {
+            tier: {"documents": 0, "seconds": 0.0, "input_tokens": 0, "output_tokens": 0}
+            for tier in ("small", "large")
+        }
+        self.escalations = {}
+
+    def escalation_reason(self, result):
+        """
+        Why a small-model verdict should go to the large model.
+
+        Returns:
+            str: The reason, or None if the verdict can be kept
+        """
+        if result.get("triage", {}).get("skipped"):
+            return None
+        verdict = result.get("contains_misinformation")
+        confidence = result.get("confidence_score")
+        if verdict is None or confidence is None:
+            return "no usable verdict"
+        if verdict is True and self.escalate_positive:
+            return "positive verdict"
+        if confidence < self.min_confidence:
+            return "low confidence"
+        return None
+
+    def record(self, tier, seconds, input_tokens, output_tokens):
+        """Count one document analyzed at `tier` ("small" or "large")."""
+        with self._lock:
+            stats = self.stats[tier]
+            stats["documents"] += 1
+            stats["seconds"] += seconds
+            stats["input_tokens"] += input_tokens
+            stats["output_tokens"] += output_tokens
+
+    def record_escalation(self, reason):
+        with self._lock:
+            self.escalations[reason] = self.escalations.get(reason, 0) + 1
+
+    def _cost(self, model, input_tokens, output_tokens):
+        input_price, output_price = self.prices.get(model, (0.0, 0.0))
+        return (input_tokens * input_price + output_tokens * output_price) / 1e6
+
+    def report(self):
+        """
+        Traffic share per tier, with estimated latency and cost against running the large model only.
+
+        The large-model-only baseline assumes every document would have cost
+        the large model's price for the small model's token counts, and taken
+        the mean latency observed for escalated documents.
+
+        Returns:
+            dict: documents, escalated, small_share, escalations by reason,
+                seconds and cost (actual and baseline), latency_saving and cost_saving
+        """
+        small, large = self.stats["small"], self.stats["large"]
+        documents = small["documents"]
+        report = {
+            "documents": documents,
+            "escalated": large["documents"],
+            "small_share": (documents - large["documents"]) / documents if documents else 0.0,
+            "escalations": dict(self.escalations),
+            "seconds": small["seconds"] + large["seconds"],
+            "cost": (self._cost(self.small_model, small["input_tokens"], small["output_tokens"]) +
+                     self._cost(self.large_model, large["input_tokens"], large["output_tokens"])),
+            "baseline_cost": self._cost(self.large_model, small["input_tokens"], small["output_tokens"]),
+            "baseline_seconds": None,
+            "latency_saving": None
+        }
+        report["cost_saving"] = 1 - report["cost"] / report["baseline_cost"] if report["baseline_cost"] else 0.0
+        if large["documents"]:
+            report["baseline_seconds"] = documents * large["seconds"] / large["documents"]
+            report["latency_saving"] = 1 - report["seconds"] / report["baseline_seconds"]
+        return report
+
+    def summary(self):
+        """Short report of tier shares and the estimated savings against the large model only."""
+        report = self.report()
+        lines = [
+            f"Cascade: {report['documents']} documents, {report['documents'] - report['escalated']} answered by "
+            f"{self.small_model} ({report['small_share']:.0%}), {report['escalated']} escalated to {self.large_model}"
+            + (f" ({', '.join(f'{count} {reason}' for reason, count in sorted(report['escalations'].items()))})"
+               if report["escalations"] else ""),
+            f"Cascade cost: ${report['cost']:.4f} vs ${report['baseline_cost']:.4f} {self.large_model}-only "
+            f"(saving {report['cost_saving']:.0%})"
+        ]
+        if report["latency_saving"] is not None:
+            lines.append(f"Cascade latency: {report['seconds']:.1f}s vs ~{report['baseline_seconds']:.1f}s "
+                         f"{self.large_model}-only (saving {report['latency_saving']:.0%})")
+        return "\n".join(lines)
@@ -0,0 +1,122 @@
+import os
+import asyncio
+import threading
+import importlib.util
+import weakref
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from groq import Groq, AsyncGroq
+
+# Seconds to establish a connection, and to wait for data on an idle one
+CONNECT_TIMEOUT = float(os.getenv("DEEPCONTEXT_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("DEEPCONTEXT_READ_TIMEOUT", "60"))
+
+# Keep-alive connections kept open per host
+POOL_SIZE = int(os.getenv("DEEPCONTEXT_HTTP_POOL_SIZE", "20"))
+
+# HTTP/2 needs the optional h2 package (pip install httpx[http2])
+HTTP2 = importlib.util.find_spec("h2") is not None and os.getenv("DEEPCONTEXT_HTTP2", "1") not in ("0", "false", "no")
+
+
+def requests_timeout(read=None):
+    """(connect, read) timeout for requests; `read` defaults to READ_TIMEOUT."""
+    return (CONNECT_TIMEOUT, read or READ_TIMEOUT)
+
+
+def httpx_timeout(read=None):
+    """httpx.Timeout with the shared connect timeout; `read` defaults to READ_TIMEOUT."""
+    return httpx.Timeout(read or READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+
+
+class ClientRegistry:
+    def __init__(self):
+        """
+        Process-wide HTTP clients, created on first use and shared by every component.
+
+        All Groq, OpenAI-compatible and SerpAPI traffic goes through one pooled
+        requests.Session, one httpx.Client per Groq key and one
+        httpx.AsyncClient per event loop, so connections (and their TCP+TLS
+        handshakes) are reused across calls. Async clients are tied to the loop
+        that created them; aclose() releases the current loop's.
+        """
+        self._lock = threading.Lock()
+        self._session = None
+        self._http = None
+        self._groq = {}
+        self._async = weakref.WeakKeyDictionary()  # loop -> {"http": AsyncClient, "groq": {api_key: AsyncGroq}}
+
+    def _limits(self):
+        return httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE)
+
+    def session(self):
+        """The shared requests.Session, with a connection pool of POOL_SIZE per host."""
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+    def http(self):
+        """The shared synchronous httpx.Client (HTTP/2 when h2 is installed)."""
+        with self._lock:
+            if self._http is None:
+                self._http = httpx.Client(http2=HTTP2, limits=self._limits(), timeout=httpx_timeout())
+            return self._http
+
+    def groq(self, api_key):
+        """Groq client for `api_key`, on the shared httpx.Client. SDK retries are off (see retry.py)."""
+        http_client = self.http()
+        with self._lock:
+            if api_key not in self._groq:
+                self._groq[api_key] = Groq(api_key=api_key, max_retries=0, http_client=http_client)
+            return self._groq[api_key]
+
+    def _loop_clients(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async.get(loop)
+            if clients is None:
+                clients = {
+                    "http": httpx.AsyncClient(http2=HTTP2, limits=self._limits(), timeout=httpx_timeout()),
+                    "groq": {}
+                }
+                self._async[loop] = clients
+            return clients
+
+    def async_http(self):
+        """The running event loop's shared httpx.AsyncClient."""
+        return self._loop_clients()["http"]
+
+    def async_groq(self, api_key):
+        """AsyncGroq client for `api_key` on the running loop's shared httpx.AsyncClient."""
+        clients = self._loop_clients()
+        with self._lock:
+            if api_key not in clients["groq"]:
+                clients["groq"][api_key] = AsyncGroq(api_key=api_key, max_retries=0, http_client=clients["http"])
+            return clients["groq"][api_key]
+
+    async def aclose(self):
+        """Close the running event loop's async clients; later calls on this loop open new ones."""
+        with self._lock:
+            clients = self._async.pop(asyncio.get_running_loop(), None)
+        if clients is not None:
+            await clients["http"].aclose()
+
+    def close(self):
+        """Close the synchronous session and client."""
+        with self._lock:
+            session, http = self._session, self._http
+            self._session = self._http = None
+            self._groq = {}
+        if session is not None:
+            session.close()
+        if http is not None:
+            http.close()
+
+
+# Shared by every component in the process
+clients = ClientRegistry()
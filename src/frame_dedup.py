@@ -0,0 +1,167 @@
+import cv2
+import numpy as np
+from text_regions import detect_text_regions
+
+# Max Hamming distance (out of 64 bits) between dHashes of near-identical frames
+HASH_THRESHOLD = 6
+# Max histogram distance (0 = identical, 1 = disjoint) that still counts as the same scene
+SCENE_THRESHOLD = 0.15
+HISTOGRAM_BINS = 64
+# A new caption on a static background barely moves the hash or histogram, so
+# duplicates must also keep the strokes inside every detected text region (the
+# regions OCR reads): at most this share of a region's stroke pixels may appear
+# or vanish between them
+TEXT_CHANGE_THRESHOLD = 0.03
+# Stroke masks are compared at this width
+STROKE_WIDTH = 360
+# Regions with fewer stroke pixels than this (at STROKE_WIDTH) are too empty to compare
+MIN_REGION_STROKES = 40
+
+
+def dhash(image, hash_size=8):
+    """
+    Compute a difference hash of a BGR or grayscale frame.
+
+    Returns:
+        numpy.ndarray: Flat boolean array of hash_size * hash_size bits
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    return (small[:, 1:] > small[:, :-1]).ravel()
+
+
+def gray_histogram(image, bins=HISTOGRAM_BINS):
+    """Compute a normalized grayscale intensity histogram of a frame."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    hist = np.bincount(gray.ravel().astype(np.int32) * bins // 256, minlength=bins).astype(np.float64)
+    return hist / max(hist.sum(), 1.0)
+
+
+def scene_change_score(hist_a, hist_b):
+    """Half the L1 distance between two normalized histograms (0 = same, 1 = disjoint)."""
+    return 0.5 * float(np.abs(hist_a - hist_b).sum())
+
+
+def text_strokes(image, width=STROKE_WIDTH):
+    """
+    Edge strokes of a frame and its text regions (see text_regions.detect_text_regions), downscaled to `width`.
+
+    Returns:
+        tuple: (uint8 stroke mask with 255 on strokes, list of (x, y, w, h) text boxes in mask coordinates)
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    height, full_width = gray.shape
+    scale = min(1.0, width / full_width)
+    if scale < 1.0:
+        gray = cv2.resize(gray, (int(full_width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+
+    gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+    _, strokes = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+
+    boxes = [(int(x * scale), int(y * scale), int(w * scale) + 1, int(h * scale) + 1)
+             for x, y, w, h in detect_text_regions(image)]
+    return strokes, boxes
+
+
+def text_change_score(text_a, text_b):
+    """
+    Largest share, over the text regions of both frames, of stroke pixels with
+    no stroke within one pixel in the other frame.
+
+    Args:
+        text_a, text_b (tuple): text_strokes() of two frames of the same size
+
+    Returns:
+        float: 0 when every text region keeps its strokes (or neither frame has text),
+            up to 1 when a region's text is entirely new
+    """
+    (strokes_a, boxes_a), (strokes_b, boxes_b) = text_a, text_b
+    kernel = np.ones((3, 3), np.uint8)
+    appeared = cv2.subtract(strokes_a, cv2.dilate(strokes_b, kernel))
+    vanished = cv2.subtract(strokes_b, cv2.dilate(strokes_a, kernel))
+
+    score = 0.0
+    for x, y, w, h in boxes_a + boxes_b:
+        region = (slice(y, y + h), slice(x, x + w))
+        total = cv2.countNonZero(strokes_a[region]) + cv2.countNonZero(strokes_b[region])
+        if total < MIN_REGION_STROKES:
+            continue
+        changed = cv2.countNonZero(appeared[region]) + cv2.countNonZero(vanished[region])
+        score = max(score, changed / total)
+    return score
+
+
+class FrameDeduplicator:
+    def __init__(self, hash_threshold=HASH_THRESHOLD, scene_threshold=SCENE_THRESHOLD,
+                 text_threshold=TEXT_CHANGE_THRESHOLD):
+        """
+        Drop sampled frames that are near-identical to the last frame kept.
+
+        A frame is a duplicate only when its perceptual hash, its intensity
+        histogram and the strokes in its text regions are all close to the
+        previous kept frame. The text check only runs on frames the first two
+        already consider duplicates.
+
+        Args:
+            hash_threshold (int): Max dHash Hamming distance for a duplicate
+            scene_threshold (float): Max histogram distance for a duplicate
+            text_threshold (float): Max text_change_score for a duplicate
+        """
+        self.hash_threshold = hash_threshold
+        self.scene_threshold = scene_threshold
+        self.text_threshold = text_threshold
+
+        self.frames_seen = 0
+        self.frames_skipped = 0
+
+        self._last_hash = None
+        self._last_hist = None
+        self._last_image = None
+        self._last_text = None
+
+    def _same_text(self, image):
+        if self._last_text is None:
+            self._last_text = text_strokes(self._last_image)
+        return text_change_score(text_strokes(image), self._last_text) <= self.text_threshold
+
+    def is_duplicate(self, frame):
+        """Check a frame against the last kept frame, and remember it if it is kept."""
+        frame_hash = dhash(frame.image)
+        frame_hist = gray_histogram(frame.image)
+
+        duplicate = (
+            self._last_hash is not None
+            and int(np.count_nonzero(frame_hash != self._last_hash)) <= self.hash_threshold
+            and scene_change_score(frame_hist, self._last_hist) <= self.scene_threshold
+            and self._same_text(frame.image)
+        )
+
+        if not duplicate:
+            self._last_hash = frame_hash
+            self._last_hist = frame_hist
+            self._last_image = frame.image
+            self._last_text = None
+
+        return duplicate
+
+    def filter(self, frames):
+        """
+        Yield only the frames that differ from the previously kept frame.
+
+        Args:
+            frames (iterable of Frame): Sampled frames in video order
+
+        Yields:
+            Frame: Frames worth sending to OCR
+        """
+        for frame in frames:
+            self.frames_seen += 1
+            if self.is_duplicate(frame):
+                self.frames_skipped += 1
+                continue
+            yield frame
+
+    def summary(self):
+        """Describe how many OCR calls the deduplication saved."""
+        return (f"Frame dedup: kept {self.frames_seen - self.frames_skipped}/{self.frames_seen} frames, "
+                f"saved {self.frames_skipped} Tesseract calls")
@@ -0,0 +1,102 @@
+import os
+from collections import namedtuple
+import cv2
+
+# A sampled video frame: position in the stream, time in seconds, BGR pixel array
+Frame = namedtuple("Frame", ["index", "timestamp", "image"])
+
+# Targets closer than this many frames are reached with grab() (no colour
+# conversion) rather than a seek, since a seek restarts decoding at the
+# previous keyframe
+GRAB_THRESHOLD = 30
+
+
+def probe_video(video_path):
+    """
+    Read frame count, frame rate and duration from a video's container metadata.
+
+    Returns:
+        tuple: (total_frames, fps, duration_seconds), or None if the video can't be opened
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return None
+
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    cap.release()
+
+    duration = total_frames / fps if fps > 0 else 0.0
+    return total_frames, fps, duration
+
+
+def uniform_frame_indices(total_frames, num_frames):
+    """
+    Pick `num_frames` frame indices spread evenly across the whole video.
+
+    Each index is the centre of one of `num_frames` equal segments, so the
+    start, middle and end of the video are all covered.
+    """
+    num_frames = max(0, min(num_frames, total_frames))
+    if num_frames == 0:
+        return []
+
+    step = total_frames / num_frames
+    return sorted({min(total_frames - 1, int((i + 0.5) * step)) for i in range(num_frames)})
+
+
+def iter_frames(video_path, num_frames, debug_dir=None):
+    """
+    Yield `num_frames` frames sampled uniformly over the video's full duration.
+
+    Only the target frames are decoded and converted: short gaps are skipped
+    with grab(), longer ones with a seek.
+
+    Args:
+        video_path (str): Path to the video file
+        num_frames (int): Number of frames to sample
+        debug_dir (str, optional): If set, also write each yielded frame to this
+            directory as a PNG (for debugging only; OCR never reads these files)
+
+    Yields:
+        Frame: namedtuple of (index, timestamp, image)
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        print(f"Error: Failed to open {video_path}.")
+        return
+
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+
+    if debug_dir:
+        os.makedirs(debug_dir, exist_ok=True)
+
+    position = 0  # Index of the next frame the decoder will return
+    try:
+        for index in uniform_frame_indices(total_frames, num_frames):
+            if index - position > GRAB_THRESHOLD:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+                position = index
+
+            while position < index:
+                if not cap.grab():
+                    return
+                position += 1
+
+            ret, image = cap.read()
+            if not ret:
+                break  # Container frame count overestimated the stream length
+            position += 1
+
+            timestamp = index / fps if fps > 0 else 0.0
+
+            if debug_dir:
+                frame_path = os.path.join(debug_dir, f"frame{index}.png")
+                cv2.imwrite(frame_path, image)
+                print(f"Extracted: {frame_path}")
+
+            yield Frame(index, timestamp, image)
+    finally:
+        cap.release()
+
@@ -1,37 +1,58 @@
 import os
 import json
+import asyncio
 from datetime import datetime
 from misinformation_detector import MisinformationDetector
 from web_context_agent import WebContextAgent
+from llm_backend import create_backend
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
 class IntegratedSystem:
-    def __init__(self, groq_api_key=None, serpapi_key=None):
+    def __init__(self, groq_api_key=None, serpapi_key=None, cache=None, fused_claims=True, backend=None, triage=None,
+                 cascade=None, search_cache=None):
         """
         Initialize the integrated misinformation detection and context system.
         
         Args:
             groq_api_key (str, optional): Groq API key for LLM access
             serpapi_key (str, optional): SerpAPI key for web search
+            cache (ResponseCache or bool, optional): Analysis cache passed to the
+                detector; False disables caching
+            fused_claims (bool): Ask for the main claim in the detection call itself,
+                so positive cases need one LLM round trip instead of two
+            backend (LLMBackend or str, optional): LLM backend, or its name ("groq",
+                "openai", "stub"), shared by both components. Defaults to
+                $DEEPCONTEXT_LLM_BACKEND, then Groq.
+            triage (ClaimTriage, optional): Local pre-filter that skips the LLM for
+                texts with no checkable claims
+            cascade (ModelCascade, optional): Small-model-first routing for detection
+                calls that don't name a model
+            search_cache (ResponseCache or bool, optional): Search result cache
+                passed to the context agent; False disables it
         """
-        self.groq_api_key = os.getenv("GROQ_API_KEY")
+        self.groq_api_key = groq_api_key or os.getenv("GROQ_API_KEY")
         self.serpapi_key = os.getenv("SERPAPI_KEY")
         
-        if not self.groq_api_key:
-            raise ValueError("Groq API key not provided and not found in environment variables")
+        # One backend (and its connections) for the detector and the context agent
+        if backend is None or isinstance(backend, str):
+            backend = create_backend(backend, groq_api_key=self.groq_api_key)
+        self.backend = backend
+        
+        self.fused_claims = fused_claims
         
         # Initialize components
-        self.detector = MisinformationDetector(api_key=self.groq_api_key)
+        self.detector = MisinformationDetector(cache=cache, backend=self.backend, triage=triage, cascade=cascade)
         
         # Only initialize web context agent if search API key is available
         self.context_agent = None
         if self.serpapi_key:
             self.context_agent = WebContextAgent(
-                api_key=self.groq_api_key, 
-                search_api_key=self.serpapi_key
+                search_api_key=self.serpapi_key,
+                backend=self.backend,
+                search_cache=search_cache
             )
     
     def analyze_json_file(self, json_file_path, model=None, include_web_context=True):
@@ -55,18 +76,11 @@ class IntegratedSystem:
             combined_text = self.detector.process_json_input(json_data)
             
             if not combined_text:
-                return {
-                    "error": "No text data found in JSON file",
-                    "contains_misinformation": None,
-                    "confidence_score": None,
-                    "detected_criteria": [],
-                    "explanation": "Could not analyze empty text data",
-                    "web_context": None
-                }
+                return self._empty_text_result()
             
             # Step 1: Analyze text for potential misinformation
             print("Step 1: Analyzing text for potential misinformation...")
-            detection_result = self.detector.analyze_text(combined_text, model)
+            detection_result = self.detector.analyze_text(combined_text, model, include_claims=self.fused_claims)
             
             # Initialize result with detection data
             result = {
@@ -80,13 +94,12 @@ class IntegratedSystem:
             self.print_analysis_result(detection_result)
             
             # Step 2: Get web context if misinformation detected and context agent available
-            if (include_web_context and self.context_agent and 
-                    detection_result.get("contains_misinformation", False) is True):
+            if self.needs_web_context(detection_result, include_web_context):
                 
                 print("\nStep 2: Getting additional context from the web...")
                 
                 # Extract the main claim(s) from the text
-                claim = self.detector.extract_claim(combined_text, detection_result)
+                claim = self.get_claim(combined_text, detection_result)
                 print(f"Extracted claim: {claim}")
                 
                 # Fetch web context for the claim
@@ -94,42 +107,14 @@ class IntegratedSystem:
                 result["web_context"] = context_data
                 
                 # Print web context
-                if context_data and "error" not in context_data:
-                    print(self.context_agent.format_context_for_display(context_data))
-                elif "error" in context_data:
-                    print(f"Error retrieving web context: {context_data['error']}")
-                else:
-                    print("No web context retrieved")
-            elif detection_result.get("contains_misinformation", False) is True and not self.context_agent:
-                print("\nStep 2 skipped: Web context agent not available (SERPAPI_KEY not set)")
-            elif detection_result.get("contains_misinformation", False) is not True:
-                print("\nStep 2 skipped: No misinformation detected")
-            elif not include_web_context:
-                print("\nStep 2 skipped: Web context disabled")
+                self.print_web_context(context_data)
+            else:
+                self.print_context_skipped(detection_result, include_web_context)
             
             return result
             
-        except FileNotFoundError:
-            print(f"Error: JSON file not found at {json_file_path}")
-            return {
-                "error": f"JSON file not found: {json_file_path}",
-                "misinformation_analysis": {"contains_misinformation": None},
-                "web_context": None
-            }
-        except json.JSONDecodeError:
-            print(f"Error: Invalid JSON format in file {json_file_path}")
-            return {
-                "error": f"Invalid JSON format in file: {json_file_path}",
-                "misinformation_analysis": {"contains_misinformation": None},
-                "web_context": None
-            }
         except Exception as e:
-            print(f"Error analyzing JSON file: {str(e)}")
-            return {
-                "error": f"Error analyzing JSON file: {str(e)}",
-                "misinformation_analysis": {"contains_misinformation": None},
-                "web_context": None
-            }
+            return self._file_error_result(json_file_path, e)
     
     def analyze_text(self, text_data, model=None, include_web_context=True):
         """
@@ -145,8 +130,22 @@ class IntegratedSystem:
         """
         # Step 1: Detect potential misinformation
         print("Step 1: Analyzing text for potential misinformation...")
-        detection_result = self.detector.analyze_text(text_data, model)
+        detection_result = self.detector.analyze_text(text_data, model, include_claims=self.fused_claims)
         
+        return self.complete_analysis(text_data, detection_result, include_web_context)
+    
+    def complete_analysis(self, text_data, detection_result, include_web_context=True):
+        """
+        Print a detection result and, for positive verdicts, add web context (step 2).
+
+        Args:
+            text_data (str): The analyzed text
+            detection_result (dict): Result of the detector for text_data
+            include_web_context (bool): Whether to include web context
+
+        Returns:
+            dict: Analysis result with misinformation detection and context
+        """
         # Initialize result with detection data
         result = {
             "misinformation_analysis": detection_result,
@@ -158,13 +157,12 @@ class IntegratedSystem:
         self.print_analysis_result(detection_result)
         
         # Step 2: Get web context if misinformation detected and context agent available
-        if (include_web_context and self.context_agent and 
-                detection_result.get("contains_misinformation", False) is True):
+        if self.needs_web_context(detection_result, include_web_context):
             
             print("\nStep 2: Getting additional context from the web...")
             
             # Extract the main claim(s) from the text
-            claim = self.detector.extract_claim(text_data, detection_result)
+            claim = self.get_claim(text_data, detection_result)
             print(f"Extracted claim: {claim}")
             
             # Fetch web context for the claim
@@ -172,20 +170,257 @@ class IntegratedSystem:
             result["web_context"] = context_data
             
             # Print web context
-            if context_data and "error" not in context_data:
-                print(self.context_agent.format_context_for_display(context_data))
-            elif "error" in context_data:
-                print(f"Error retrieving web context: {context_data['error']}")
-            else:
-                print("No web context retrieved")
-        elif detection_result.get("contains_misinformation", False) is True and not self.context_agent:
+            self.print_web_context(context_data)
+        else:
+            self.print_context_skipped(detection_result, include_web_context)
+        
+        return result
+    
+    def _file_error_result(self, json_file_path, error):
+        """Print and build the result returned when a JSON file can't be analyzed."""
+        if isinstance(error, FileNotFoundError):
+            print(f"Error: JSON file not found at {json_file_path}")
+            message = f"JSON file not found: {json_file_path}"
+        elif isinstance(error, json.JSONDecodeError):
+            print(f"Error: Invalid JSON format in file {json_file_path}")
+            message = f"Invalid JSON format in file: {json_file_path}"
+        else:
+            print(f"Error analyzing JSON file: {str(error)}")
+            message = f"Error analyzing JSON file: {str(error)}"
+
+        return {
+            "error": message,
+            "misinformation_analysis": {"contains_misinformation": None},
+            "web_context": None
+        }
+
+    def _empty_text_result(self):
+        """Result returned for a JSON file with no text to analyze."""
+        return {
+            "error": "No text data found in JSON file",
+            "contains_misinformation": None,
+            "confidence_score": None,
+            "detected_criteria": [],
+            "explanation": "Could not analyze empty text data",
+            "web_context": None
+        }
+
+    def needs_web_context(self, detection_result, include_web_context=True):
+        """Whether step 2 (web context) should run for a detection result."""
+        return (include_web_context and self.context_agent is not None and
+                detection_result.get("contains_misinformation", False) is True)
+
+    def print_web_context(self, context_data):
+        """Print the outcome of a web context lookup."""
+        if context_data and "error" not in context_data:
+            print(self.context_agent.format_context_for_display(context_data))
+        elif "error" in context_data:
+            print(f"Error retrieving web context: {context_data['error']}")
+        else:
+            print("No web context retrieved")
+
+    def print_context_skipped(self, detection_result, include_web_context=True):
+        """Print why step 2 (web context) was skipped."""
+        if detection_result.get("contains_misinformation", False) is True and not self.context_agent:
             print("\nStep 2 skipped: Web context agent not available (SERPAPI_KEY not set)")
         elif detection_result.get("contains_misinformation", False) is not True:
             print("\nStep 2 skipped: No misinformation detected")
         elif not include_web_context:
             print("\nStep 2 skipped: Web context disabled")
-        
+
+    def analyze_json_file_stream(self, json_file_path, model=None, include_web_context=True):
+        """
+        Streaming counterpart of analyze_json_file, for interactive front ends.
+
+        Detection and context synthesis are streamed, so a verdict can be shown
+        while the explanation and web context are still being generated.
+
+        Args:
+            json_file_path (str): Path to JSON file with video data
+            model (str, optional): Llama model to use
+            include_web_context (bool): Whether to include web context
+
+        Yields:
+            tuple: (stage, field name, value). Stage "detection" or "context" carries
+                each field as it completes and then ("result", full dict) for that
+                stage; the final event is ("done", "result", the analyze_json_file result).
+        """
+        try:
+            with open(json_file_path, 'r', encoding='utf-8') as f:
+                combined_text = self.detector.process_json_input(json.load(f))
+        except Exception as e:
+            yield "done", "result", self._file_error_result(json_file_path, e)
+            return
+
+        if not combined_text:
+            yield "done", "result", self._empty_text_result()
+            return
+
+        detection_result = None
+        for name, value in self.detector.analyze_text_stream(combined_text, model, include_claims=self.fused_claims):
+            if name == "result":
+                detection_result = value
+            yield "detection", name, value
+
+        result = {
+            "misinformation_analysis": detection_result,
+            "web_context": None,
+            "input_file": os.path.basename(json_file_path),
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+        if self.needs_web_context(detection_result, include_web_context):
+            claim = self.get_claim(combined_text, detection_result)
+            for name, value in self.context_agent.fetch_context_stream(claim):
+                if name == "result":
+                    result["web_context"] = value
+                yield "context", name, value
+
+        yield "done", "result", result
+
+    def analyze_json_files(self, json_file_paths, model=None, include_web_context=True):
+        """
+        Analyze many JSON files, batching their detection requests.
+
+        Short documents are packed into shared detection requests (see
+        MisinformationDetector.analyze_batch); web context is then fetched
+        per positive file as usual.
+
+        Args:
+            json_file_paths (list): Paths to JSON files with video data
+            model (str, optional): Llama model to use
+            include_web_context (bool): Whether to include web context
+
+        Returns:
+            list: Analysis results, in the same order as json_file_paths
+        """
+        results = [None] * len(json_file_paths)
+        texts, text_indices = [], []
+
+        for index, json_file_path in enumerate(json_file_paths):
+            try:
+                with open(json_file_path, 'r', encoding='utf-8') as f:
+                    combined_text = self.detector.process_json_input(json.load(f))
+            except Exception as e:
+                results[index] = self._file_error_result(json_file_path, e)
+                continue
+
+            if not combined_text:
+                results[index] = self._empty_text_result()
+                continue
+
+            texts.append(combined_text)
+            text_indices.append(index)
+
+        print(f"Step 1: Analyzing {len(texts)} files for potential misinformation (batched)...")
+        detection_results = self.detector.analyze_batch(texts, model, include_claims=self.fused_claims)
+
+        for index, text_data, detection_result in zip(text_indices, texts, detection_results):
+            print(f"\nResults for {os.path.basename(json_file_paths[index])}:")
+            result = self.complete_analysis(text_data, detection_result, include_web_context)
+            result["input_file"] = os.path.basename(json_file_paths[index])
+            results[index] = result
+
+        return results
+
+    async def aanalyze_text(self, text_data, model=None, include_web_context=True):
+        """
+        Async counterpart of analyze_text.
+
+        Detection, claim extraction, search and context synthesis are awaited
+        rather than blocking, so many texts can be analyzed on one event loop.
+        """
+        print("Step 1: Analyzing text for potential misinformation...")
+        detection_result = await self.detector.aanalyze_text(text_data, model, include_claims=self.fused_claims)
+
+        result = {
+            "misinformation_analysis": detection_result,
+            "web_context": None,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+        self.print_analysis_result(detection_result)
+
+        if self.needs_web_context(detection_result, include_web_context):
+            print("\nStep 2: Getting additional context from the web...")
+
+            claim = await self.aget_claim(text_data, detection_result)
+            print(f"Extracted claim: {claim}")
+
+            context_data = await self.context_agent.afetch_context(claim)
+            result["web_context"] = context_data
+            self.print_web_context(context_data)
+        else:
+            self.print_context_skipped(detection_result, include_web_context)
+
         return result
+
+    async def aanalyze_json_file(self, json_file_path, model=None, include_web_context=True):
+        """Async counterpart of analyze_json_file."""
+        try:
+            with open(json_file_path, 'r', encoding='utf-8') as f:
+                json_data = json.load(f)
+
+            combined_text = self.detector.process_json_input(json_data)
+            if not combined_text:
+                return self._empty_text_result()
+
+            result = await self.aanalyze_text(combined_text, model, include_web_context)
+            result["input_file"] = os.path.basename(json_file_path)
+            return result
+
+        except Exception as e:
+            return self._file_error_result(json_file_path, e)
+
+    async def aanalyze_json_files(self, json_file_paths, model=None, include_web_context=True, concurrency=8):
+        """
+        Analyze many JSON files concurrently on one event loop.
+
+        Args:
+            json_file_paths (list): Paths to JSON files with video data
+            model (str, optional): Llama model to use
+            include_web_context (bool): Whether to include web context
+            concurrency (int): Maximum number of files in flight at once
+
+        Returns:
+            list: Analysis results, in the same order as json_file_paths
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def analyze_one(path):
+            async with semaphore:
+                return await self.aanalyze_json_file(path, model, include_web_context)
+
+        try:
+            return await asyncio.gather(*(analyze_one(path) for path in json_file_paths))
+        finally:
+            await self.aclose()
+
+    async def aclose(self):
+        """Close the async clients held by the backend and the web context agent."""
+        if self.context_agent:
+            await self.context_agent.aclose()
+        else:
+            await self.backend.aclose()
+    
+    async def aget_claim(self, text_data, detection_result):
+        """Async counterpart of get_claim."""
+        claim = detection_result.get("main_claim")
+        if claim:
+            return claim
+        return await self.detector.aextract_claim(text_data, detection_result)
+    
+    def get_claim(self, text_data, detection_result):
+        """
+        Get the claim to fact-check, reusing the one from a fused detection call.
+
+        Falls back to a separate extract_claim call when the detection result
+        has no 'main_claim' (two-call mode, or the model left it empty).
+        """
+        claim = detection_result.get("main_claim")
+        if claim:
+            return claim
+        return self.detector.extract_claim(text_data, detection_result)
     
     def print_analysis_result(self, result):
         """Print formatted analysis result."""
@@ -0,0 +1,90 @@
+import re
+import json
+
+# Between strings only braces and quotes matter
+_STRUCTURE = re.compile(r'[{}"]')
+
+# The rest of a string literal up to and including its closing quote, skipping escapes
+_STRING_REST = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+
+# A JSON object opens with a key or closes at once; other braces ("{this}" in
+# prose, "{ {" runs) are not worth scanning from
+_OBJECT_START = re.compile(r'\{\s*["}]')
+
+
+def _scan_object(text, pos):
+    """
+    Find the first top-level {...} span at or after `pos`.
+
+    Each string literal is skipped with one regex match, so the scan does a
+    constant amount of Python work per brace or string rather than per character.
+
+    Returns:
+        tuple: (begin, end), (begin, None) if the object starting at `begin`
+            never balances (e.g. a stray '{"' in prose, or a response cut off
+            at max_tokens), or None if no object starts after `pos`
+    """
+    start = _OBJECT_START.search(text, pos)
+    if start is None:
+        return None
+    begin = start.start()
+
+    depth = 0
+    pos = begin
+    while True:
+        match = _STRUCTURE.search(text, pos)
+        if match is None:
+            return begin, None
+        pos = match.end()
+        char = match.group()
+        if char == '"':
+            string_end = _STRING_REST.match(text, pos)
+            if string_end is None:
+                return begin, None
+            pos = string_end.end()
+        elif char == "{":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return begin, pos
+
+
+def extract_json(text):
+    """
+    Extract the first JSON object from an LLM response.
+
+    Finds the first balanced top-level {...} with a scan that tracks
+    string literals, so braces inside strings and ```json fences or prose
+    around the object don't matter. A candidate that never balances or
+    doesn't decode (e.g. one opened by a stray '{"' in prose) is skipped and
+    the scan continues from the next "{" after its start, so an object inside
+    or after it is still found.
+
+    Args:
+        text (str): Response text that should contain a JSON object
+
+    Returns:
+        dict: The decoded object, or None if the text holds no valid JSON object
+    """
+    if not text:
+        return None
+
+    pos = 0
+    while True:
+        span = _scan_object(text, pos)
+        if span is None:
+            return None
+
+        begin, end = span
+        if end is None:
+            pos = begin + 1
+            continue
+        try:
+            # strict=False accepts raw newlines inside strings, which models often emit
+            value = json.loads(text[begin:end], strict=False)
+        except (ValueError, RecursionError):
+            value = None
+        if isinstance(value, dict):
+            return value
+        pos = begin + 1
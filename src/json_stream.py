@@ -0,0 +1,114 @@
+import json
+
+
+class IncrementalJSONParser:
+    """
+    Parse the top-level fields of a JSON object while it is still streaming in.
+
+    Text before the opening brace (e.g. a ```json fence) is skipped. A field
+    is reported as soon as its value is complete, which for scalars means
+    once the following ',' or '}' has arrived.
+
+    Example:
+        parser = IncrementalJSONParser()
+        for chunk in chunks:
+            for key, value in parser.feed(chunk):
+                ...
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields = {}
+        self.done = False
+
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect = "key"  # At depth 1: "key", "colon", "value" or "in_value"
+        self._key_start = None
+        self._key = None
+        self._value_start = None
+
+    def feed(self, chunk):
+        """
+        Add streamed text.
+
+        Returns:
+            list: (key, value) pairs for the fields completed by this chunk
+        """
+        self.buffer += chunk
+        completed = []
+
+        buffer = self.buffer
+        while self._pos < len(buffer) and not self.done:
+            index = self._pos
+            self._pos += 1
+            self._step(buffer, index, buffer[index], completed)
+
+        return completed
+
+    def _step(self, buffer, index, char, completed):
+        """Advance the scanner by one character."""
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if self._depth == 1 and self._expect == "key":
+                    self._key = json.loads(buffer[self._key_start:index + 1])
+                    self._expect = "colon"
+            return
+
+        if self._depth == 0:
+            if char == "{":
+                self._depth = 1
+            return
+
+        if char.isspace():
+            return
+
+        if self._depth == 1:
+            if self._expect == "key":
+                if char == '"':
+                    self._in_string = True
+                    self._key_start = index
+                elif char == "}":
+                    self._depth = 0
+                    self.done = True
+                return
+            if self._expect == "colon":
+                if char == ":":
+                    self._expect = "value"
+                return
+            if self._expect == "value":
+                self._value_start = index
+                self._expect = "in_value"
+
+        if char == '"':
+            self._in_string = True
+        elif char in "{[":
+            self._depth += 1
+        elif char in "}]":
+            self._depth -= 1
+            if self._depth == 0:
+                self._finish_value(buffer, index, completed)
+                self.done = True
+        elif char == "," and self._depth == 1:
+            self._finish_value(buffer, index, completed)
+
+    def _finish_value(self, buffer, end, completed):
+        """Decode the value that just ended at `end` and record the field."""
+        if self._expect != "in_value":
+            return
+        self._expect = "key"
+
+        try:
+            value = json.loads(buffer[self._value_start:end])
+        except ValueError:
+            return  # Malformed value; the full-text parse at the end will deal with it
+
+        self.fields[self._key] = value
+        completed.append((self._key, value))
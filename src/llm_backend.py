@@ -0,0 +1,476 @@
+import os
+import re
+import json
+import time
+import asyncio
+from abc import ABC, abstractmethod
+from dotenv import load_dotenv
+from clients import clients, requests_timeout, httpx_timeout
+from rate_limiter import rate_limiter
+from retry import RetryPolicy, record_queue_wait
+from json_extract import extract_json
+from token_budget import estimate_tokens
+
+# Load environment variables from .env file
+load_dotenv()
+
+DEFAULT_MODEL = "llama3-70b-8192"
+
+
+class LLMBackend(ABC):
+    """
+    Chat-completion backend shared by the detector and the web context agent.
+
+    complete(), acomplete() and stream() take OpenAI-style messages and
+    return plain text, so the prompts and parsing code are the same whichever
+    server answers them. Transient failures are retried under the backend's
+    RetryPolicy, and each attempt first waits for its share of the provider's
+    rate limits (see rate_limiter). Subclasses implement _complete(),
+    _acomplete() and _stream() for a single attempt; a backend missing any of
+    them fails at construction rather than on its first call.
+    """
+
+    name = "base"
+
+    # Whether the server accepts response_format={"type": "json_object"}
+    supports_json_mode = False
+
+    def __init__(self, default_model=None, limiter=None, retry_policy=None):
+        # Model used when a caller doesn't pass one; $DEEPCONTEXT_LLM_MODEL overrides it
+        self.default_model = default_model or os.getenv("DEEPCONTEXT_LLM_MODEL") or DEFAULT_MODEL
+        self.limiter = limiter or rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy.from_env()
+        # $DEEPCONTEXT_LLM_JSON_MODE=0 turns JSON output mode off for servers that reject it
+        self.json_mode = self.supports_json_mode and os.getenv("DEEPCONTEXT_LLM_JSON_MODE", "1") not in ("0", "false", "no")
+
+    def _request_tokens(self, messages, max_tokens):
+        """Tokens to reserve for a request: the prompt plus the full completion allowance."""
+        return sum(estimate_tokens(message["content"]) for message in messages) + max_tokens
+
+    def _acquire(self, messages, model, max_tokens):
+        """
+        Wait for rate-limit budget; returns the number of tokens reserved.
+
+        The wait is reported to the retry policy, which leaves it out of the
+        call's latency and deadline, so the request still gets its full timeout.
+        """
+        tokens = self._request_tokens(messages, max_tokens)
+        start = time.monotonic()
+        self.limiter.acquire(self.name, model, tokens)
+        record_queue_wait(time.monotonic() - start)
+        return tokens
+
+    async def _aacquire(self, messages, model, max_tokens):
+        """Async counterpart of _acquire()."""
+        tokens = self._request_tokens(messages, max_tokens)
+        start = time.monotonic()
+        await self.limiter.aacquire(self.name, model, tokens)
+        record_queue_wait(time.monotonic() - start)
+        return tokens
+
+    def _can_hedge(self, messages, model, max_tokens):
+        """Whether a duplicate request could go out now rather than queue behind the rate limits."""
+        return not self.limiter.would_wait(self.name, model, self._request_tokens(messages, max_tokens))
+
+    def _settle(self, messages, model, reserved, text, used_tokens=None):
+        """Refund the part of a reservation the request didn't use."""
+        if used_tokens is None:
+            used_tokens = self._request_tokens(messages, 0) + estimate_tokens(text)
+        self.limiter.refund(self.name, model, reserved - used_tokens)
+
+    def _release(self, messages, model, reserved, pieces=None):
+        """
+        Refund an attempt that failed, was cancelled (e.g. a losing hedge) or was abandoned.
+
+        A stream that already produced `pieces` keeps what those used; anything
+        else gets its whole reservation back.
+        """
+        if pieces:
+            self._settle(messages, model, reserved, "".join(pieces))
+        else:
+            self.limiter.refund(self.name, model, reserved)
+
+    def json_options(self):
+        """Request options that constrain the completion to a JSON object, where supported."""
+        return {"response_format": {"type": "json_object"}} if self.json_mode else {}
+
+    def complete(self, messages, model=None, temperature=0.2, max_tokens=2000, **options):
+        """Return the completion text for a chat request."""
+        model = model or self.default_model
+        return self.retry_policy.call(
+            lambda timeout: self._complete(messages, model, temperature, max_tokens, timeout, options), key=model,
+            can_hedge=lambda: self._can_hedge(messages, model, max_tokens)
+        )
+
+    async def acomplete(self, messages, model=None, temperature=0.2, max_tokens=2000, **options):
+        """Async counterpart of complete()."""
+        model = model or self.default_model
+        return await self.retry_policy.acall(
+            lambda timeout: self._acomplete(messages, model, temperature, max_tokens, timeout, options), key=model,
+            can_hedge=lambda: self._can_hedge(messages, model, max_tokens)
+        )
+
+    def stream(self, messages, model=None, temperature=0.2, max_tokens=2000, **options):
+        """Yield the completion text in pieces as it is generated."""
+        model = model or self.default_model
+        yield from self.retry_policy.iterate(
+            lambda timeout: self._stream(messages, model, temperature, max_tokens, timeout, options), key=model
+        )
+
+    @abstractmethod
+    def _complete(self, messages, model, temperature, max_tokens, timeout, options):
+        """One attempt at complete(), giving up after `timeout` seconds."""
+
+    @abstractmethod
+    async def _acomplete(self, messages, model, temperature, max_tokens, timeout, options):
+        """One attempt at acomplete()."""
+
+    @abstractmethod
+    def _stream(self, messages, model, temperature, max_tokens, timeout, options):
+        """One attempt at stream()."""
+
+    async def aclose(self):
+        """Release async connections, if any were opened."""
+
+
+class GroqBackend(LLMBackend):
+    """Groq's hosted API (the default)."""
+
+    name = "groq"
+    supports_json_mode = True
+
+    def __init__(self, api_key=None, default_model=None, limiter=None, retry_policy=None):
+        """
+        Args:
+            api_key (str, optional): Groq API key. Defaults to $GROQ_API_KEY.
+            default_model (str, optional): Model used when none is given
+            limiter (RateLimiter, optional): Defaults to the process-wide rate_limiter
+            retry_policy (RetryPolicy, optional): Defaults to RetryPolicy.from_env()
+        """
+        super().__init__(default_model, limiter, retry_policy)
+
+        self.api_key = api_key or os.getenv("GROQ_API_KEY")
+        if not self.api_key:
+            raise ValueError("Groq API key not provided and not found in environment variables")
+
+        # Pooled client shared with every other user of this key (see clients.py)
+        self.client = clients.groq(self.api_key)
+
+    @property
+    def async_client(self):
+        """AsyncGroq client of the running event loop, shared process-wide."""
+        return clients.async_groq(self.api_key)
+
+    @staticmethod
+    def _used_tokens(response):
+        usage = getattr(response, "usage", None)
+        return getattr(usage, "total_tokens", None)
+
+    def _complete(self, messages, model, temperature, max_tokens, timeout, options):
+        reserved = self._acquire(messages, model, max_tokens)
+        try:
+            response = self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout=httpx_timeout(timeout),
+                **options
+            )
+            text = response.choices[0].message.content
+        except BaseException:
+            self._release(messages, model, reserved)
+            raise
+        self._settle(messages, model, reserved, text, self._used_tokens(response))
+        return text
+
+    async def _acomplete(self, messages, model, temperature, max_tokens, timeout, options):
+        reserved = await self._aacquire(messages, model, max_tokens)
+        try:
+            response = await self.async_client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout=httpx_timeout(timeout),
+                **options
+            )
+            text = response.choices[0].message.content
+        except BaseException:
+            self._release(messages, model, reserved)
+            raise
+        self._settle(messages, model, reserved, text, self._used_tokens(response))
+        return text
+
+    def _stream(self, messages, model, temperature, max_tokens, timeout, options):
+        reserved = self._acquire(messages, model, max_tokens)
+        pieces = []
+        try:
+            chunks = self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                timeout=httpx_timeout(timeout),
+                **options
+            )
+            for chunk in chunks:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    pieces.append(delta)
+                    yield delta
+        except BaseException:
+            # Includes GeneratorExit when the caller stops reading early
+            self._release(messages, model, reserved, pieces)
+            raise
+        self._settle(messages, model, reserved, "".join(pieces))
+
+    async def aclose(self):
+        await clients.aclose()
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """
+    Any server exposing the OpenAI /chat/completions API, e.g. a local
+    llama.cpp server or vLLM, so no request leaves the machine.
+    """
+
+    name = "openai"
+    supports_json_mode = True
+
+    def __init__(self, base_url=None, api_key=None, default_model=None, timeout=120.0, limiter=None, retry_policy=None):
+        """
+        Args:
+            base_url (str, optional): API root such as http://localhost:8080/v1.
+                Defaults to $DEEPCONTEXT_LLM_BASE_URL.
+            api_key (str, optional): Bearer token, if the server wants one.
+                Defaults to $DEEPCONTEXT_LLM_API_KEY.
+            default_model (str, optional): Model used when none is given
+            timeout (float): Read timeout in seconds (the connect timeout is
+                clients.CONNECT_TIMEOUT)
+            limiter (RateLimiter, optional): Defaults to the process-wide rate_limiter
+                (no limits are configured for "openai" unless set in $DEEPCONTEXT_RATE_LIMITS)
+            retry_policy (RetryPolicy, optional): Defaults to RetryPolicy.from_env()
+        """
+        super().__init__(default_model, limiter, retry_policy)
+
+        base_url = base_url or os.getenv("DEEPCONTEXT_LLM_BASE_URL")
+        if not base_url:
+            raise ValueError("OpenAI-compatible backend needs a base URL (DEEPCONTEXT_LLM_BASE_URL)")
+
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.timeout = timeout
+
+        api_key = api_key or os.getenv("DEEPCONTEXT_LLM_API_KEY")
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+        # Pooled connections shared process-wide; the auth header goes on each request
+        self.session = clients.session()
+
+    @property
+    def async_http(self):
+        """The running event loop's shared httpx.AsyncClient."""
+        return clients.async_http()
+
+    def _payload(self, messages, model, temperature, max_tokens, options, stream=False):
+        return {
+            "model": model or self.default_model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": stream,
+            **options
+        }
+
+    def _complete(self, messages, model, temperature, max_tokens, timeout, options):
+        reserved = self._acquire(messages, model, max_tokens)
+        try:
+            response = self.session.post(
+                self.url, json=self._payload(messages, model, temperature, max_tokens, options),
+                headers=self.headers, timeout=requests_timeout(min(self.timeout, timeout))
+            )
+            response.raise_for_status()
+            data = response.json()
+            text = data["choices"][0]["message"]["content"]
+        except BaseException:
+            self._release(messages, model, reserved)
+            raise
+        self._settle(messages, model, reserved, text, (data.get("usage") or {}).get("total_tokens"))
+        return text
+
+    async def _acomplete(self, messages, model, temperature, max_tokens, timeout, options):
+        reserved = await self._aacquire(messages, model, max_tokens)
+        try:
+            response = await self.async_http.post(
+                self.url, json=self._payload(messages, model, temperature, max_tokens, options),
+                headers=self.headers, timeout=httpx_timeout(min(self.timeout, timeout))
+            )
+            response.raise_for_status()
+            data = response.json()
+            text = data["choices"][0]["message"]["content"]
+        except BaseException:
+            self._release(messages, model, reserved)
+            raise
+        self._settle(messages, model, reserved, text, (data.get("usage") or {}).get("total_tokens"))
+        return text
+
+    def _stream(self, messages, model, temperature, max_tokens, timeout, options):
+        reserved = self._acquire(messages, model, max_tokens)
+        payload = self._payload(messages, model, temperature, max_tokens, options, stream=True)
+        pieces = []
+        try:
+            with self.session.post(self.url, json=payload, headers=self.headers,
+                                   timeout=requests_timeout(min(self.timeout, timeout)), stream=True) as response:
+                response.raise_for_status()
+                # Server-sent events: one "data: {...}" line per chunk, then "data: [DONE]"
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    choices = json.loads(data).get("choices") or [{}]
+                    delta = choices[0].get("delta", {}).get("content")
+                    if delta:
+                        pieces.append(delta)
+                        yield delta
+        except BaseException:
+            # Includes GeneratorExit when the caller stops reading early
+            self._release(messages, model, reserved, pieces)
+            raise
+        self._settle(messages, model, reserved, "".join(pieces))
+
+    async def aclose(self):
+        await clients.aclose()
+
+
+class StubBackend(LLMBackend):
+    """
+    Deterministic offline backend for load tests and development.
+
+    Recognises each of the repo's prompts and returns a well-formed,
+    fixed answer for it after an optional simulated latency.
+    """
+
+    name = "stub"
+    supports_json_mode = True
+
+    def __init__(self, default_model="stub", latency_seconds=None, limiter=None, retry_policy=None):
+        """
+        Args:
+            default_model (str): Reported model name (keeps stub verdicts out of
+                the cache entries of real models)
+            latency_seconds (float, optional): Simulated time per completion.
+                Defaults to $DEEPCONTEXT_STUB_LATENCY, then 0.
+            limiter (RateLimiter, optional): Defaults to the process-wide rate_limiter;
+                set limits for "stub" in $DEEPCONTEXT_RATE_LIMITS to simulate quotas
+            retry_policy (RetryPolicy, optional): Defaults to RetryPolicy.from_env()
+        """
+        super().__init__(default_model, limiter, retry_policy)
+        if latency_seconds is None:
+            latency_seconds = float(os.getenv("DEEPCONTEXT_STUB_LATENCY", "0"))
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+
+    def _verdict(self, text):
+        """A fixed verdict: flag the text if it contains a typical health-hoax keyword."""
+        text = re.sub(r"^\s*[A-Z ()]+:\s*", "", text.split("TEXT DATA:", 1)[-1].strip())
+        flagged = bool(re.search(r"\b(cure[sd]?|miracle|hoax|they don't want you to know)\b", text, re.IGNORECASE))
+        first_sentence = re.split(r"(?<=[.!?])\s", " ".join(text.split()), maxsplit=1)[0][:200]
+        return {
+            "contains_misinformation": flagged,
+            "confidence_score": 0.8 if flagged else 0.6,
+            "detected_criteria": [1, 4] if flagged else [],
+            "explanation": "Stub backend verdict (keyword heuristic).",
+            "prompt_for_context": flagged,
+            "main_claim": first_sentence if flagged else "",
+            "claims": [first_sentence] if first_sentence else []
+        }
+
+    def _respond(self, messages):
+        self.calls += 1
+        system_prompt = messages[0]["content"]
+        user_prompt = messages[-1]["content"]
+
+        if system_prompt.startswith("You repair malformed JSON"):
+            # Nothing to fix in the stub's own answers; hand back whatever object was sent
+            return json.dumps(extract_json(user_prompt.split("Response to repair:", 1)[-1]) or {})
+        if '"results"' in system_prompt:
+            documents = re.split(r"=== DOCUMENT \d+ ===", user_prompt)[1:]
+            return json.dumps({"results": [
+                dict(self._verdict(document), document_id=number) for number, document in enumerate(documents, 1)
+            ]})
+        if "MISINFORMATION DETECTION CRITERIA" in system_prompt:
+            return json.dumps(self._verdict(user_prompt))
+        if '"evaluations"' in system_prompt:
+            sources = len(re.findall(r"^\s*Source \d+:", user_prompt, re.MULTILINE)) or 1
+            return json.dumps({"evaluations": [
+                {"source_num": i + 1, "reliability_score": 5, "reasoning": "Stub evaluation", "potential_bias": "Unknown"}
+                for i in range(sources)
+            ]})
+        if '"context_summary"' in system_prompt:
+            return json.dumps({
+                "claim": "", "context_summary": "Stub context summary.", "perspectives": [],
+                "scientific_consensus": "", "conclusion": "Stub conclusion.", "information_gaps": ""
+            })
+        # Claim extraction and anything else: echo the first sentence of the input
+        return re.split(r"(?<=[.!?])\s", " ".join(user_prompt.split()), maxsplit=1)[0][:200]
+
+    def _complete(self, messages, model, temperature, max_tokens, timeout, options):
+        reserved = self._acquire(messages, model, max_tokens)
+        try:
+            if self.latency_seconds:
+                time.sleep(self.latency_seconds)
+            text = self._respond(messages)
+        except BaseException:
+            self._release(messages, model, reserved)
+            raise
+        self._settle(messages, model, reserved, text)
+        return text
+
+    async def _acomplete(self, messages, model, temperature, max_tokens, timeout, options):
+        reserved = await self._aacquire(messages, model, max_tokens)
+        try:
+            if self.latency_seconds:
+                await asyncio.sleep(self.latency_seconds)
+            text = self._respond(messages)
+        except BaseException:
+            self._release(messages, model, reserved)
+            raise
+        self._settle(messages, model, reserved, text)
+        return text
+
+    def _stream(self, messages, model, temperature, max_tokens, timeout, options):
+        text = self._complete(messages, model, temperature, max_tokens, timeout, options)
+        for start in range(0, len(text), 16):
+            yield text[start:start + 16]
+
+
+BACKENDS = {
+    "groq": GroqBackend,
+    "openai": OpenAICompatibleBackend,
+    "stub": StubBackend
+}
+
+
+def create_backend(name=None, groq_api_key=None, **kwargs):
+    """
+    Build an LLM backend by name.
+
+    Args:
+        name (str, optional): "groq", "openai" (any OpenAI-compatible server) or
+            "stub". Defaults to $DEEPCONTEXT_LLM_BACKEND, then "groq".
+        groq_api_key (str, optional): Groq API key, used only by the Groq backend
+            so it is never sent to another server
+        **kwargs: Passed to the backend's constructor
+
+    Returns:
+        LLMBackend: The backend instance
+    """
+    name = (name or os.getenv("DEEPCONTEXT_LLM_BACKEND") or "groq").lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{name}' (choose from {', '.join(BACKENDS)})")
+    if name == "groq" and groq_api_key:
+        kwargs["api_key"] = groq_api_key
+    return BACKENDS[name](**kwargs)
@@ -7,8 +7,14 @@ This script serves as the main entry point for the DeepContext system.
 
 import os
 import json
+import asyncio
 import argparse
 from integrated_system import IntegratedSystem
+from llm_backend import create_backend
+from triage import ClaimTriage, DEFAULT_THRESHOLD
+from cascade import ModelCascade, SMALL_MODEL, LARGE_MODEL, DEFAULT_MIN_CONFIDENCE
+from rate_limiter import rate_limiter
+from structured_output import output_metrics
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -29,9 +35,18 @@ Examples:
   # Process all JSON files in a directory
   python main.py --json-dir videos_folder
   
+  # Pack short files into shared detection requests
+  python main.py --json-dir videos_folder --batch
+  
+  # Process a directory with up to 16 files in flight at once
+  python main.py --json-dir videos_folder --concurrency 16
+  
   # Analyze raw text
   python main.py --text "Scientists have found that lemon water cures diabetes."
   
+  # Use a local OpenAI-compatible server (e.g. llama.cpp) instead of Groq
+  python main.py --json-dir videos_folder --backend openai --base-url http://localhost:8080/v1 --model llama-3-8b
+  
   # Save analysis results to a directory
   python main.py --json-file video_data.json --output-dir results
 """
@@ -51,8 +66,20 @@ Examples:
     
     # Analysis options
     analysis_group = parser.add_argument_group('Analysis Options')
-    analysis_group.add_argument('--model', default='llama3-70b-8192', help='LLM model to use (default: llama3-70b-8192)')
+    analysis_group.add_argument('--model', help="LLM model to use (default: the backend's default, llama3-70b-8192 for Groq)")
+    analysis_group.add_argument('--backend', choices=['groq', 'openai', 'stub'], help='LLM backend: Groq, an OpenAI-compatible server, or an offline stub (default: $DEEPCONTEXT_LLM_BACKEND or groq)')
+    analysis_group.add_argument('--base-url', help='Base URL of the OpenAI-compatible server, e.g. http://localhost:8080/v1; implies --backend openai (or set DEEPCONTEXT_LLM_BASE_URL)')
     analysis_group.add_argument('--no-web-context', action='store_true', help='Skip retrieving web context')
+    analysis_group.add_argument('--separate-claim-call', action='store_true', help='Extract the claim with a second LLM call instead of in the detection call')
+    analysis_group.add_argument('--batch', action='store_true', help='Pack several --json-dir files into each detection request')
+    analysis_group.add_argument('--concurrency', type=int, default=1, help='Number of --json-dir files to analyze concurrently (default: 1, sequential)')
+    analysis_group.add_argument('--triage', action='store_true', help='Skip the LLM for texts a local heuristic finds no checkable claims in')
+    analysis_group.add_argument('--triage-threshold', type=float, default=DEFAULT_THRESHOLD, help=f'Claim score needed to reach the LLM with --triage (default: {DEFAULT_THRESHOLD})')
+    analysis_group.add_argument('--cascade', action='store_true', help='Detect with a small model first and escalate to the large one only for positive or low-confidence verdicts (ignored with --model)')
+    analysis_group.add_argument('--cascade-min-confidence', type=float, help=f'Confidence below which --cascade escalates (default: $DEEPCONTEXT_CASCADE_MIN_CONFIDENCE or {DEFAULT_MIN_CONFIDENCE})')
+    analysis_group.add_argument('--cascade-models', nargs=2, metavar=('SMALL', 'LARGE'), default=[SMALL_MODEL, LARGE_MODEL], help=f'Models of the two --cascade tiers (default: {SMALL_MODEL} {LARGE_MODEL})')
+    analysis_group.add_argument('--no-cache', action='store_true', help='Always call the LLM instead of reusing cached analyses')
+    analysis_group.add_argument('--no-search-cache', action='store_true', help='Always call SerpAPI instead of reusing cached search results')
     
     # Output options
     output_group = parser.add_argument_group('Output Options')
@@ -70,9 +97,18 @@ Examples:
     
     try:
         # Initialize the system
+        backend = args.backend
+        if args.base_url:
+            backend = create_backend("openai", base_url=args.base_url, default_model=args.model)
         system = IntegratedSystem(
             groq_api_key=args.groq_api_key,
-            serpapi_key=args.serpapi_key
+            serpapi_key=args.serpapi_key,
+            backend=backend,
+            triage=ClaimTriage(args.triage_threshold) if args.triage else None,
+            cascade=ModelCascade(*args.cascade_models, min_confidence=args.cascade_min_confidence) if args.cascade else None,
+            cache=False if args.no_cache else None,
+            search_cache=False if args.no_search_cache else None,
+            fused_claims=not args.separate_claim_call
         )
         
         # Create output directory if specified
@@ -121,16 +157,37 @@ Examples:
             if not args.quiet:
                 print(f"Found {len(json_files)} JSON files to process.")
             
-            # Process each JSON file
-            for i, json_file in enumerate(json_files):
-                if not args.quiet:
-                    print(f"\nProcessing file {i+1}/{len(json_files)}: {json_file}")
-                file_path = os.path.join(args.json_dir, json_file)
-                result = system.analyze_json_file(
-                    file_path, 
+            # Analyze the files in packed batches, concurrently on one event loop, or one at a time
+            if args.batch:
+                file_paths = [os.path.join(args.json_dir, json_file) for json_file in json_files]
+                dir_results = system.analyze_json_files(
+                    file_paths,
                     model=args.model,
                     include_web_context=not args.no_web_context
                 )
+            elif args.concurrency > 1:
+                if not args.quiet:
+                    print(f"Analyzing with up to {args.concurrency} files in flight...")
+                file_paths = [os.path.join(args.json_dir, json_file) for json_file in json_files]
+                dir_results = asyncio.run(system.aanalyze_json_files(
+                    file_paths,
+                    model=args.model,
+                    include_web_context=not args.no_web_context,
+                    concurrency=args.concurrency
+                ))
+            else:
+                dir_results = []
+                for i, json_file in enumerate(json_files):
+                    if not args.quiet:
+                        print(f"\nProcessing file {i+1}/{len(json_files)}: {json_file}")
+                    file_path = os.path.join(args.json_dir, json_file)
+                    dir_results.append(system.analyze_json_file(
+                        file_path, 
+                        model=args.model,
+                        include_web_context=not args.no_web_context
+                    ))
+            
+            for json_file, result in zip(json_files, dir_results):
                 results.append(result)
                 
                 # Save result to output directory if specified
@@ -197,6 +254,39 @@ Examples:
                 print(f"Error: Text file not found at {args.text_file}")
                 return 1
         
+        # Report how many texts the triage filter kept away from the LLM
+        if system.detector.triage and not args.quiet:
+            print(f"\n{system.detector.triage.summary()}")
+        
+        # Report how much traffic the small model handled and what that saved
+        if system.detector.cascade and not args.quiet:
+            print(f"\n{system.detector.cascade.summary()}")
+        
+        # Report how long calls were queued for Groq/SerpAPI rate limits
+        if rate_limiter.stats and not args.quiet:
+            print(f"\n{rate_limiter.summary()}")
+        
+        # Report how often structured responses failed validation and were repaired
+        if output_metrics.stats and not args.quiet:
+            print(f"\n{output_metrics.summary()}")
+        
+        # Report transient LLM failures that were retried or hedged
+        if system.backend.retry_policy.stats["calls"] and not args.quiet:
+            print(f"\n{system.backend.retry_policy.summary()}")
+        
+        # Report how much work the analysis cache saved
+        if system.detector.cache and not args.quiet:
+            cache_stats = system.detector.cache.stats()
+            print(f"\nAnalysis cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                  f"({cache_stats['hit_rate']*100:.1f}% hit rate, {cache_stats['entries']} entries)")
+        
+        # Report how many SerpAPI calls the search cache saved
+        if system.context_agent and system.context_agent.search_cache and not args.quiet:
+            search_cache = system.context_agent.search_cache
+            cache_stats = search_cache.stats()
+            print(f"\nSearch cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                  f"({cache_stats['hit_rate']*100:.1f}% hit rate, {cache_stats['entries']}/{search_cache.max_entries} entries)")
+        
         # Create summary report if multiple results were processed
         if len(results) > 1 and args.output_dir:
             summary = {
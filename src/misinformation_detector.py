@@ -1,27 +1,98 @@
 import os
 import json
-import re
-from groq import Groq
+import time
+import asyncio
 from dotenv import load_dotenv
+from llm_backend import create_backend
+from response_cache import ResponseCache, make_cache_key, normalize_text
+from token_budget import pack_batches, estimate_tokens
+from text_compaction import compact_for_prompt
+from json_stream import IncrementalJSONParser
+from json_extract import extract_json
+from structured_output import DETECTION_SCHEMA, CLAIM_FIELDS_SCHEMA, complete_json, acomplete_json, repair, validate
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Bump whenever the detection prompt changes so stale cached verdicts are not reused
+DETECTION_PROMPT_VERSION = "detect-v1"
+
+# Extra output fields requested in fused mode, so a positive verdict already
+# carries the claim to fact-check and needs no separate extract_claim call
+CLAIM_OUTPUT_FIELDS = """,
+          "main_claim": the single most significant checkable factual claim that appears to be false, as one concise statement (empty string if no misinformation),
+          "claims": list of up to 3 concise, checkable factual claims from the text, most significant first"""
+
+# The 10 criteria shared by the single-document and batched detection prompts
+MISINFORMATION_CRITERIA = """
+        1. Factual Accuracy: Does the content include demonstrably false claims or inaccurate information?
+        2. Source Credibility: Are claims attributed to unreliable, non-existent, or misrepresented sources?
+        3. Logical Consistency: Are there logical fallacies, contradictions, or inconsistencies in the arguments?
+        4. Scientific Consensus: Do claims contradict well-established scientific consensus without substantial evidence?
+        5. Context Manipulation: Is information presented out of context or in a misleading way?
+        6. Statistical Misrepresentation: Are statistics or data misrepresented, cherry-picked, or manipulated?
+        7. Emotional Manipulation: Does the content rely heavily on emotional appeals rather than factual evidence?
+        8. Unverifiable Claims: Are extraordinary claims made without corresponding evidence?
+        9. Conspiracy Narratives: Does the content promote unfounded conspiracy theories?
+        10. False Equivalence: Does the content present unequal positions as if they have equal merit?
+"""
+
+# Batched detection: documents are packed into one request up to this many
+# estimated content tokens, leaving room in llama3-70b-8192's 8K context for
+# the prompt and one result per document
+BATCH_TOKEN_BUDGET = 3500
+BATCH_MAX_DOCUMENTS = 8
+BATCH_OUTPUT_TOKENS_PER_DOCUMENT = 400
+
+# Default estimated-token budget for the transcription + OCR text of one video;
+# llama3-70b-8192 must also fit the ~700-token system prompt and up to 2000
+# output tokens. Override with $DEEPCONTEXT_PROMPT_TOKEN_BUDGET.
+PROMPT_TOKEN_BUDGET = 5000
+
+# Claims longer than this (in words) are truncated before being used as search queries
+MAX_CLAIM_WORDS = 50
+
 class MisinformationDetector:
-    def __init__(self, api_key=None):
-        """Initialize the misinformation detector with Groq API key."""
+    def __init__(self, api_key=None, cache=None, prompt_token_budget=None, backend=None, triage=None, cascade=None):
+        """
+        Initialize the misinformation detector with an LLM backend.
 
-        self.api_key = os.getenv("GROQ_API_KEY")
-        if not self.api_key:
-            raise ValueError("Groq API key not provided and not found in environment variables")
-        
-        self.client = Groq(api_key=self.api_key)
+        Args:
+            api_key (str, optional): Groq API key, for the default Groq backend
+            cache (ResponseCache or bool, optional): Cache for analyze_text results.
+                Defaults to a persistent on-disk cache; pass False to disable.
+            prompt_token_budget (int, optional): Token budget process_json_input
+                compacts each video's text to. Defaults to PROMPT_TOKEN_BUDGET.
+            backend (LLMBackend, optional): Where completions are sent. Defaults to
+                create_backend(), i.e. $DEEPCONTEXT_LLM_BACKEND or Groq.
+            triage (ClaimTriage, optional): Local pre-filter; texts it finds no
+                checkable claims in get a "no misinformation" result without an LLM call
+            cascade (ModelCascade, optional): Analyze with a small model first and
+                escalate to a large one only when needed (applies when no model is given)
+        """
+
+        self.backend = backend or create_backend(groq_api_key=api_key)
         
-        self.model = "llama3-70b-8192"  # ALternatively, "llama3-8b-8192" (smaller model)
+        self.model = self.backend.default_model  # Alternatively, "llama3-8b-8192" (smaller model)
+
+        if cache is None:
+            cache = ResponseCache("analysis")
+        self.cache = cache or None
+
+        self.triage = triage
+        self.cascade = cascade
+
+        self.prompt_token_budget = prompt_token_budget or int(
+            os.getenv("DEEPCONTEXT_PROMPT_TOKEN_BUDGET", PROMPT_TOKEN_BUDGET)
+        )
+    
+    async def aclose(self):
+        """Close the backend's async connections, if any were opened."""
+        await self.backend.aclose()
     
     def _extract_json_from_text(self, text):
         """
-        Extract JSON from text using multiple strategies.
+        Extract the JSON object from a model response (see json_extract.extract_json).
         
         Args:
             text (str): Text that might contain JSON
@@ -29,47 +100,7 @@ class MisinformationDetector:
         Returns:
             dict: Extracted JSON as dict, or None if extraction fails
         """
-        # Look for JSON between code blocks with language tag
-        code_block_patterns = [
-            r"```json\s*(.+?)```",  # ```json {...} ```
-            r"```javascript\s*(.+?)```",  # ```javascript {...} ```
-            r"```js\s*(.+?)```",  # ```js {...} ```
-        ]
-        
-        for pattern in code_block_patterns:
-            matches = re.findall(pattern, text, re.DOTALL)
-            if matches:
-                try:
-                    return json.loads(matches[0].strip())
-                except json.JSONDecodeError:
-                    continue
-        
-        # Look for JSON between any code blocks
-        general_code_block = re.findall(r"```\s*(.+?)```", text, re.DOTALL)
-        if general_code_block:
-            try:
-                return json.loads(general_code_block[0].strip())
-            except json.JSONDecodeError:
-                pass
-        
-        # Look for JSON-like structure with braces
-        try:
-            # Find text between outermost braces
-            brace_content = re.search(r"\{.+\}", text, re.DOTALL)
-            if brace_content:
-                json_candidate = brace_content.group(0)
-                return json.loads(json_candidate)
-        except (json.JSONDecodeError, AttributeError):
-            pass
-        
-        # Try to parse the entire text as JSON
-        try:
-            return json.loads(text)
-        except json.JSONDecodeError:
-            pass
-        
-        # If all strategies fail, return None
-        return None
+        return extract_json(text)
     
     def _create_default_analysis(self, error_message="Unknown error", raw_response=""):
         """Create a default analysis result with error information."""
@@ -160,34 +191,39 @@ class MisinformationDetector:
             except (ValueError, TypeError):
                 analysis_result['confidence_score'] = 0.0
     
-    def analyze_text(self, text_data, model=None):
-        """
-        Analyze text data for potential misinformation using Llama model through Groq API.
-        
-        Args:
-            text_data (str): Text extracted from video (speech to text, OCR, captions)
-            model (str, optional): Llama model to use. Defaults to llama3-70b-8192.
-            
-        Returns:
-            dict: Analysis result containing misinformation assessment and explanation
-        """
-        model_to_use = model or self.model
-        
+    def _validate_claim_fields(self, analysis_result):
+        """Normalize the 'main_claim' and 'claims' fields returned in fused mode."""
+        claims = analysis_result.get("claims")
+        if isinstance(claims, str):
+            claims = [claims]
+        elif not isinstance(claims, list):
+            claims = []
+        claims = [self._truncate_claim(str(c)) for c in claims if str(c).strip()]
+
+        main_claim = analysis_result.get("main_claim")
+        main_claim = self._truncate_claim(str(main_claim)) if main_claim else ""
+        if not main_claim and claims and analysis_result.get("contains_misinformation") is True:
+            main_claim = claims[0]
+
+        analysis_result["claims"] = claims
+        analysis_result["main_claim"] = main_claim
+
+    def _truncate_claim(self, claim):
+        """Trim a claim to MAX_CLAIM_WORDS words."""
+        claim = claim.strip()
+        words = claim.split()
+        if len(words) > MAX_CLAIM_WORDS:
+            return " ".join(words[:MAX_CLAIM_WORDS]) + "..."
+        return claim
+
+    def _build_analysis_messages(self, text_data, include_claims=False):
+        """Build the chat messages for a misinformation analysis request."""
         system_prompt = """
         You are an expert at detecting misinformation in content. Your task is to analyze the text provided
         and determine if it might contain misinformation. Use the following criteria for your assessment:
 
         MISINFORMATION DETECTION CRITERIA:
-        1. Factual Accuracy: Does the content include demonstrably false claims or inaccurate information?
-        2. Source Credibility: Are claims attributed to unreliable, non-existent, or misrepresented sources?
-        3. Logical Consistency: Are there logical fallacies, contradictions, or inconsistencies in the arguments?
-        4. Scientific Consensus: Do claims contradict well-established scientific consensus without substantial evidence?
-        5. Context Manipulation: Is information presented out of context or in a misleading way?
-        6. Statistical Misrepresentation: Are statistics or data misrepresented, cherry-picked, or manipulated?
-        7. Emotional Manipulation: Does the content rely heavily on emotional appeals rather than factual evidence?
-        8. Unverifiable Claims: Are extraordinary claims made without corresponding evidence?
-        9. Conspiracy Narratives: Does the content promote unfounded conspiracy theories?
-        10. False Equivalence: Does the content present unequal positions as if they have equal merit?
+""" + MISINFORMATION_CRITERIA.strip("\n") + """
 
         Your analysis MUST be provided in valid JSON format with the following fields:
         {
@@ -195,7 +231,8 @@ class MisinformationDetector:
           "confidence_score": number from 0 to 1 indicating your confidence level,
           "detected_criteria": list of criteria numbers (1-10) that were detected,
           "explanation": detailed explanation of your assessment,
-          "prompt_for_context": boolean indicating if more context would help clarify (true if needed)
+          "prompt_for_context": boolean indicating if more context would help clarify (true if needed)""" + (
+            CLAIM_OUTPUT_FIELDS if include_claims else "") + """
         }
         
         Provide ONLY the JSON object in your response with no additional text or explanations.
@@ -209,51 +246,520 @@ class MisinformationDetector:
         
         Return ONLY your assessment in JSON format as specified earlier with no additional text.
         """
+
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+
+    def _detection_schema(self, include_claims=False):
+        """Fields a detection response must contain (see structured_output)."""
+        return dict(DETECTION_SCHEMA, **CLAIM_FIELDS_SCHEMA) if include_claims else DETECTION_SCHEMA
+
+    def _triage_result(self, text_data, include_claims=False):
+        """Result for a text the triage filter keeps away from the LLM, or None if it needs the LLM."""
+        if not self.triage:
+            return None
+        routed, score = self.triage.needs_llm(text_data)
+        return None if routed else self.triage.skipped_result(score, include_claims)
+
+    def _analysis_cache_key(self, text_data, model, temperature, include_claims=False, batch=False):
+        """
+        Content-addressed cache key: identical text, model and prompt give a reusable verdict.
+
+        Verdicts from the batched prompt get their own keys (`batch=True`), so
+        single-document analysis never reuses them.
+        """
+        prompt_version = DETECTION_PROMPT_VERSION + ("+claims" if include_claims else "") + ("+batch" if batch else "")
+        return make_cache_key(prompt_version, model, temperature, normalize_text(text_data))
+
+    def _parse_analysis_response(self, response_text, include_claims=False):
+        """
+        Turn a raw completion into a validated analysis result.
+
+        Returns:
+            tuple: (analysis dict, True if it parsed successfully and may be cached)
+        """
+        analysis_result = self._extract_json_from_text(response_text)
+        
+        if not analysis_result:
+            return self._create_default_analysis(
+                "Failed to extract valid JSON from response", 
+                response_text
+            ), False
+            
+        self._validate_and_fix_fields(analysis_result)
+        if include_claims:
+            self._validate_claim_fields(analysis_result)
+
+        return analysis_result, True
+
+    def analyze_text(self, text_data, model=None, include_claims=False):
+        """
+        Analyze text data for potential misinformation using Llama model through Groq API.
         
+        Args:
+            text_data (str): Text extracted from video (speech to text, OCR, captions)
+            model (str, optional): Llama model to use. Defaults to llama3-70b-8192.
+            include_claims (bool): Fused mode. Also return 'main_claim' and 'claims'
+                in the same completion, so extract_claim is not needed afterwards.
+            
+        Returns:
+            dict: Analysis result containing misinformation assessment and explanation
+        """
+        triage_result = self._triage_result(text_data, include_claims)
+        if triage_result is not None:
+            return triage_result
+
+        return self._analyze_with_llm(text_data, model, include_claims)
+
+    def _analyze_with_llm(self, text_data, model=None, include_claims=False):
+        """analyze_text without the triage step, through the cascade if one is set and no model is given."""
+        if self.cascade and model is None:
+            return self._analyze_cascaded(text_data, include_claims)
+        return self._analyze_with_model(text_data, model, include_claims)
+
+    def _record_tier(self, tier, seconds, text_data, include_claims, analysis_result):
+        """Add one document's time and estimated tokens at a cascade tier to the cascade stats."""
+        input_tokens = sum(
+            estimate_tokens(message["content"]) for message in self._build_analysis_messages(text_data, include_claims)
+        )
+        self.cascade.record(tier, seconds, input_tokens, estimate_tokens(json.dumps(analysis_result)))
+
+    def _escalate(self, analysis_result):
+        """Escalation reason for a small-model verdict (counted in the cascade stats), or None to keep it."""
+        reason = self.cascade.escalation_reason(analysis_result)
+        if reason is not None:
+            self.cascade.record_escalation(reason)
+        else:
+            analysis_result["cascade"] = {"model": self.cascade.small_model, "escalation": None}
+        return reason
+
+    def _analyze_cascaded(self, text_data, include_claims=False):
+        """Small model first; the large model only if the cascade asks for it."""
+        started = time.perf_counter()
+        analysis_result = self._analyze_with_model(text_data, self.cascade.small_model, include_claims)
+        self._record_tier("small", time.perf_counter() - started, text_data, include_claims, analysis_result)
+
+        reason = self._escalate(analysis_result)
+        if reason is None:
+            return analysis_result
+
+        started = time.perf_counter()
+        analysis_result = self._analyze_with_model(text_data, self.cascade.large_model, include_claims)
+        self._record_tier("large", time.perf_counter() - started, text_data, include_claims, analysis_result)
+        analysis_result["cascade"] = {"model": self.cascade.large_model, "escalation": reason}
+        return analysis_result
+
+    def _analyze_with_model(self, text_data, model=None, include_claims=False):
+        """Cached verdict or one LLM call with the given model."""
+        model_to_use = model or self.model
+        temperature = 0.2
+
+        cache_key = self._analysis_cache_key(text_data, model_to_use, temperature, include_claims)
+        if self.cache:
+            cached_result = self.cache.get(cache_key)
+            if cached_result is not None:
+                return cached_result
+        
+        response_text = None
         try:
-            response = self.client.chat.completions.create(
+            response_text = complete_json(
+                self.backend,
+                self._build_analysis_messages(text_data, include_claims),
+                self._detection_schema(include_claims),
+                "detection",
                 model=model_to_use,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.2,
+                temperature=temperature,
                 max_tokens=2000
             )
             
-            response_text = response.choices[0].message.content
-            
-            analysis_result = self._extract_json_from_text(response_text)
-            
-            if not analysis_result:
-                return self._create_default_analysis(
-                    "Failed to extract valid JSON from response", 
-                    response_text
-                )
-                
-            self._validate_and_fix_fields(analysis_result)
+            analysis_result, parsed = self._parse_analysis_response(response_text, include_claims)
+
+            # Only successful analyses are cached; errors should be retried next time
+            if parsed and self.cache:
+                self.cache.set(cache_key, analysis_result)
             
             return analysis_result
             
         except Exception as e:
             return self._create_default_analysis(
                 f"Error during analysis: {str(e)}", 
-                getattr(response, 'choices', [{}])[0].get('message', {}).get('content', 'No response text')
-                if 'response' in locals() else "No response received"
+                response_text or "No response received"
+            )
+
+    def analyze_text_stream(self, text_data, model=None, include_claims=False):
+        """
+        Streaming counterpart of analyze_text.
+
+        The completion is streamed and parsed incrementally, so fields such as
+        'contains_misinformation' and 'confidence_score' are available as soon
+        as the model has written them, well before the explanation finishes.
+        
+        Args:
+            text_data (str): Text extracted from video (speech to text, OCR, captions)
+            model (str, optional): Llama model to use. Defaults to llama3-70b-8192.
+            include_claims (bool): Fused mode, as in analyze_text
+            
+        Yields:
+            tuple: (field name, raw value) for each top-level field as it completes,
+                then ("result", validated analysis dict) once the stream ends
+        """
+        triage_result = self._triage_result(text_data, include_claims)
+        if triage_result is not None:
+            yield from triage_result.items()
+            yield "result", triage_result
+            return
+
+        if not (self.cascade and model is None):
+            yield from self._stream_with_model(text_data, model, include_claims)
+            return
+
+        # Cascade: stream the small model's verdict, then the large model's if it escalates
+        started = time.perf_counter()
+        for name, value in self._stream_with_model(text_data, self.cascade.small_model, include_claims):
+            if name == "result":
+                analysis_result = value
+            else:
+                yield name, value
+        self._record_tier("small", time.perf_counter() - started, text_data, include_claims, analysis_result)
+
+        reason = self._escalate(analysis_result)
+        if reason is None:
+            yield "result", analysis_result
+            return
+
+        started = time.perf_counter()
+        for name, value in self._stream_with_model(text_data, self.cascade.large_model, include_claims):
+            if name == "result":
+                analysis_result = value
+            else:
+                yield name, value
+        self._record_tier("large", time.perf_counter() - started, text_data, include_claims, analysis_result)
+        analysis_result["cascade"] = {"model": self.cascade.large_model, "escalation": reason}
+        yield "result", analysis_result
+
+    def _stream_with_model(self, text_data, model=None, include_claims=False):
+        """analyze_text_stream for one model, without triage or cascade."""
+        model_to_use = model or self.model
+        temperature = 0.2
+
+        cache_key = self._analysis_cache_key(text_data, model_to_use, temperature, include_claims)
+        if self.cache:
+            cached_result = self.cache.get(cache_key)
+            if cached_result is not None:
+                yield from cached_result.items()
+                yield "result", cached_result
+                return
+
+        parser = IncrementalJSONParser()
+        try:
+            for delta in self.backend.stream(
+                self._build_analysis_messages(text_data, include_claims),
+                model=model_to_use,
+                temperature=temperature,
+                max_tokens=2000
+            ):
+                yield from parser.feed(delta)
+
+            # JSON mode isn't available while streaming, so validation and repair happen at the end
+            response_text = repair(self.backend, parser.buffer, self._detection_schema(include_claims),
+                                   "detection", model_to_use, 2000)
+            analysis_result, parsed = self._parse_analysis_response(response_text, include_claims)
+            if parsed and self.cache:
+                self.cache.set(cache_key, analysis_result)
+
+        except Exception as e:
+            analysis_result = self._create_default_analysis(
+                f"Error during analysis: {str(e)}",
+                parser.buffer or "No response received"
+            )
+
+        yield "result", analysis_result
+
+    async def aanalyze_text(self, text_data, model=None, include_claims=False):
+        """
+        Async counterpart of analyze_text, using the backend's async client.
+
+        Many calls can be awaited concurrently in one event loop; each one only
+        holds a pending HTTP request while it waits for the model.
+        """
+        triage_result = self._triage_result(text_data, include_claims)
+        if triage_result is not None:
+            return triage_result
+
+        if not (self.cascade and model is None):
+            return await self._aanalyze_with_model(text_data, model, include_claims)
+
+        started = time.perf_counter()
+        analysis_result = await self._aanalyze_with_model(text_data, self.cascade.small_model, include_claims)
+        self._record_tier("small", time.perf_counter() - started, text_data, include_claims, analysis_result)
+
+        reason = self._escalate(analysis_result)
+        if reason is None:
+            return analysis_result
+
+        started = time.perf_counter()
+        analysis_result = await self._aanalyze_with_model(text_data, self.cascade.large_model, include_claims)
+        self._record_tier("large", time.perf_counter() - started, text_data, include_claims, analysis_result)
+        analysis_result["cascade"] = {"model": self.cascade.large_model, "escalation": reason}
+        return analysis_result
+
+    async def _aanalyze_with_model(self, text_data, model=None, include_claims=False):
+        """Async counterpart of _analyze_with_model."""
+        model_to_use = model or self.model
+        temperature = 0.2
+
+        cache_key = self._analysis_cache_key(text_data, model_to_use, temperature, include_claims)
+        if self.cache:
+            # SQLite calls block, so they run off the event loop
+            cached_result = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached_result is not None:
+                return cached_result
+
+        response_text = None
+        try:
+            response_text = await acomplete_json(
+                self.backend,
+                self._build_analysis_messages(text_data, include_claims),
+                self._detection_schema(include_claims),
+                "detection",
+                model=model_to_use,
+                temperature=temperature,
+                max_tokens=2000
+            )
+
+            analysis_result, parsed = self._parse_analysis_response(response_text, include_claims)
+
+            if parsed and self.cache:
+                await asyncio.to_thread(self.cache.set, cache_key, analysis_result)
+
+            return analysis_result
+
+        except Exception as e:
+            return self._create_default_analysis(
+                f"Error during analysis: {str(e)}",
+                response_text or "No response received"
             )
     
+    def _build_batch_messages(self, documents, include_claims=False):
+        """Build the chat messages for a batched analysis of several documents."""
+        system_prompt = """
+        You are an expert at detecting misinformation in content. You will receive several independent
+        documents, each extracted from a different video. Assess each document on its own, using the
+        following criteria:
+
+        MISINFORMATION DETECTION CRITERIA:
+""" + MISINFORMATION_CRITERIA.strip("\n") + """
+
+        Your analysis MUST be provided in valid JSON format as a single object with one entry per document:
+        {
+          "results": [
+            {
+              "document_id": the number of the document this entry assesses,
+              "contains_misinformation": boolean (true if potential misinformation detected, false otherwise),
+              "confidence_score": number from 0 to 1 indicating your confidence level,
+              "detected_criteria": list of criteria numbers (1-10) that were detected,
+              "explanation": detailed explanation of your assessment,
+              "prompt_for_context": boolean indicating if more context would help clarify (true if needed)""" + (
+            CLAIM_OUTPUT_FIELDS if include_claims else "") + """
+            }
+          ]
+        }
+        
+        Provide ONLY the JSON object in your response with no additional text or explanations.
+        """
+
+        document_blocks = "\n\n".join(
+            f"=== DOCUMENT {number} ===\n{text}" for number, text in enumerate(documents, 1)
+        )
+        user_prompt = f"""
+        Please analyze each of the following {len(documents)} documents for potential misinformation:
+
+        {document_blocks}
+        
+        Return ONLY your assessment in JSON format as specified earlier, with exactly one entry per document.
+        """
+
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+
+    def _parse_batch_response(self, response_text, num_documents, include_claims=False):
+        """
+        Split a batched completion into per-document analysis results.
+
+        Returns:
+            list: One validated analysis dict per document, or None where the
+                document's entry is missing or does not match the detection schema
+        """
+        results = [None] * num_documents
+        schema = self._detection_schema(include_claims)
+
+        parsed = self._extract_json_from_text(response_text)
+        entries = parsed.get("results") if isinstance(parsed, dict) else parsed
+        if not isinstance(entries, list):
+            return results
+
+        # Positional fallback only when the model dropped the ids but kept the order
+        use_positions = len(entries) == num_documents and not any(
+            isinstance(entry, dict) and "document_id" in entry for entry in entries
+        )
+
+        for position, entry in enumerate(entries):
+            if not isinstance(entry, dict) or "contains_misinformation" not in entry:
+                continue
+            try:
+                index = position if use_positions else int(entry.pop("document_id")) - 1
+            except (KeyError, TypeError, ValueError):
+                continue
+            if not 0 <= index < num_documents or results[index] is not None:
+                continue
+            if validate(entry, schema):
+                continue
+
+            self._validate_and_fix_fields(entry)
+            if include_claims:
+                self._validate_claim_fields(entry)
+            results[index] = entry
+
+        return results
+
+    def analyze_batch(self, texts, model=None, include_claims=False,
+                      token_budget=BATCH_TOKEN_BUDGET, max_documents=BATCH_MAX_DOCUMENTS):
+        """
+        Analyze many short texts with as few requests as possible.
+
+        Cached verdicts are reused and texts the triage filter skips get no
+        request at all; the rest are packed into multi-document
+        requests up to `token_budget`, so the detection system prompt is paid
+        once per batch instead of once per text. Any document whose entry is
+        missing or fails to parse is re-analyzed on its own with analyze_text.
+        With a cascade and no model given, the texts are batched for the small
+        model and the escalated ones batched again for the large model.
+
+        Args:
+            texts (list of str): Texts to analyze
+            model (str, optional): Llama model to use. Defaults to llama3-70b-8192.
+            include_claims (bool): Fused mode, as in analyze_text
+            token_budget (int): Maximum estimated content tokens per request
+            max_documents (int): Maximum number of documents per request
+
+        Returns:
+            list: Analysis results, in the same order as `texts`
+        """
+        if not (self.cascade and model is None):
+            return self._batch_with_model(texts, model, include_claims, token_budget, max_documents)
+
+        # Cascade: every routed text goes through the small model, escalations are batched again
+        started = time.perf_counter()
+        results = self._batch_with_model(texts, self.cascade.small_model, include_claims, token_budget, max_documents)
+        routed = [i for i, result in enumerate(results) if not result.get("triage", {}).get("skipped")]
+        seconds = (time.perf_counter() - started) / max(len(routed), 1)
+
+        escalated = []
+        for index in routed:
+            self._record_tier("small", seconds, texts[index], include_claims, results[index])
+            reason = self._escalate(results[index])
+            if reason is not None:
+                escalated.append((index, reason))
+        if not escalated:
+            return results
+
+        started = time.perf_counter()
+        large_results = self._batch_with_model(
+            [texts[index] for index, _ in escalated], self.cascade.large_model, include_claims,
+            token_budget, max_documents, use_triage=False
+        )
+        seconds = (time.perf_counter() - started) / len(escalated)
+        for (index, reason), analysis_result in zip(escalated, large_results):
+            self._record_tier("large", seconds, texts[index], include_claims, analysis_result)
+            analysis_result["cascade"] = {"model": self.cascade.large_model, "escalation": reason}
+            results[index] = analysis_result
+        return results
+
+    def _batch_with_model(self, texts, model=None, include_claims=False,
+                          token_budget=BATCH_TOKEN_BUDGET, max_documents=BATCH_MAX_DOCUMENTS, use_triage=True):
+        """analyze_batch for one model, without the cascade (and without triage if use_triage is False)."""
+        model_to_use = model or self.model
+        temperature = 0.2
+
+        results = [None] * len(texts)
+        cache_keys = [self._analysis_cache_key(text, model_to_use, temperature, include_claims, batch=True)
+                      for text in texts]
+
+        pending = []
+        for index, text in enumerate(texts):
+            cached_result = self._triage_result(text, include_claims) if use_triage else None
+            if cached_result is None and self.cache:
+                # A single-document verdict is as good as a batched one; the reverse is not assumed
+                cached_result = (self.cache.get(self._analysis_cache_key(text, model_to_use, temperature, include_claims))
+                                 or self.cache.get(cache_keys[index]))
+            if cached_result is not None:
+                results[index] = cached_result
+            else:
+                pending.append(index)
+
+        batches = pack_batches([texts[i] for i in pending], token_budget, max_documents)
+        fallbacks = 0
+
+        for batch in batches:
+            indices = [pending[i] for i in batch]
+            if len(indices) == 1:
+                results[indices[0]] = self._analyze_with_llm(texts[indices[0]], model_to_use, include_claims)
+                continue
+
+            batch_results = [None] * len(indices)
+            try:
+                response_text = self.backend.complete(
+                    self._build_batch_messages([texts[i] for i in indices], include_claims),
+                    model=model_to_use,
+                    temperature=temperature,
+                    max_tokens=BATCH_OUTPUT_TOKENS_PER_DOCUMENT * len(indices),
+                    **self.backend.json_options()
+                )
+                batch_results = self._parse_batch_response(response_text, len(indices), include_claims)
+            except Exception as e:
+                print(f"Batched analysis failed, analyzing {len(indices)} documents individually: {str(e)}")
+
+            for index, analysis_result in zip(indices, batch_results):
+                if analysis_result is None:
+                    fallbacks += 1
+                    analysis_result = self._analyze_with_llm(texts[index], model_to_use, include_claims)
+                elif self.cache:
+                    self.cache.set(cache_keys[index], analysis_result)
+                results[index] = analysis_result
+
+        print(f"Batched detection: {len(texts)} documents, {len(texts) - len(pending)} cached or triaged, "
+              f"{len(batches)} requests, {fallbacks} fell back to individual analysis")
+        return results
+    
     def process_json_input(self, json_data):
         """
         Process input from JSON data containing video text and transcription.
         
+        The OCR text is compacted first: lines that repeat the transcript or
+        look like OCR noise are dropped, and both parts are truncated to
+        prompt_token_budget if still too long.
+        
         Args:
             json_data (dict): JSON data with 'transcription' and 'extracted_text' fields
             
         Returns:
             str: Combined text for analysis
         """
-        transcription = json_data.get("transcription", "")
-        extracted_text = json_data.get("extracted_text", "")
+        transcription, extracted_text, stats = compact_for_prompt(
+            json_data.get("transcription", ""),
+            json_data.get("extracted_text", ""),
+            self.prompt_token_budget
+        )
+
+        saved = stats["tokens_before"] - stats["tokens_after"]
+        if saved > 0:
+            print(f"Prompt compaction: ~{stats['tokens_before']} -> ~{stats['tokens_after']} tokens "
+                  f"(saved ~{saved}; dropped {stats['duplicate_lines']} OCR lines repeating the transcript, "
+                  f"{stats['noisy_lines']} noisy OCR lines{', truncated to budget' if stats['truncated'] else ''})")
         
         combined_text = ""
         
@@ -265,20 +771,8 @@ class MisinformationDetector:
             
         return combined_text.strip()
     
-    def extract_claim(self, text_data, detection_result):
-        """
-        Extract the main claim from text data and detection results.
-        
-        Args:
-            text_data (str): The original text data
-            detection_result (dict): Misinformation detection results
-            
-        Returns:
-            str: Extracted main claim for web search
-        """
-        if len(text_data.split()) < 50:
-            return text_data
-        
+    def _build_claim_messages(self, text_data, detection_result):
+        """Build the chat messages for a claim extraction request."""
         system_prompt = """
         You are an expert at identifying the main claims in text. 
         Extract the central claim that was identified as potential misinformation.
@@ -305,27 +799,55 @@ class MisinformationDetector:
         
         Extract the main claim that needs to be fact-checked. Return ONLY the claim without any additional text.
         """
+
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+
+    def extract_claim(self, text_data, detection_result):
+        """
+        Extract the main claim from text data and detection results.
+        
+        Args:
+            text_data (str): The original text data
+            detection_result (dict): Misinformation detection results
+            
+        Returns:
+            str: Extracted main claim for web search
+        """
+        if len(text_data.split()) < 50:
+            return text_data
         
         try:
-            response = self.client.chat.completions.create(
+            claim = self.backend.complete(
+                self._build_claim_messages(text_data, detection_result),
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
                 temperature=0.1,
                 max_tokens=300
-            )
+            ).strip()
             
-            claim = response.choices[0].message.content.strip()
-            
-            if len(claim.split()) > 50:
-                claim = " ".join(claim.split()[:50]) + "..."
-                
-            return claim
+            return self._truncate_claim(claim)
             
         except Exception as e:
-            words = text_data.split()
-            if len(words) > 50:
-                return " ".join(words[:50]) + "..."
-            return text_data
\ No newline at end of file
+            # Fall back to the (truncated) text itself
+            return self._truncate_claim(text_data)
+
+    async def aextract_claim(self, text_data, detection_result):
+        """Async counterpart of extract_claim."""
+        if len(text_data.split()) < 50:
+            return text_data
+
+        try:
+            claim = await self.backend.acomplete(
+                self._build_claim_messages(text_data, detection_result),
+                model=self.model,
+                temperature=0.1,
+                max_tokens=300
+            )
+
+            return self._truncate_claim(claim.strip())
+
+        except Exception as e:
+            # Fall back to the (truncated) text itself
+            return self._truncate_claim(text_data)
@@ -0,0 +1,116 @@
+import os
+import threading
+from contextlib import contextmanager
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+import pytesseract
+import cv2
+from text_regions import crop_to_text_regions
+
+
+# ocr_frames() runs in progress, and whether OMP_THREAD_LIMIT was set by them
+_thread_limit_lock = threading.Lock()
+_thread_limit_users = 0
+_thread_limit_set = False
+
+
+@contextmanager
+def tesseract_thread_limit(limit="1"):
+    """
+    Cap Tesseract's OpenMP threads for the processes started inside the block.
+
+    pytesseract hands os.environ to every Tesseract process and has no
+    per-call environment option, so OMP_THREAD_LIMIT is set only while OCR
+    runs and removed again afterwards. A value the user set is left alone.
+    """
+    global _thread_limit_users, _thread_limit_set
+    with _thread_limit_lock:
+        if _thread_limit_users == 0:
+            _thread_limit_set = "OMP_THREAD_LIMIT" not in os.environ
+            if _thread_limit_set:
+                os.environ["OMP_THREAD_LIMIT"] = limit
+        _thread_limit_users += 1
+    try:
+        yield
+    finally:
+        with _thread_limit_lock:
+            _thread_limit_users -= 1
+            if _thread_limit_users == 0 and _thread_limit_set:
+                os.environ.pop("OMP_THREAD_LIMIT", None)
+
+
+def default_ocr_workers():
+    """Worker count from the OCR_WORKERS environment variable, else one per CPU core."""
+    try:
+        return max(1, int(os.getenv("OCR_WORKERS", "")))
+    except ValueError:
+        return os.cpu_count() or 1
+
+
+def default_text_regions():
+    """Whether to OCR only detected text regions, from OCR_TEXT_REGIONS (default on)."""
+    return os.getenv("OCR_TEXT_REGIONS", "1").lower() not in ("0", "false", "no")
+
+
+def ocr_frame(frame, text_regions=True):
+    """
+    Run Tesseract on a single in-memory frame and return the stripped text.
+
+    Args:
+        frame (Frame): Frame to read
+        text_regions (bool): OCR only the detected text regions (stacked into one
+            image) instead of the full frame. Frames with no text-like region
+            skip Tesseract entirely.
+    """
+    image = frame.image
+    if text_regions:
+        image = crop_to_text_regions(image)
+        if image is None:
+            return ""
+
+    return pytesseract.image_to_string(Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))).strip()
+
+
+def ocr_frames(frames, workers=None, text_regions=None):
+    """
+    OCR frames concurrently while keeping the output in frame order.
+
+    Each pytesseract call runs a separate Tesseract process, so a thread pool is
+    enough to keep several of them busy. At most `2 * workers` frames are held
+    in memory at once, which keeps a lazy frame generator lazy.
+
+    Args:
+        frames (iterable of Frame): Frames in video order
+        workers (int, optional): Number of concurrent Tesseract processes.
+            Defaults to default_ocr_workers().
+        text_regions (bool, optional): Passed to ocr_frame. Defaults to
+            default_text_regions().
+
+    Returns:
+        list: (timestamp, text) for each frame, in the same order as `frames`
+    """
+    workers = workers or default_ocr_workers()
+    if text_regions is None:
+        text_regions = default_text_regions()
+
+    if workers == 1:
+        return [(frame.timestamp, ocr_frame(frame, text_regions)) for frame in frames]
+
+    results = []
+    pending = deque()
+
+    # Each Tesseract process would otherwise start its own OpenMP thread pool
+    # and oversubscribe the cores we are already using for parallelism
+    with tesseract_thread_limit(), ThreadPoolExecutor(max_workers=workers) as executor:
+        for frame in frames:
+            pending.append((frame.timestamp, executor.submit(ocr_frame, frame, text_regions)))
+            if len(pending) >= 2 * workers:
+                timestamp, future = pending.popleft()
+                results.append((timestamp, future.result()))
+
+        while pending:
+            timestamp, future = pending.popleft()
+            results.append((timestamp, future.result()))
+
+    return results
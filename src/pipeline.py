@@ -0,0 +1,129 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from frame_dedup import FrameDeduplicator
+from ocr import ocr_frames
+from caption_timeline import build_caption_timeline, timeline_to_text
+from audio_decoder import decode_audio, write_mp3
+from whisper_models import whisper_registry, DEFAULT_WHISPER_MODEL
+
+
+def ocr_text_from_frames(frames, workers=None):
+    """
+    Deduplicate frames, OCR the remaining ones and merge the lines into a caption timeline.
+
+    Args:
+        frames (iterable of Frame): Sampled frames in video order
+        workers (int, optional): Number of concurrent Tesseract processes
+
+    Returns:
+        tuple: (extracted text with one distinct caption per line, caption timeline list)
+    """
+    deduplicator = FrameDeduplicator()
+    ocr_results = ocr_frames(deduplicator.filter(frames), workers=workers)
+    print(deduplicator.summary())
+
+    timeline = build_caption_timeline(ocr_results)
+    raw_lines = sum(len(text.splitlines()) for _, text in ocr_results)
+    print(f"Caption timeline: {raw_lines} OCR lines merged into {len(timeline)} captions")
+
+    return timeline_to_text(timeline), timeline
+
+
+def transcribe_samples(audio, model_name=DEFAULT_WHISPER_MODEL):
+    """Transcribe audio samples (or an audio file path) with the process-wide Whisper model."""
+    result, timing = whisper_registry.transcribe(audio, model_name, language="en", verbose=False)
+    print(f"Whisper timing: load {timing['load_seconds']:.2f}s, inference {timing['inference_seconds']:.2f}s")
+    return result["text"]
+
+
+def transcribe_video_audio(video_path, model_name=DEFAULT_WHISPER_MODEL, audio_path=None):
+    """
+    Decode a video's soundtrack and transcribe it.
+
+    A soundtrack ffmpeg cannot decode is logged and treated like a missing
+    one, so the visual branch's text is still used.
+
+    Returns:
+        str: Transcription, or "" if the video has no (decodable) audio track
+    """
+    try:
+        samples = decode_audio(video_path)
+    except RuntimeError as e:
+        print(f"Skipping audio: {e}")
+        return ""
+    if samples is None:
+        print("No audio detected in video.")
+        return ""
+
+    if audio_path:
+        write_mp3(video_path, audio_path)
+
+    return transcribe_samples(samples, model_name)
+
+
+def _timed(branch):
+    """Run a zero-argument callable and return (result, elapsed seconds)."""
+    start = time.perf_counter()
+    result = branch()
+    return result, time.perf_counter() - start
+
+
+def run_branches(visual_branch, audio_branch):
+    """
+    Run the visual and audio branches concurrently and join their outputs.
+
+    Args:
+        visual_branch (callable): Returns (OCR text, caption timeline)
+        audio_branch (callable): Returns the transcription
+
+    Returns:
+        tuple: (payload dict with 'transcription', 'extracted_text' and 'caption_timeline',
+                timings dict with per-branch, critical-path and wall seconds)
+    """
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        visual_future = executor.submit(_timed, visual_branch)
+        audio_future = executor.submit(_timed, audio_branch)
+
+        (extracted_text, caption_timeline), visual_seconds = visual_future.result()
+        transcription, audio_seconds = audio_future.result()
+
+    timings = {
+        "visual_seconds": visual_seconds,
+        "audio_seconds": audio_seconds,
+        "critical_path_seconds": max(visual_seconds, audio_seconds),
+        "critical_path": "visual" if visual_seconds >= audio_seconds else "audio",
+        "wall_seconds": time.perf_counter() - start
+    }
+
+    print(f"Pipeline timing: visual {visual_seconds:.2f}s, audio {audio_seconds:.2f}s, "
+          f"critical path {timings['critical_path']} ({timings['critical_path_seconds']:.2f}s), "
+          f"wall {timings['wall_seconds']:.2f}s")
+
+    payload = {
+        "transcription": transcription,
+        "extracted_text": extracted_text,
+        "caption_timeline": caption_timeline
+    }
+    return payload, timings
+
+
+def run_extraction_pipeline(video_path, frames, workers=None, model_name=DEFAULT_WHISPER_MODEL, audio_path=None):
+    """
+    Extract OCR text and a transcription from a video, running both branches in parallel.
+
+    Args:
+        video_path (str): Path to the video file
+        frames (iterable of Frame): Lazily sampled frames for the visual branch
+        workers (int, optional): Number of concurrent Tesseract processes
+        model_name (str): Whisper model name
+        audio_path (str, optional): Also save the soundtrack as an MP3 here
+
+    Returns:
+        tuple: (payload, timings) as returned by run_branches
+    """
+    return run_branches(
+        lambda: ocr_text_from_frames(frames, workers),
+        lambda: transcribe_video_audio(video_path, model_name, audio_path)
+    )
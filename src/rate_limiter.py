@@ -0,0 +1,178 @@
+import os
+import json
+import time
+import asyncio
+import threading
+
+# Requests and tokens per minute for each provider and model ("*" = any model).
+# Groq's limits are per model; SerpAPI's are per account. Override with
+# $DEEPCONTEXT_RATE_LIMITS, e.g. '{"groq:llama3-70b-8192": {"rpm": 100, "tpm": 20000}}'.
+DEFAULT_LIMITS = {
+    ("groq", "llama3-70b-8192"): {"rpm": 30, "tpm": 6000},
+    ("groq", "llama3-8b-8192"): {"rpm": 30, "tpm": 30000},
+    ("groq", "*"): {"rpm": 30, "tpm": 6000},
+    ("serpapi", "*"): {"rpm": 60},
+}
+
+
+def limits_from_env():
+    """
+    Limit overrides from $DEEPCONTEXT_RATE_LIMITS.
+
+    A malformed value is reported and ignored, so a typo falls back to
+    DEFAULT_LIMITS instead of failing every import of this module.
+
+    Returns:
+        dict: {(provider, model): {"rpm": ..., "tpm": ...}}
+    """
+    raw = os.getenv("DEEPCONTEXT_RATE_LIMITS", "").strip()
+    if not raw:
+        return {}
+    try:
+        overrides = json.loads(raw)
+        if not isinstance(overrides, dict) or not all(isinstance(value, dict) for value in overrides.values()):
+            raise ValueError('expected {"provider:model": {"rpm": ..., "tpm": ...}}')
+    except ValueError as e:
+        print(f"Warning: ignoring invalid DEEPCONTEXT_RATE_LIMITS ({str(e)}); using default rate limits")
+        return {}
+
+    limits = {}
+    for key, value in overrides.items():
+        provider, _, model = key.partition(":")
+        limits[(provider, model or "*")] = value
+    return limits
+
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        """
+        Token bucket refilled continuously at `per_minute`, holding at most a minute's worth.
+
+        Reservations are taken immediately and may drive the balance negative;
+        the caller then waits until the deficit has been refilled. This queues
+        callers in arrival order without a background thread.
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.balance = float(per_minute)
+        self.updated = time.monotonic()
+
+    def level(self, now):
+        """Balance at `now`, counting the refill since the last reservation."""
+        return min(self.capacity, self.balance + (now - self.updated) * self.rate)
+
+    def reserve(self, amount, now):
+        """Take `amount` from the bucket and return how many seconds to wait before using it."""
+        self.balance = self.level(now)
+        self.updated = now
+        self.balance -= amount
+        return max(0.0, -self.balance / self.rate)
+
+    def refund(self, amount):
+        """Give back part of an earlier reservation (e.g. unused completion tokens)."""
+        self.balance = min(self.capacity, self.balance + amount)
+
+
+class RateLimiter:
+    def __init__(self, limits=None):
+        """
+        Request and token budgets per provider and model, shared by every caller in the process.
+
+        Callers acquire before each API call and are delayed, not failed, when
+        a budget is exhausted. Wait times are recorded per provider/model.
+
+        Args:
+            limits (dict, optional): {(provider, model): {"rpm": ..., "tpm": ...}}.
+                Defaults to DEFAULT_LIMITS updated with $DEEPCONTEXT_RATE_LIMITS.
+        """
+        if limits is None:
+            limits = dict(DEFAULT_LIMITS)
+            limits.update(limits_from_env())
+        self.limits = limits
+
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self.stats = {}
+
+    def _limit_for(self, provider, model):
+        return self.limits.get((provider, model)) or self.limits.get((provider, "*"))
+
+    def _buckets_for(self, key):
+        """(request bucket, token bucket) for a provider/model; either may be None if unlimited."""
+        if key not in self._buckets:
+            limit = self._limit_for(*key) or {}
+            self._buckets[key] = (
+                TokenBucket(limit["rpm"]) if limit.get("rpm") else None,
+                TokenBucket(limit["tpm"]) if limit.get("tpm") else None
+            )
+        return self._buckets[key]
+
+    def _reserve(self, provider, model, tokens):
+        """Reserve one request and `tokens` tokens; return the wait in seconds."""
+        key = (provider, model or "*")
+        with self._lock:
+            request_bucket, token_bucket = self._buckets_for(key)
+            now = time.monotonic()
+            wait = 0.0
+            if request_bucket:
+                wait = max(wait, request_bucket.reserve(1, now))
+            if token_bucket and tokens:
+                wait = max(wait, token_bucket.reserve(tokens, now))
+
+            stats = self.stats.setdefault(key, {"requests": 0, "waited": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0})
+            stats["requests"] += 1
+            if wait > 0:
+                stats["waited"] += 1
+                stats["wait_seconds"] += wait
+                stats["max_wait_seconds"] = max(stats["max_wait_seconds"], wait)
+        return wait
+
+    def acquire(self, provider, model=None, tokens=0):
+        """
+        Block until a request of `tokens` tokens fits the provider/model budget.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        wait = self._reserve(provider, model, tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, provider, model=None, tokens=0):
+        """Async counterpart of acquire(): waits without blocking the event loop."""
+        wait = self._reserve(provider, model, tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def would_wait(self, provider, model=None, tokens=0):
+        """Whether acquire() with these arguments would queue right now; nothing is reserved."""
+        with self._lock:
+            request_bucket, token_bucket = self._buckets_for((provider, model or "*"))
+            now = time.monotonic()
+            if request_bucket and request_bucket.level(now) < 1:
+                return True
+            return bool(token_bucket and tokens and token_bucket.level(now) < tokens)
+
+    def refund(self, provider, model=None, tokens=0):
+        """Return unused tokens from an earlier acquire(), once the real usage is known."""
+        if tokens <= 0:
+            return
+        with self._lock:
+            _, token_bucket = self._buckets_for((provider, model or "*"))
+            if token_bucket:
+                token_bucket.refund(tokens)
+
+    def summary(self):
+        """One line per provider/model with request counts and queueing time."""
+        lines = []
+        for (provider, model), stats in sorted(self.stats.items()):
+            mean_wait = stats["wait_seconds"] / stats["requests"] if stats["requests"] else 0.0
+            lines.append(f"Rate limiter {provider}/{model}: {stats['requests']} requests, {stats['waited']} queued, "
+                         f"waited {stats['wait_seconds']:.1f}s total (mean {mean_wait:.2f}s, max {stats['max_wait_seconds']:.2f}s)")
+        return "\n".join(lines)
+
+
+# Process-wide scheduler shared by the LLM backends and the web search
+rate_limiter = RateLimiter()
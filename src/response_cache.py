@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "deepcontext")
+
+
+def make_cache_key(*parts):
+    """Hash any JSON-serializable parts into a stable content-addressed key."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def normalize_text(text):
+    """Collapse whitespace so trivially different copies of a text share a cache key."""
+    return " ".join(text.split())
+
+
+class ResponseCache:
+    def __init__(self, name, cache_dir=None, max_entries=10000, ttl_seconds=30 * 24 * 3600):
+        """
+        Persistent key/value cache backed by SQLite, with TTL and LRU eviction.
+
+        Args:
+            name (str): Cache name; each name gets its own database file
+            cache_dir (str, optional): Directory for the database. Defaults to
+                $DEEPCONTEXT_CACHE_DIR, then ~/.cache/deepcontext.
+            max_entries (int): Least recently used entries are evicted beyond this
+            ttl_seconds (float): Default time-to-live for new entries
+        """
+        cache_dir = cache_dir or os.getenv("DEEPCONTEXT_CACHE_DIR") or DEFAULT_CACHE_DIR
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.path = os.path.join(cache_dir, f"{name}.sqlite3")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        self._conn.commit()
+
+    def get(self, key):
+        """
+        Look up a key.
+
+        Returns:
+            The cached value, or None on a miss or an expired entry
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+
+            if row is None or row[1] < now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl_seconds=None):
+        """Store a JSON-serializable value, evicting least recently used entries if full."""
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now + ttl, now)
+            )
+            self._conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                "SELECT key FROM entries ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def stats(self):
+        """Hit/miss counters for this process, plus the current entry count."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries
+        }
@@ -0,0 +1,377 @@
+import os
+import time
+import random
+import asyncio
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+# Exception class names (from groq, requests and httpx) that mean the request
+# never got a proper answer and can safely be sent again
+RETRYABLE_ERRORS = {
+    "APIConnectionError", "APITimeoutError", "ConnectionError", "Timeout", "ReadTimeout",
+    "ConnectTimeout", "TimeoutException", "TransportError", "RemoteProtocolError", "TimeoutError"
+}
+
+# Threads available to sync hedged calls (the primary and its duplicate each take one)
+HEDGE_WORKERS = 8
+
+
+# Seconds the running attempt spent queued for rate limits rather than on the
+# network; callees report it through record_queue_wait()
+_queue_wait = contextvars.ContextVar("queue_wait", default=0.0)
+
+
+def record_queue_wait(seconds):
+    """
+    Report that the running attempt waited `seconds` before its request.
+
+    Queueing counts neither as latency nor against the call's deadline, so a
+    call that waits its turn behind a rate limit still gets its full timeout.
+    """
+    _queue_wait.set(_queue_wait.get() + seconds)
+
+
+class Deadline:
+    def __init__(self, seconds):
+        """Time left for a call across all its attempts; extend() pushes it back by time spent queueing."""
+        self.end = time.monotonic() + seconds
+        self._lock = threading.Lock()
+
+    def remaining(self):
+        return self.end - time.monotonic()
+
+    def extend(self, seconds):
+        with self._lock:
+            self.end += seconds
+
+
+def _status_code(error):
+    """HTTP status of an API error from groq, requests or httpx, if it has one."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def is_retryable(error):
+    """Whether an exception from an LLM call is transient (rate limit, 5xx, timeout, dropped connection)."""
+    status = _status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return any(cls.__name__ in RETRYABLE_ERRORS for cls in type(error).__mro__)
+
+
+def retry_after_seconds(error):
+    """The server's Retry-After hint in seconds, if the error carries one."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LatencyTracker:
+    def __init__(self, window=200, min_samples=20):
+        """Rolling per-key latency samples, used to pick the hedging delay."""
+        self.window = window
+        self.min_samples = min_samples
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, key, seconds):
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, key, fraction):
+        """The `fraction` quantile of recent latencies, or None until enough samples exist."""
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts=4, base_delay=0.5, max_delay=10.0, deadline=90.0,
+                 hedge=False, hedge_delay=None, hedge_percentile=0.95):
+        """
+        Retry transient failures with exponential backoff and full jitter, within a deadline.
+
+        With hedging on, a call that hasn't answered after `hedge_delay` (or,
+        by default, the p95 latency observed for that model) is sent a second
+        time and whichever copy answers first wins. No duplicate is sent while
+        the caller's `can_hedge()` says the rate limiter is queueing, or while
+        the hedging threads are all busy: a sync duplicate cannot be cancelled,
+        so the losing copy would keep its thread and its token reservation.
+
+        Args:
+            max_attempts (int): Attempts per call, including the first
+            base_delay (float): Backoff before the first retry, doubled each time
+            max_delay (float): Cap on a single jittered backoff (a longer
+                Retry-After from the server is still waited out in full)
+            deadline (float): Total seconds a call may take across all attempts
+            hedge (bool): Send a duplicate request for slow calls
+            hedge_delay (float, optional): Fixed hedging delay; defaults to the
+                observed `hedge_percentile` latency once enough calls were timed
+            hedge_percentile (float): Latency quantile used as the hedging delay
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.hedge_percentile = hedge_percentile
+
+        self.latencies = LatencyTracker()
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "hedges": 0, "hedge_wins": 0}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._running = 0
+
+    @classmethod
+    def from_env(cls):
+        """Policy configured by $DEEPCONTEXT_LLM_RETRIES, $DEEPCONTEXT_LLM_DEADLINE and $DEEPCONTEXT_LLM_HEDGE."""
+        return cls(
+            max_attempts=int(os.getenv("DEEPCONTEXT_LLM_RETRIES", "3")) + 1,
+            deadline=float(os.getenv("DEEPCONTEXT_LLM_DEADLINE", "90")),
+            hedge=os.getenv("DEEPCONTEXT_LLM_HEDGE", "0") not in ("", "0", "false", "no")
+        )
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def backoff(self, attempt, error=None):
+        """
+        Full-jitter delay before retry number `attempt` (1-based), at least the server's Retry-After.
+
+        A Retry-After past the deadline makes _next_delay() give up rather
+        than retry early into another rate-limit error.
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        hint = retry_after_seconds(error) if error is not None else None
+        return max(delay, hint) if hint else delay
+
+    def _next_delay(self, attempt, error, deadline):
+        """Seconds to wait before the next attempt, or None if the call should give up."""
+        if attempt >= self.max_attempts or not is_retryable(error):
+            return None
+        delay = self.backoff(attempt, error)
+        if delay >= deadline.remaining():
+            return None
+        return delay
+
+    def _hedge_after(self, key):
+        if not self.hedge:
+            return None
+        return self.hedge_delay or self.latencies.percentile(key, self.hedge_percentile)
+
+    def _pool_has_room(self, needed):
+        with self._lock:
+            return self._running + needed <= HEDGE_WORKERS
+
+    def _submit(self, key, call, timeout, deadline):
+        """Run one timed attempt on the hedging pool, counting it while it runs."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="hedge")
+            self._running += 1
+        future = self._executor.submit(self._timed, key, call, timeout, deadline)
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, future):
+        with self._lock:
+            self._running -= 1
+
+    def _timed(self, key, call, timeout, deadline):
+        """
+        Run one attempt and record its latency.
+
+        Rate-limit queueing the attempt reported is left out of the latency
+        and added to the deadline, so `timeout` covers the request alone.
+        """
+        previous = _queue_wait.get()
+        _queue_wait.set(0.0)
+        try:
+            start = time.monotonic()
+            result = call(timeout)
+            self.latencies.record(key, time.monotonic() - start - _queue_wait.get())
+            return result
+        finally:
+            deadline.extend(_queue_wait.get())
+            _queue_wait.set(previous)
+
+    def _call_hedged(self, key, call, timeout, hedge_after, deadline, can_hedge):
+        """
+        Run `call`, racing a duplicate against it if it is still running after `hedge_after`.
+
+        The duplicate is only sent if `can_hedge()` still allows it and a
+        thread is free; otherwise the primary is simply waited for.
+        """
+        primary = self._submit(key, call, timeout, deadline)
+        done, _ = wait([primary], timeout=hedge_after)
+        if done or not (can_hedge() and self._pool_has_room(1)):
+            return primary.result()
+
+        self._count("hedges")
+        hedge = self._submit(key, call, max(0.1, timeout - hedge_after), deadline)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count("hedge_wins")
+                    # The slower copy is left to finish in the background
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def call(self, call, key=None, can_hedge=None):
+        """
+        Run `call(timeout)` under the policy; `timeout` is the time left before the deadline.
+
+        Time an attempt reports through record_queue_wait() does not count
+        against the deadline: the deadline and `timeout` bound the requests
+        themselves, however long the rate limiter makes them wait first.
+
+        Args:
+            call (callable): One attempt, given its timeout in seconds
+            key (str, optional): Latency bucket for hedging, e.g. the model
+            can_hedge (callable, optional): Returns False when a duplicate
+                request would have to queue (e.g. the rate limiter is saturated)
+
+        Returns:
+            The first successful result
+
+        Raises:
+            The last error, once it is not retryable or attempts/deadline are exhausted
+        """
+        self._count("calls")
+        can_hedge = can_hedge or (lambda: True)
+        deadline = Deadline(self.deadline)
+        attempt = 1
+        while True:
+            remaining = max(0.1, deadline.remaining())
+            try:
+                hedge_after = self._hedge_after(key)
+                if hedge_after is not None and hedge_after < remaining and can_hedge() and self._pool_has_room(2):
+                    return self._call_hedged(key, call, remaining, hedge_after, deadline, can_hedge)
+                return self._timed(key, call, remaining, deadline)
+            except Exception as e:
+                delay = self._next_delay(attempt, e, deadline)
+                if delay is None:
+                    self._count("failures")
+                    raise
+                print(f"LLM call failed ({type(e).__name__}: {str(e)[:120]}); retry {attempt}/{self.max_attempts - 1} in {delay:.1f}s")
+                self._count("retries")
+                time.sleep(delay)
+                attempt += 1
+
+    async def _atimed(self, key, call, timeout, deadline):
+        """Async counterpart of _timed()."""
+        previous = _queue_wait.get()
+        _queue_wait.set(0.0)
+        try:
+            start = time.monotonic()
+            result = await call(timeout)
+            self.latencies.record(key, time.monotonic() - start - _queue_wait.get())
+            return result
+        finally:
+            deadline.extend(_queue_wait.get())
+            _queue_wait.set(previous)
+
+    async def _acall_hedged(self, key, call, timeout, hedge_after, deadline, can_hedge):
+        """Async counterpart of _call_hedged(); the losing request is cancelled."""
+        primary = asyncio.ensure_future(self._atimed(key, call, timeout, deadline))
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done or not can_hedge():
+            return await primary
+
+        self._count("hedges")
+        hedge = asyncio.ensure_future(self._atimed(key, call, max(0.1, timeout - hedge_after), deadline))
+        pending = {primary, hedge}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def acall(self, call, key=None, can_hedge=None):
+        """Async counterpart of call(); `call(timeout)` returns an awaitable."""
+        self._count("calls")
+        can_hedge = can_hedge or (lambda: True)
+        deadline = Deadline(self.deadline)
+        attempt = 1
+        while True:
+            remaining = max(0.1, deadline.remaining())
+            try:
+                hedge_after = self._hedge_after(key)
+                if hedge_after is not None and hedge_after < remaining and can_hedge():
+                    return await self._acall_hedged(key, call, remaining, hedge_after, deadline, can_hedge)
+                return await self._atimed(key, call, remaining, deadline)
+            except Exception as e:
+                delay = self._next_delay(attempt, e, deadline)
+                if delay is None:
+                    self._count("failures")
+                    raise
+                print(f"LLM call failed ({type(e).__name__}: {str(e)[:120]}); retry {attempt}/{self.max_attempts - 1} in {delay:.1f}s")
+                self._count("retries")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def iterate(self, stream, key=None):
+        """
+        Yield from `stream(timeout)`, retrying only while nothing has been yielded yet.
+
+        Once text has reached the caller a failure is raised as-is, since a
+        retry would repeat output the caller already consumed.
+        """
+        self._count("calls")
+        deadline = Deadline(self.deadline)
+        attempt = 1
+        previous = _queue_wait.get()
+        while True:
+            remaining = max(0.1, deadline.remaining())
+            produced = False
+            _queue_wait.set(0.0)
+            try:
+                for piece in stream(remaining):
+                    produced = True
+                    yield piece
+                return
+            except Exception as e:
+                deadline.extend(_queue_wait.get())
+                delay = None if produced else self._next_delay(attempt, e, deadline)
+                if delay is None:
+                    self._count("failures")
+                    raise
+                print(f"LLM stream failed ({type(e).__name__}: {str(e)[:120]}); retry {attempt}/{self.max_attempts - 1} in {delay:.1f}s")
+                self._count("retries")
+                time.sleep(delay)
+                attempt += 1
+            finally:
+                _queue_wait.set(previous)
+
+    def summary(self):
+        """One-line report of retries and hedging."""
+        stats = self.stats
+        return (f"LLM calls: {stats['calls']}, retries {stats['retries']}, failures {stats['failures']}, "
+                f"hedged {stats['hedges']} (hedge won {stats['hedge_wins']})")
@@ -0,0 +1,250 @@
+import threading
+from json_extract import extract_json
+
+# Marker type for JSON numbers (int or float, but not bool)
+NUMBER = "number"
+
+# Required fields and types of each structured response. A list holding one
+# schema means "list of objects matching it"; a bare `list` means any list.
+DETECTION_SCHEMA = {
+    "contains_misinformation": bool,
+    "confidence_score": NUMBER,
+    "detected_criteria": list,
+    "explanation": str,
+    "prompt_for_context": bool
+}
+
+# Extra fields of a fused (include_claims) detection response
+CLAIM_FIELDS_SCHEMA = {
+    "main_claim": str,
+    "claims": list
+}
+
+EVALUATION_SCHEMA = {
+    "evaluations": [{"reliability_score": NUMBER, "reasoning": str}]
+}
+
+CONTEXT_SCHEMA = {
+    "context_summary": str,
+    "perspectives": [{"viewpoint": str}],
+    "conclusion": str
+}
+
+# Longest slice of a broken response sent back in a repair request
+REPAIR_MAX_CHARS = 6000
+
+
+def _type_name(expected):
+    if expected == NUMBER:
+        return "number"
+    if isinstance(expected, list):
+        return "list of objects"
+    return {bool: "boolean", str: "string", list: "list", dict: "object"}.get(expected, str(expected))
+
+
+def _matches(value, expected):
+    if expected == NUMBER:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if isinstance(expected, list):
+        return isinstance(value, list)
+    return isinstance(value, expected)
+
+
+def validate(data, schema, path=""):
+    """
+    Check a decoded response against a schema.
+
+    Args:
+        data: Decoded JSON value
+        schema (dict): {field: type}, as DETECTION_SCHEMA
+        path (str): Prefix for field names in the messages (used when recursing)
+
+    Returns:
+        list: Human-readable problems; empty if the data is valid
+    """
+    if not isinstance(data, dict):
+        return [f"{path.rstrip('.') or 'response'} is not a JSON object"]
+
+    problems = []
+    for field, expected in schema.items():
+        name = f"{path}{field}"
+        if field not in data:
+            problems.append(f"missing field '{name}'")
+        elif not _matches(data[field], expected):
+            problems.append(f"'{name}' should be a {_type_name(expected)}")
+        elif isinstance(expected, list):
+            for index, item in enumerate(data[field]):
+                problems.extend(validate(item, expected[0], f"{name}[{index}]."))
+    return problems
+
+
+def describe_schema(schema, indent="  "):
+    """Field list of a schema as shown to the model in a repair request."""
+    lines = []
+    for field, expected in schema.items():
+        lines.append(f"{indent}\"{field}\": {_type_name(expected)}")
+        if isinstance(expected, list):
+            lines.append(describe_schema(expected[0], indent + "    "))
+    return "\n".join(lines)
+
+
+def parse_response(text, schema):
+    """
+    Extract and validate the JSON object in a response.
+
+    Returns:
+        tuple: (decoded dict or None, list of problems)
+    """
+    data = extract_json(text or "")
+    if data is None:
+        return None, ["no valid JSON object found"]
+    return data, validate(data, schema)
+
+
+def build_repair_messages(text, schema, problems):
+    """
+    Chat messages asking the model to fix a response that failed validation.
+
+    Only the broken output and the expected fields are sent, not the original
+    prompt, so a repair costs a fraction of the first request.
+    """
+    system_prompt = (
+        "You repair malformed JSON responses. Return ONLY a single valid JSON object with "
+        "these fields, keeping the content of the original response wherever possible:\n"
+        "{\n" + describe_schema(schema) + "\n}"
+    )
+    user_prompt = (
+        "This response failed validation:\n- " + "\n- ".join(problems) +
+        "\n\nResponse to repair:\n" + (text or "")[:REPAIR_MAX_CHARS]
+    )
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+class OutputMetrics:
+    def __init__(self):
+        """Per-response-type counts of invalid structured responses and repair outcomes."""
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    def record(self, name, valid, repaired=None):
+        """
+        Count one response of type `name`.
+
+        Args:
+            valid (bool): Whether the first response passed validation
+            repaired (bool, optional): For invalid responses, whether the repair call fixed it
+        """
+        with self._lock:
+            stats = self.stats.setdefault(name, {"responses": 0, "invalid": 0, "repaired": 0, "failed": 0})
+            stats["responses"] += 1
+            if not valid:
+                stats["invalid"] += 1
+                stats["repaired" if repaired else "failed"] += 1
+
+    def failure_rate(self, name):
+        """Share of `name` responses that failed validation on the first attempt."""
+        stats = self.stats.get(name)
+        return stats["invalid"] / stats["responses"] if stats and stats["responses"] else 0.0
+
+    def summary(self):
+        """One line per response type with its parse-failure rate and repair outcomes."""
+        lines = []
+        for name, stats in sorted(self.stats.items()):
+            lines.append(f"Structured output {name}: {stats['responses']} responses, {stats['invalid']} invalid "
+                         f"({self.failure_rate(name):.1%}), {stats['repaired']} repaired, {stats['failed']} unusable")
+        return "\n".join(lines)
+
+
+# Process-wide parse-failure metrics
+output_metrics = OutputMetrics()
+
+
+def repair(backend, text, schema, name, model=None, max_tokens=2000):
+    """
+    Validate a response and, if it is unusable, ask the model once to fix it.
+
+    Returns:
+        str: `text` if it was valid, else the repaired response if that is
+            valid, else `text` unchanged (the caller's own fallback applies)
+    """
+    _, problems = parse_response(text, schema)
+    if not problems:
+        output_metrics.record(name, True)
+        return text
+
+    print(f"Invalid {name} response ({'; '.join(problems[:3])}); requesting a repair")
+    try:
+        repaired_text = backend.complete(
+            build_repair_messages(text, schema, problems),
+            model=model,
+            temperature=0.0,
+            max_tokens=max_tokens,
+            **backend.json_options()
+        )
+    except Exception as e:
+        print(f"Repair request failed: {str(e)}")
+        repaired_text = None
+
+    _, repair_problems = parse_response(repaired_text, schema)
+    output_metrics.record(name, False, repaired=not repair_problems)
+    return text if repair_problems else repaired_text
+
+
+async def arepair(backend, text, schema, name, model=None, max_tokens=2000):
+    """Async counterpart of repair()."""
+    _, problems = parse_response(text, schema)
+    if not problems:
+        output_metrics.record(name, True)
+        return text
+
+    print(f"Invalid {name} response ({'; '.join(problems[:3])}); requesting a repair")
+    try:
+        repaired_text = await backend.acomplete(
+            build_repair_messages(text, schema, problems),
+            model=model,
+            temperature=0.0,
+            max_tokens=max_tokens,
+            **backend.json_options()
+        )
+    except Exception as e:
+        print(f"Repair request failed: {str(e)}")
+        repaired_text = None
+
+    _, repair_problems = parse_response(repaired_text, schema)
+    output_metrics.record(name, False, repaired=not repair_problems)
+    return text if repair_problems else repaired_text
+
+
+def complete_json(backend, messages, schema, name, model=None, temperature=0.2, max_tokens=2000):
+    """
+    Request a JSON-object completion and validate it, with one repair call on failure.
+
+    JSON output mode is requested from backends that support it (see
+    LLMBackend.json_options). The result is still text, so callers parse it
+    exactly as before.
+
+    Args:
+        backend (LLMBackend): Where the request is sent
+        messages (list): Chat messages of the request
+        schema (dict): Required fields and types, e.g. DETECTION_SCHEMA
+        name (str): Response type the metrics are recorded under
+        model (str, optional): Defaults to the backend's default model
+        temperature (float): Sampling temperature
+        max_tokens (int): Completion budget (also used for the repair)
+
+    Returns:
+        str: The response text (repaired if the first one was unusable)
+    """
+    text = backend.complete(messages, model=model, temperature=temperature, max_tokens=max_tokens,
+                            **backend.json_options())
+    return repair(backend, text, schema, name, model, max_tokens)
+
+
+async def acomplete_json(backend, messages, schema, name, model=None, temperature=0.2, max_tokens=2000):
+    """Async counterpart of complete_json()."""
+    text = await backend.acomplete(messages, model=model, temperature=temperature, max_tokens=max_tokens,
+                                   **backend.json_options())
+    return await arepair(backend, text, schema, name, model, max_tokens)
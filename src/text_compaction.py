@@ -0,0 +1,148 @@
+import re
+from caption_timeline import normalize_line
+from token_budget import estimate_tokens
+
+# Fraction of the budget kept for the transcription when OCR text competes for it
+TRANSCRIPT_SHARE = 0.75
+# OCR lines with more than this fraction of symbols are Tesseract noise
+MAX_SYMBOL_RATIO = 0.3
+# ...and so are lines where fewer than this fraction of tokens look like words
+MIN_WORD_RATIO = 0.5
+# An OCR line repeats the transcript when at least this share of its word
+# n-grams (in order) also occur in the transcript
+TRANSCRIPT_OVERLAP = 0.8
+TRANSCRIPT_NGRAM = 3
+
+
+def is_word_like(token):
+    """Whether an OCR token looks like a real word (letters only, 2+ chars, contains a vowel)."""
+    return bool(re.fullmatch(r"[A-Za-z']{2,}[.,!?:;]?", token) and re.search(r"[aeiouyAEIOUY]", token))
+
+
+def _is_meaningful_token(token):
+    """Words, plus numbers, handles and hashtags, which matter in captions even though they aren't words."""
+    return is_word_like(token) or token[0] in "@#" or bool(re.fullmatch(r"[$€£]?\d[\d.,:%]*[a-zA-Z%]{0,3}[.,!?]?", token))
+
+
+def is_low_quality_line(line):
+    """Whether an OCR line is mostly symbols or mostly non-words, e.g. '|| =~ ae_ }}'."""
+    stripped = "".join(line.split())
+    if not stripped:
+        return True
+
+    symbols = sum(1 for char in stripped if not char.isalnum())
+    if symbols / len(stripped) > MAX_SYMBOL_RATIO:
+        return True
+
+    tokens = line.split()
+    meaningful = sum(1 for token in tokens if _is_meaningful_token(token))
+    return meaningful / len(tokens) < MIN_WORD_RATIO
+
+
+def word_ngrams(words, n):
+    """Tuples of `n` consecutive words."""
+    return [tuple(words[i:i + n]) for i in range(len(words) - n + 1)]
+
+
+def transcript_ngrams(transcription, n=TRANSCRIPT_NGRAM):
+    """Every 1- to n-word sequence of a transcription, for repeats_transcript."""
+    words = normalize_line(transcription).split()
+    return {ngram for size in range(1, n + 1) for ngram in word_ngrams(words, size)}
+
+
+def repeats_transcript(line, ngrams, n=TRANSCRIPT_NGRAM):
+    """
+    Whether an OCR line says (almost) exactly what the transcript says, e.g. burnt-in subtitles.
+
+    Word order matters: the line's n-grams must occur in the transcript, so
+    "the earth is not round" does not repeat a transcript saying "the earth
+    is round" even though every word appears in it.
+
+    Args:
+        line (str): OCR line
+        ngrams (set): transcript_ngrams() of the transcription
+    """
+    words = normalize_line(line).split()
+    if not words:
+        return False
+    line_ngrams = word_ngrams(words, min(n, len(words)))
+    return sum(1 for ngram in line_ngrams if ngram in ngrams) / len(line_ngrams) >= TRANSCRIPT_OVERLAP
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Cut text at a line or word boundary so its estimated token count fits max_tokens."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+
+    # Binary search the longest word prefix that fits (leaving room for the
+    # truncation marker), then prefer ending on a full line
+    max_tokens -= estimate_tokens(" [...]")
+    words = text.split(" ")
+    low, high = 0, len(words)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(" ".join(words[:middle])) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+
+    truncated = " ".join(words[:low])
+    last_newline = truncated.rfind("\n")
+    if last_newline > len(truncated) // 2:
+        truncated = truncated[:last_newline]
+    return truncated.rstrip() + " [...]"
+
+
+def compact_for_prompt(transcription, extracted_text, token_budget):
+    """
+    Shrink a video's transcription and OCR text to fit a prompt token budget.
+
+    OCR lines that look like Tesseract noise are dropped first. Only if the
+    text is over budget are lines that repeat the transcript dropped too;
+    if it still exceeds the budget, the transcription keeps up to
+    TRANSCRIPT_SHARE of it (more if the OCR text needs less) and both parts
+    are truncated.
+
+    Args:
+        transcription (str): Whisper transcription
+        extracted_text (str): OCR text, one caption per line
+        token_budget (int): Maximum estimated tokens for both parts together
+
+    Returns:
+        tuple: (transcription, extracted_text, stats dict with token counts
+                before/after and the number of lines dropped for each reason)
+    """
+    transcription = transcription or ""
+    extracted_text = extracted_text or ""
+    tokens_before = estimate_tokens(transcription) + estimate_tokens(extracted_text)
+
+    lines = [line for line in extracted_text.splitlines() if line.strip()]
+    kept_lines = [line for line in lines if not is_low_quality_line(line)]
+    noisy_lines = len(lines) - len(kept_lines)
+    extracted_text = "\n".join(kept_lines)
+
+    transcript_tokens = estimate_tokens(transcription)
+    duplicate_lines = 0
+    if transcription and transcript_tokens + estimate_tokens(extracted_text) > token_budget:
+        ngrams = transcript_ngrams(transcription)
+        unique_lines = [line for line in kept_lines if not repeats_transcript(line, ngrams)]
+        duplicate_lines = len(kept_lines) - len(unique_lines)
+        extracted_text = "\n".join(unique_lines)
+
+    ocr_tokens = estimate_tokens(extracted_text)
+    truncated = transcript_tokens + ocr_tokens > token_budget
+    if truncated:
+        transcript_allowance = token_budget - min(ocr_tokens, int(token_budget * (1 - TRANSCRIPT_SHARE)))
+        transcription = truncate_to_tokens(transcription, transcript_allowance)
+        extracted_text = truncate_to_tokens(extracted_text, token_budget - estimate_tokens(transcription))
+
+    stats = {
+        "tokens_before": tokens_before,
+        "tokens_after": estimate_tokens(transcription) + estimate_tokens(extracted_text),
+        "duplicate_lines": duplicate_lines,
+        "noisy_lines": noisy_lines,
+        "truncated": truncated
+    }
+    return transcription, extracted_text, stats
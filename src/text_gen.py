@@ -1,10 +1,11 @@
 import os
-import cv2
 import json
-from PIL import Image
-import pytesseract
-from moviepy.editor import VideoFileClip
-import whisper
+import argparse
+from whisper_models import DEFAULT_WHISPER_MODEL
+from frame_provider import iter_frames, probe_video
+from audio_decoder import decode_audio, write_mp3
+from pipeline import ocr_text_from_frames, transcribe_samples, run_extraction_pipeline
+from workspace import JobWorkspace
 
 # Constants
 VIDEO_FILE = "video.mp4"
@@ -13,128 +14,111 @@ IMAGE_FRAMES_DIR = "image_frames"
 JSON_FILE = "data.json"
 
 
-def determine_frame_skip(video_path):
-    """Determine optimal frame skipping interval based on video length."""
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
+def determine_num_frames(video_path):
+    """Determine how many frames to sample based on video length."""
+    info = probe_video(video_path)
+    if info is None:
         print(f"Error: Could not open {video_path}")
-        return 100  # Default
+        return 10  # Default
 
-    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    duration = int(cap.get(cv2.CAP_PROP_POS_MSEC)) / 1000  # Convert to seconds
+    _, _, duration = info
 
-    cap.release()
+    if duration < 10:  # Short video (<10s) → Few frames
+        return 10
+    elif duration < 60:  # Medium video (<60s) → Moderate sampling
+        return 50
+    else:  # Long video (>60s) → Denser sampling, still spread over the full length
+        return 200
 
-    if duration < 10:  # Short video (<10s) → Skip fewer frames
-        return max(1, frame_count // 10)
-    elif duration < 60:  # Medium video (<60s) → Moderate skipping
-        return max(10, frame_count // 50)
-    else:  # Long video (>60s) → Higher frame skipping
-        return max(50, frame_count // 200)
 
+def extract_frames_from_video(video_path, debug_dir=None):
+    """
+    Sample frames uniformly across the whole video.
 
-def extract_frames_from_video(video_path):
-    """Extract frames from a video at an optimal interval."""
+    Frames stay in memory and are consumed directly by extract_text_from_frames.
+    Pass `debug_dir` (e.g. IMAGE_FRAMES_DIR) to also write them to disk as PNGs.
+
+    Returns:
+        generator of Frame, or None if the video does not exist
+    """
     if not os.path.exists(video_path):
         print(f"Error: {video_path} not found!")
-        return False
-
-    frame_skip = determine_frame_skip(video_path)
-
-    os.makedirs(IMAGE_FRAMES_DIR, exist_ok=True)
-
-    # Clear previous frames
-    for file in os.listdir(IMAGE_FRAMES_DIR):
-        os.remove(os.path.join(IMAGE_FRAMES_DIR, file))
-
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        print(f"Error: Failed to open {video_path}.")
-        return False
-
-    index = 0
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break  # End of video
+        return None
 
-        if index % frame_skip == 0:
-            frame_path = os.path.join(IMAGE_FRAMES_DIR, f"frame{index}.png")
-            cv2.imwrite(frame_path, frame)
-            print(f"Extracted: {frame_path}")
+    num_frames = determine_num_frames(video_path)
 
-        index += 1
+    return iter_frames(video_path, num_frames, debug_dir=debug_dir)
 
-    cap.release()
-    print("Frame extraction complete.")
-    return True
 
+def extract_text_from_frames(frames, workers=None, json_file=JSON_FILE):
+    """Extract text from in-memory frames using Tesseract OCR and store in JSON."""
+    # Near-duplicate frames are skipped and OCR runs on a bounded worker pool
+    # and repeated lines are merged into a time-ordered caption timeline
+    text_output, caption_timeline = ocr_text_from_frames(frames, workers)
 
-def extract_text_from_frames():
-    """Extract text from frames using Tesseract OCR and store in JSON."""
-    extracted_texts = []
-
-    for filename in sorted(os.listdir(IMAGE_FRAMES_DIR)):
-        image_path = os.path.join(IMAGE_FRAMES_DIR, filename)
-        text = pytesseract.image_to_string(Image.open(image_path)).strip()
-        if text:
-            extracted_texts.append(text)
+    # Save extracted text to JSON
+    update_json_file({"extracted_text": text_output, "caption_timeline": caption_timeline}, json_file)
 
-    text_output = "\n".join(extracted_texts)
+    print(f"Extracted text saved to {json_file}")
 
-    # Save extracted text to JSON
-    update_json_file({"extracted_text": text_output})
 
-    print(f"Extracted text saved to {JSON_FILE}")
+def extract_audio_from_video(video_path, audio_path=None, json_file=JSON_FILE):
+    """
+    Decode a video's soundtrack into 16 kHz mono float32 samples for Whisper.
 
+    The samples are passed to Whisper in memory. An MP3 is only written when
+    `audio_path` is given explicitly.
 
-def extract_audio_from_video(video_path, audio_path):
-    """Extract audio from a video and save it as an MP3 file."""
+    Returns:
+        numpy.ndarray of samples, or None if the video is missing or has no
+        (decodable) audio
+    """
     if not os.path.exists(video_path):
         print(f"Error: {video_path} not found!")
-        return False
+        return None
 
-    video_clip = VideoFileClip(video_path)
+    try:
+        samples = decode_audio(video_path)
+    except RuntimeError as e:
+        print(f"Skipping audio: {e}")
+        samples = None
 
-    if video_clip.audio is None:
+    if samples is None:
         print("No audio detected in video.")
-        update_json_file({"transcription": ""})  # Save empty transcription
-        video_clip.close()  # Close video to avoid subprocess issues
-        return False
+        update_json_file({"transcription": ""}, json_file)  # Save empty transcription
+        return None
 
-    audio_clip = video_clip.audio
-    audio_clip.write_audiofile(audio_path, codec="mp3", verbose=False)
-
-    # Proper cleanup
-    audio_clip.close()
-    video_clip.close()
-    del video_clip  # Force cleanup
+    if audio_path:
+        write_mp3(video_path, audio_path)
+        print(f"Audio written to {audio_path}")
 
     print("Audio extraction successful!")
-    return True
+    return samples
 
 
-def transcribe_audio_with_whisper(audio_path):
-    """Transcribe audio using Whisper and save results to JSON."""
-    if not os.path.exists(audio_path):
-        print(f"Error: {audio_path} not found!")
+def transcribe_audio_with_whisper(audio, json_file=JSON_FILE, model_name=DEFAULT_WHISPER_MODEL):
+    """Transcribe audio samples (or an audio file path) using Whisper and save results to JSON."""
+    if audio is None:
+        return
+    if isinstance(audio, str) and not os.path.exists(audio):
+        print(f"Error: {audio} not found!")
         return
 
-    model = whisper.load_model("tiny")
-    result = model.transcribe(audio_path, language="en", verbose=False)
+    # Reuses the process-wide model; only the first call pays for loading it
+    transcription = transcribe_samples(audio, model_name)
 
     # Save transcription to JSON
-    update_json_file({"transcription": result["text"]})
+    update_json_file({"transcription": transcription}, json_file)
 
     print("Transcription saved to JSON.")
 
 
-def update_json_file(new_data):
-    """Update JSON file while ensuring only 'transcription' and 'extracted_text' exist."""
-    allowed_keys = {"transcription", "extracted_text"}
+def update_json_file(new_data, json_file=JSON_FILE):
+    """Update JSON file while ensuring only 'transcription', 'extracted_text' and 'caption_timeline' exist."""
+    allowed_keys = {"transcription", "extracted_text", "caption_timeline"}
 
-    if os.path.exists(JSON_FILE):
-        with open(JSON_FILE, "r", encoding="utf-8") as f:
+    if os.path.exists(json_file):
+        with open(json_file, "r", encoding="utf-8") as f:
             data = json.load(f)
     else:
         data = {}
@@ -142,17 +126,31 @@ def update_json_file(new_data):
     # Only keep allowed keys
     data.update({k: v for k, v in new_data.items() if k in allowed_keys})
 
-    with open(JSON_FILE, "w", encoding="utf-8") as f:
+    with open(json_file, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=4)
 
     print("Updated JSON file.")
 
 
 if __name__ == "__main__":
-    if extract_frames_from_video(VIDEO_FILE):
-        extract_text_from_frames()
-
-    if extract_audio_from_video(VIDEO_FILE, AUDIO_FILE):
-        transcribe_audio_with_whisper(AUDIO_FILE)
+    parser = argparse.ArgumentParser(description="Extract OCR text and a transcription from a video into JSON")
+    parser.add_argument("video", nargs="?", default=VIDEO_FILE, help=f"Video to process (default: {VIDEO_FILE})")
+    parser.add_argument("--output", default=JSON_FILE, help=f"JSON file to write (default: {JSON_FILE})")
+    parser.add_argument("--audio-output", help="Also save the soundtrack as an MP3 at this path")
+    parser.add_argument("--debug-frames", action="store_true", help="Keep the job workspace and write sampled frames into it as PNGs")
+    args = parser.parse_args()
+
+    # Optional debug frames live in a private workspace, so concurrent runs on
+    # the same host don't clobber each other
+    with JobWorkspace(keep=args.debug_frames) as workspace:
+        frames = extract_frames_from_video(args.video, debug_dir=workspace.frames_dir if args.debug_frames else None)
+        if frames is not None:
+            # OCR and transcription don't depend on each other, so run them concurrently
+            payload, _ = run_extraction_pipeline(args.video, frames, audio_path=args.audio_output)
+            update_json_file(payload, args.output)
+            print(f"Results written to {args.output}")
+
+        if args.debug_frames:
+            print(f"Debug frames kept in {workspace.frames_dir}")
 
     print("Processing completed!")
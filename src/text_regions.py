@@ -0,0 +1,96 @@
+import cv2
+import numpy as np
+
+# Detection runs on a downscaled copy of the frame; boxes are mapped back to full size
+DETECT_WIDTH = 540
+# Minimum share of a candidate box covered by closed gradient blobs for it to look like text
+MIN_FILL_RATIO = 0.5
+# If candidate boxes cover more than this share of the frame, region cropping
+# won't save anything, so the whole frame is OCR'd instead
+MAX_COVERAGE = 0.6
+# Padding (in full-resolution pixels) around each crop and between stacked crops
+REGION_PADDING = 8
+
+
+def detect_text_regions(image):
+    """
+    Find candidate text boxes in a BGR frame using a morphological gradient.
+
+    Character strokes produce dense, high-gradient blobs that merge into
+    horizontal bands when closed with a wide kernel; faces and smooth
+    backgrounds do not.
+
+    Args:
+        image (numpy.ndarray): BGR frame
+
+    Returns:
+        list: (x, y, w, h) boxes in full-resolution pixel coordinates, top to bottom
+    """
+    height, width = image.shape[:2]
+    scale = min(1.0, DETECT_WIDTH / width)
+    small = cv2.resize(image, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA) if scale < 1.0 else image
+
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+    _, binary = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    connected = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (25, 5)))
+
+    contours, _ = cv2.findContours(connected, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if w < 20 or h < 6 or h > small.shape[0] // 8 or w < h:
+            continue  # Too small to read, too tall to be a text line, or not line-shaped
+        if cv2.countNonZero(connected[y:y + h, x:x + w]) / float(w * h) < MIN_FILL_RATIO:
+            continue
+
+        pad = REGION_PADDING * scale
+        x0, y0 = max(0, int((x - pad) / scale)), max(0, int((y - pad) / scale))
+        x1, y1 = min(width, int((x + w + pad) / scale)), min(height, int((y + h + pad) / scale))
+        boxes.append((x0, y0, x1 - x0, y1 - y0))
+
+    boxes.sort(key=lambda box: (box[1], box[0]))
+    return boxes
+
+
+def stack_regions(image, boxes):
+    """
+    Stack cropped regions vertically on a white canvas so one OCR call reads them all.
+
+    Args:
+        image (numpy.ndarray): Frame to crop from (any channel order)
+        boxes (list): (x, y, w, h) boxes from detect_text_regions
+
+    Returns:
+        numpy.ndarray: A single image containing every crop, top to bottom
+    """
+    canvas_width = max(w for _, _, w, _ in boxes) + 2 * REGION_PADDING
+    canvas_height = sum(h for _, _, _, h in boxes) + REGION_PADDING * (len(boxes) + 1)
+    canvas = np.full((canvas_height, canvas_width) + image.shape[2:], 255, dtype=image.dtype)
+
+    top = REGION_PADDING
+    for x, y, w, h in boxes:
+        canvas[top:top + h, REGION_PADDING:REGION_PADDING + w] = image[y:y + h, x:x + w]
+        top += h + REGION_PADDING
+
+    return canvas
+
+
+def crop_to_text_regions(image):
+    """
+    Reduce a frame to just its text-bearing regions.
+
+    Returns:
+        numpy.ndarray or None: Stacked crops, the original image when regions
+        cover most of the frame, or None when no text-like region was found
+    """
+    boxes = detect_text_regions(image)
+    if not boxes:
+        return None
+
+    height, width = image.shape[:2]
+    if sum(w * h for _, _, w, h in boxes) > MAX_COVERAGE * width * height:
+        return image
+
+    return stack_regions(image, boxes)
@@ -0,0 +1,46 @@
+import re
+
+# Llama 3 averages roughly four characters per token on English text
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """
+    Cheaply estimate how many tokens a text costs, without loading a tokenizer.
+
+    Takes the larger of a character-based and a word-based estimate, so both
+    long words and punctuation-heavy OCR output are counted conservatively.
+    """
+    if not text:
+        return 0
+    by_chars = len(text) / CHARS_PER_TOKEN
+    by_words = len(re.findall(r"\w+|[^\w\s]", text)) * 0.75
+    return int(max(by_chars, by_words)) + 1
+
+
+def pack_batches(texts, token_budget, max_items):
+    """
+    Greedily group texts, in order, into batches that fit a token budget.
+
+    Args:
+        texts (list of str): Texts to pack
+        token_budget (int): Maximum estimated tokens of text per batch
+        max_items (int): Maximum number of texts per batch
+
+    Returns:
+        list: Batches as lists of indices into `texts`. A text larger than the
+            budget on its own gets a batch to itself.
+    """
+    batches, current, current_tokens = [], [], 0
+
+    for index, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+    return batches
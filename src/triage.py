@@ -0,0 +1,137 @@
+import re
+import math
+
+# Phrases that usually introduce a checkable factual claim, with their weights
+CLAIM_CUES = {
+    r"\b(stud(y|ies)|research(ers)?|scientists?|experts?|doctors?|according to|survey|data shows?)\b": 2.0,
+    r"\b(proven|proof|fact|facts|evidence|confirmed|revealed?|exposed?|debunked)\b": 1.5,
+    r"\b(cures?d?|heals?|treats?|prevents?|causes?d?|kills?|reverses?|boosts?|detox\w*)\b": 1.5,
+    r"\b(cancer|diabetes|vaccines?|covid|virus|autism|disease|immune|medicine|drugs?|pharma\w*)\b": 1.5,
+    r"\b(government|election|fraud|president|congress|war|banned|censored|cover[- ]?up|illuminati|5g|chemtrails?)\b": 1.5,
+    r"\b(they don'?t want you to know|wake up|mainstream media|hidden truth|secret|big pharma|hoax|scam|miracle)\b": 2.5,
+    r"\b(always|never|everyone|nobody|100%|guaranteed)\b": 0.5,
+}
+
+# Phrases typical of lifestyle and entertainment clips with nothing to fact-check
+BENIGN_CUES = {
+    r"\b(recipe|ingredients?|tbsp|tsp|teaspoons?|tablespoons?|cups? of|bake|oven|preheat|stir|whisk|delicious|yummy)\b": 1.0,
+    r"\b(dance|dancing|choreo\w*|song|music|beat|remix|outfit|ootd|makeup|tutorial|vlog|prank|challenge)\b": 1.0,
+    r"\b(follow for more|like and subscribe|link in bio|comment below|tag a friend|giveaway)\b": 1.0,
+}
+
+# Numbers with a unit, percentage or magnitude tend to be statistical claims
+STATISTIC_PATTERN = r"\b\d[\d,.]*\s*(%|percent|per ?cent|times|x\b|million|billion|thousand|people|deaths|cases|years?)"
+
+# Documents scoring at or above this go to the LLM (one health claim such as
+# "X cures diabetes" in a 100-word transcript scores 3)
+DEFAULT_THRESHOLD = 2.0
+
+
+class ClaimTriage:
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        """
+        Cheap local pre-filter that decides whether a text needs the LLM at all.
+
+        Texts with no claim cues (cooking clips, dance reels, ...) are skipped;
+        anything plausibly claim-bearing is routed to the detector. The filter
+        is deliberately biased towards routing: a skipped text is never checked.
+
+        Args:
+            threshold (float): Minimum claim score (see score()) for a text to be
+                sent to the LLM
+        """
+        self.threshold = threshold
+        self.claim_cues = [(re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in CLAIM_CUES.items()]
+        self.benign_cues = [(re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in BENIGN_CUES.items()]
+        self.statistic_pattern = re.compile(STATISTIC_PATTERN, re.IGNORECASE)
+
+        self.routed = 0
+        self.skipped = 0
+
+    def score(self, text):
+        """
+        Claim score of a text: weighted claim cues less benign cues, per ~100 words.
+
+        Normalizing by the square root of the length (with a 20-word floor)
+        keeps a few cues in a long transcript from being diluted away, while
+        one cue in a three-word caption doesn't dominate.
+        """
+        words = len(text.split())
+        if words == 0:
+            return 0.0
+
+        claim_points = sum(weight * len(pattern.findall(text)) for pattern, weight in self.claim_cues)
+        claim_points += 1.5 * len(self.statistic_pattern.findall(text))
+        benign_points = sum(weight * len(pattern.findall(text)) for pattern, weight in self.benign_cues)
+
+        # Benign cues can cancel at most half of the claim evidence
+        points = max(claim_points - benign_points, claim_points / 2)
+        return points / math.sqrt(max(words, 20) / 100)
+
+    def needs_llm(self, text):
+        """
+        Decide whether a text should be analyzed by the LLM.
+
+        Returns:
+            tuple: (True if the text should be routed to the LLM, claim score)
+        """
+        score = self.score(text)
+        routed = score >= self.threshold
+        if routed:
+            self.routed += 1
+        else:
+            self.skipped += 1
+        return routed, score
+
+    def skipped_result(self, score, include_claims=False):
+        """The analysis result returned in place of an LLM verdict for a skipped text."""
+        result = {
+            "contains_misinformation": False,
+            "confidence_score": 0.5,
+            "detected_criteria": [],
+            "explanation": f"Skipped by local triage: no checkable factual claims detected (claim score {score:.2f}).",
+            "prompt_for_context": False,
+            "triage": {"skipped": True, "score": round(score, 3), "threshold": self.threshold}
+        }
+        if include_claims:
+            result["main_claim"] = ""
+            result["claims"] = []
+        return result
+
+    def summary(self):
+        """One-line report of how many texts were routed and skipped."""
+        total = self.routed + self.skipped
+        rate = self.skipped / total if total else 0.0
+        return f"Triage: {self.routed} routed to the LLM, {self.skipped} skipped ({rate:.0%} of {total})"
+
+
+def triage_report(scores, labels, thresholds):
+    """
+    Precision and recall of the triage against LLM verdicts, for several thresholds.
+
+    A positive is a text the LLM flagged as misinformation. Recall is the share
+    of positives the triage still routes to the LLM (missed ones are never
+    checked); precision is the share of routed texts that were positive.
+
+    Args:
+        scores (list of float): ClaimTriage.score() of each text
+        labels (list of bool): LLM 'contains_misinformation' verdict of each text
+        thresholds (iterable of float): Thresholds to evaluate
+
+    Returns:
+        list: Dicts with threshold, routed, skipped, precision, recall and skip_rate
+    """
+    positives = sum(1 for label in labels if label)
+    rows = []
+    for threshold in thresholds:
+        routed = [label for score, label in zip(scores, labels) if score >= threshold]
+        true_positives = sum(1 for label in routed if label)
+        rows.append({
+            "threshold": threshold,
+            "routed": len(routed),
+            "skipped": len(labels) - len(routed),
+            "precision": true_positives / len(routed) if routed else 0.0,
+            "recall": true_positives / positives if positives else 1.0,
+            "skip_rate": (len(labels) - len(routed)) / len(labels) if labels else 0.0
+        })
+    return rows
@@ -1,37 +1,77 @@
 import os
-import json
-import requests
+import asyncio
 from datetime import datetime
-from groq import Groq
+from llm_backend import create_backend
+from rate_limiter import rate_limiter
+from response_cache import ResponseCache, make_cache_key
+from clients import clients, requests_timeout, httpx_timeout
+from json_stream import IncrementalJSONParser
+from json_extract import extract_json
+from structured_output import EVALUATION_SCHEMA, CONTEXT_SCHEMA, complete_json, acomplete_json, repair
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Read timeout for SerpAPI requests, in seconds
+SEARCH_TIMEOUT = 30.0
+
+# Bump whenever the stored search result format or the key normalization changes
+SEARCH_CACHE_VERSION = "serpapi-v2"
+
+# Search results are kept for a week; failed searches only briefly, so a
+# flaky network or quota error isn't retried on every repost but clears soon
+SEARCH_CACHE_TTL = 7 * 24 * 3600
+SEARCH_ERROR_TTL = 300
+SEARCH_CACHE_SIZE = 5000
+
+
+def normalize_query(query):
+    """
+    Lowercase a query and collapse its whitespace, so reposts that differ only in case or spacing match.
+
+    Punctuation is kept: search operators such as -term, "exact phrase" and
+    site: change the results, so queries using them must not share an entry.
+    """
+    return " ".join(query.lower().split())
+
+
 class WebContextAgent:
-    def __init__(self, api_key=None, search_api_key=None):
+    def __init__(self, api_key=None, search_api_key=None, backend=None, search_cache=None):
         """
         Initialize the Web Context Agent with necessary API keys.
         
         Args:
-            api_key (str, optional): Groq API key for LLM access
+            api_key (str, optional): Groq API key, for the default Groq backend
             search_api_key (str, optional): SerpAPI key for web search
+            backend (LLMBackend, optional): Where completions are sent. Defaults to
+                create_backend(), i.e. $DEEPCONTEXT_LLM_BACKEND or Groq.
+            search_cache (ResponseCache or bool, optional): Cache for search_web
+                results. Defaults to a persistent on-disk cache sized by
+                $DEEPCONTEXT_SEARCH_CACHE_SIZE, with $DEEPCONTEXT_SEARCH_CACHE_TTL for
+                results and $DEEPCONTEXT_SEARCH_ERROR_TTL for failures (in seconds);
+                pass False to disable.
         """
-        # Initialize Groq API for LLM access
-        self.groq_api_key = os.getenv("GROQ_API_KEY")
-        if not self.groq_api_key:
-            raise ValueError("Groq API key not provided and not found in environment variables")
+        # Initialize the LLM backend (Groq unless configured otherwise)
+        self.backend = backend or create_backend(groq_api_key=api_key)
         
         # Initialize search API
         self.search_api_key = os.getenv("SERPAPI_KEY")
         if not self.search_api_key:
             raise ValueError("Search API key not provided and not found in environment variables")
         
-        # Initialize Groq client
-        self.client = Groq(api_key=self.groq_api_key)
-        
         # Default LLM model
-        self.model = "llama3-70b-8192"
+        self.model = self.backend.default_model
+        
+        # Reposts of the same claim reuse one search
+        if search_cache is None:
+            search_cache = ResponseCache(
+                "search",
+                max_entries=int(os.getenv("DEEPCONTEXT_SEARCH_CACHE_SIZE", SEARCH_CACHE_SIZE)),
+                ttl_seconds=float(os.getenv("DEEPCONTEXT_SEARCH_CACHE_TTL", SEARCH_CACHE_TTL))
+            )
+        self.search_cache = search_cache or None
+        self.search_error_ttl = float(os.getenv("DEEPCONTEXT_SEARCH_ERROR_TTL", SEARCH_ERROR_TTL))
         
         # List of known reliable source domains for preferential ranking
         self.reliable_sources = [
@@ -60,11 +100,67 @@ class WebContextAgent:
             # Research institutions
             "rand.org", "brookings.edu", "pewresearch.org", "worldbank.org", "imf.org"
         ]
+
+    async def aclose(self):
+        """Close the shared async HTTP clients and the backend's async connections."""
+        await clients.aclose()
+        await self.backend.aclose()
     
+    def _build_search_url(self, query, num_results):
+        """Build the SerpAPI request URL for a query."""
+        from urllib.parse import quote_plus
+        encoded_query = quote_plus(query)
+        return f"https://serpapi.com/search.json?engine=google&q={encoded_query}&api_key={self.search_api_key}&num={num_results*2}"  # Request more to filter
+
+    def _parse_search_results(self, data, num_results):
+        """
+        Turn a SerpAPI response into ranked results.
+
+        Returns:
+            list or dict: Search results, or {"error": ...} if the API reported one
+        """
+        if "error" in data:
+            return {"error": data["error"]}
+        
+        # Extract organic search results
+        results = []
+        if "organic_results" in data:
+            for result in data["organic_results"]:
+                # Extract domain from link
+                domain = result.get("domain", "")
+                
+                results.append({
+                    "title": result.get("title", ""),
+                    "snippet": result.get("snippet", ""),
+                    "source": domain,
+                    "link": result.get("link", ""),
+                    "is_reliable": any(source in domain for source in self.reliable_sources),
+                    "position": result.get("position", 999)
+                })
+        
+        # Sort results to prioritize reliable sources
+        results.sort(key=lambda x: (not x["is_reliable"], x["position"]))
+        
+        # Return the requested number of results
+        return results[:num_results]
+    
+    def _search_cache_key(self, query, num_results):
+        return make_cache_key(SEARCH_CACHE_VERSION, normalize_query(query), num_results)
+
+    def _cache_search_result(self, cache_key, result):
+        """Store a search result; errors get the short negative-cache TTL."""
+        if self.search_cache:
+            is_error = isinstance(result, dict) and "error" in result
+            self.search_cache.set(cache_key, result, self.search_error_ttl if is_error else None)
+        return result
+
     def search_web(self, query, num_results=5):
         """
         Search the web for information related to a query.
         
+        Results (and, briefly, failures) are cached by normalized query and
+        num_results, so a claim that keeps being reposted is searched once.
+        
         Args:
             query (str): The search query
             num_results (int): Number of results to return
@@ -72,57 +168,48 @@ class WebContextAgent:
         Returns:
             list: Search results with title, snippet, source, and link
         """
-        # Prepare search query
-        from urllib.parse import quote_plus
-        encoded_query = quote_plus(query)
-        search_url = f"https://serpapi.com/search.json?engine=google&q={encoded_query}&api_key={self.search_api_key}&num={num_results*2}"  # Request more to filter
+        cache_key = self._search_cache_key(query, num_results)
+        if self.search_cache:
+            cached_result = self.search_cache.get(cache_key)
+            if cached_result is not None:
+                return cached_result
+        
+        search_url = self._build_search_url(query, num_results)
         
         try:
-            # Make request to search API
-            response = requests.get(search_url)
-            data = response.json()
-            
-            if "error" in data:
-                return {"error": data["error"]}
-            
-            # Extract organic search results
-            results = []
-            if "organic_results" in data:
-                for result in data["organic_results"]:
-                    # Extract domain from link
-                    domain = result.get("domain", "")
-                    
-                    results.append({
-                        "title": result.get("title", ""),
-                        "snippet": result.get("snippet", ""),
-                        "source": domain,
-                        "link": result.get("link", ""),
-                        "is_reliable": any(source in domain for source in self.reliable_sources),
-                        "position": result.get("position", 999)
-                    })
-            
-            # Sort results to prioritize reliable sources
-            results.sort(key=lambda x: (not x["is_reliable"], x["position"]))
-            
-            # Return the requested number of results
-            return results[:num_results]
+            # Wait for SerpAPI quota rather than failing, then make request to search API
+            rate_limiter.acquire("serpapi")
+            response = clients.session().get(search_url, timeout=requests_timeout(SEARCH_TIMEOUT))
+            result = self._parse_search_results(response.json(), num_results)
             
         except Exception as e:
-            return {"error": f"Search failed: {str(e)}"}
-    
-    def evaluate_sources(self, search_results):
-        """
-        Evaluate the reliability and relevance of search results.
-        
-        Args:
-            search_results (list): List of search results to evaluate
-            
-        Returns:
-            list: Same results with reliability ratings added
-        """
-        if not search_results or "error" in search_results:
-            return search_results
+            result = {"error": f"Search failed: {str(e)}"}
         
+        return self._cache_search_result(cache_key, result)
+
+    async def asearch_web(self, query, num_results=5):
+        """Async counterpart of search_web, on the shared httpx.AsyncClient."""
+        cache_key = self._search_cache_key(query, num_results)
+        if self.search_cache:
+            # SQLite calls block, so they run off the event loop
+            cached_result = await asyncio.to_thread(self.search_cache.get, cache_key)
+            if cached_result is not None:
+                return cached_result
+
+        search_url = self._build_search_url(query, num_results)
+
+        try:
+            await rate_limiter.aacquire("serpapi")
+            response = await clients.async_http().get(search_url, timeout=httpx_timeout(SEARCH_TIMEOUT))
+            result = self._parse_search_results(response.json(), num_results)
+
+        except Exception as e:
+            result = {"error": f"Search failed: {str(e)}"}
+
+        return await asyncio.to_thread(self._cache_search_result, cache_key, result)
+    
+    def _build_evaluation_messages(self, search_results):
+        """Build the chat messages for a source evaluation request."""
         # Prepare input for LLM evaluation
         sources_text = ""
         for i, result in enumerate(search_results):
@@ -168,82 +255,88 @@ class WebContextAgent:
         
         Provide only the JSON response with your evaluations.
         """
+
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+
+    def _apply_evaluations(self, search_results, response_text):
+        """Parse the evaluation response and attach scores to the search results."""
+        try:
+            evaluations = extract_json(response_text)
+            if evaluations is None:
+                raise ValueError("no JSON object in the evaluation response")
+            
+            # Add evaluations to search results
+            if "evaluations" in evaluations:
+                for i, eval_data in enumerate(evaluations["evaluations"]):
+                    if i < len(search_results):
+                        search_results[i]["reliability_score"] = eval_data.get("reliability_score", 5)
+                        search_results[i]["evaluation_reasoning"] = eval_data.get("reasoning", "")
+                        search_results[i]["potential_bias"] = eval_data.get("potential_bias", "")
+        
+        except (ValueError, KeyError, IndexError) as e:
+            # If parsing fails, add default evaluations
+            for result in search_results:
+                result["reliability_score"] = 5  # Default middle score
+                result["evaluation_reasoning"] = "Automatic evaluation based on source domain"
+                result["potential_bias"] = "Unknown - evaluation failed"
+        
+        return search_results
+    
+    def evaluate_sources(self, search_results):
+        """
+        Evaluate the reliability and relevance of search results.
+        
+        Args:
+            search_results (list): List of search results to evaluate
+            
+        Returns:
+            list: Same results with reliability ratings added
+        """
+        if not search_results or "error" in search_results:
+            return search_results
         
         try:
             # Get LLM evaluation
-            response = self.client.chat.completions.create(
+            response_text = complete_json(
+                self.backend,
+                self._build_evaluation_messages(search_results),
+                EVALUATION_SCHEMA,
+                "source evaluation",
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
                 temperature=0.2
             )
             
-            # Extract and parse response
-            response_text = response.choices[0].message.content
-            
-            # Extract JSON from response
-            try:
-                # Try to find JSON in code blocks first
-                if "```json" in response_text and "```" in response_text.split("```json")[1]:
-                    json_str = response_text.split("```json")[1].split("```")[0].strip()
-                    evaluations = json.loads(json_str)
-                elif "```" in response_text:
-                    # Look for JSON in any code block
-                    json_str = response_text.split("```")[1].strip()
-                    evaluations = json.loads(json_str)
-                else:
-                    # Try to parse the whole response
-                    evaluations = json.loads(response_text)
-                
-                # Add evaluations to search results
-                if "evaluations" in evaluations:
-                    for i, eval_data in enumerate(evaluations["evaluations"]):
-                        if i < len(search_results):
-                            search_results[i]["reliability_score"] = eval_data.get("reliability_score", 5)
-                            search_results[i]["evaluation_reasoning"] = eval_data.get("reasoning", "")
-                            search_results[i]["potential_bias"] = eval_data.get("potential_bias", "")
-            
-            except (json.JSONDecodeError, KeyError, IndexError) as e:
-                # If parsing fails, add default evaluations
-                for result in search_results:
-                    result["reliability_score"] = 5  # Default middle score
-                    result["evaluation_reasoning"] = "Automatic evaluation based on source domain"
-                    result["potential_bias"] = "Unknown - evaluation failed"
-            
-            return search_results
+            return self._apply_evaluations(search_results, response_text)
             
         except Exception as e:
             # If evaluation fails, return original results
             return search_results
+
+    async def aevaluate_sources(self, search_results):
+        """Async counterpart of evaluate_sources."""
+        if not search_results or "error" in search_results:
+            return search_results
+
+        try:
+            response_text = await acomplete_json(
+                self.backend,
+                self._build_evaluation_messages(search_results),
+                EVALUATION_SCHEMA,
+                "source evaluation",
+                model=self.model,
+                temperature=0.2
+            )
+
+            return self._apply_evaluations(search_results, response_text)
+
+        except Exception as e:
+            return search_results
     
-    def fetch_context(self, claim, search_results=None):
-        """
-        Fetch and synthesize context from multiple sources for a claim.
-        
-        Args:
-            claim (str): The claim to investigate
-            search_results (list, optional): Pre-fetched search results
-            
-        Returns:
-            dict: Synthesized context with sources and balanced perspective
-        """
-        # If search results not provided, search the web
-        if not search_results:
-            search_results = self.search_web(claim)
-        
-        # If search failed, return error
-        if isinstance(search_results, dict) and "error" in search_results:
-            return {
-                "error": search_results["error"],
-                "context": "Could not retrieve context due to search error."
-            }
-        
-        # Evaluate sources if not already evaluated
-        if search_results and "reliability_score" not in search_results[0]:
-            search_results = self.evaluate_sources(search_results)
-        
+    def _build_context_messages(self, claim, search_results):
+        """Build the chat messages for a context synthesis request."""
         # Prepare source information for the LLM
         sources_info = ""
         for i, result in enumerate(search_results):
@@ -313,75 +406,177 @@ class WebContextAgent:
         Synthesize information from these sources to provide balanced context. 
         Return only the JSON response with the context information.
         """
+
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+
+    def _source_list(self, search_results, include_scores=False):
+        """Numbered source entries for the context result."""
+        sources = []
+        for i, result in enumerate(search_results or []):
+            source = {
+                "number": i+1,
+                "title": result["title"],
+                "link": result["link"]
+            }
+            if include_scores:
+                source["reliability_score"] = result.get("reliability_score", "Not evaluated")
+            sources.append(source)
+        return sources
+
+    def _parse_context_response(self, response_text, search_results):
+        """Parse the context synthesis response and attach sources and a timestamp."""
+        try:
+            context_data = extract_json(response_text)
+            if context_data is None:
+                raise ValueError("no JSON object in the response")
+            
+            # Add source information to the context data
+            context_data["sources"] = self._source_list(search_results, include_scores=True)
+            
+            # Add timestamp
+            context_data["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            
+            return context_data
+            
+        except (ValueError, KeyError) as e:
+            # If parsing fails, create a simple context response
+            return {
+                "error": f"Failed to parse context synthesis: {str(e)}",
+                "raw_response": response_text[:500] + "..." if len(response_text) > 500 else response_text,
+                "sources": self._source_list(search_results)
+            }
+    
+    def fetch_context(self, claim, search_results=None):
+        """
+        Fetch and synthesize context from multiple sources for a claim.
+        
+        Args:
+            claim (str): The claim to investigate
+            search_results (list, optional): Pre-fetched search results
+            
+        Returns:
+            dict: Synthesized context with sources and balanced perspective
+        """
+        # If search results not provided, search the web
+        if not search_results:
+            search_results = self.search_web(claim)
+        
+        # If search failed, return error
+        if isinstance(search_results, dict) and "error" in search_results:
+            return {
+                "error": search_results["error"],
+                "context": "Could not retrieve context due to search error."
+            }
+        
+        # Evaluate sources if not already evaluated
+        if search_results and "reliability_score" not in search_results[0]:
+            search_results = self.evaluate_sources(search_results)
         
         try:
             # Get context synthesis from LLM
-            response = self.client.chat.completions.create(
+            response_text = complete_json(
+                self.backend,
+                self._build_context_messages(claim, search_results),
+                CONTEXT_SCHEMA,
+                "context",
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
                 temperature=0.3,
                 max_tokens=2500
             )
             
-            # Extract and parse response
-            response_text = response.choices[0].message.content
-            
-            # Extract JSON from response
-            try:
-                # Try to find JSON in code blocks first
-                if "```json" in response_text and "```" in response_text.split("```json")[1]:
-                    json_str = response_text.split("```json")[1].split("```")[0].strip()
-                    context_data = json.loads(json_str)
-                elif "```" in response_text:
-                    # Look for JSON in any code block
-                    json_str = response_text.split("```")[1].strip()
-                    context_data = json.loads(json_str)
-                else:
-                    # Try to parse the whole response
-                    context_data = json.loads(response_text)
-                
-                # Add source information to the context data
-                context_data["sources"] = [
-                    {
-                        "number": i+1,
-                        "title": result["title"],
-                        "link": result["link"],
-                        "reliability_score": result.get("reliability_score", "Not evaluated")
-                    } for i, result in enumerate(search_results)
-                ]
-                
-                # Add timestamp
-                context_data["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                
-                return context_data
-                
-            except (json.JSONDecodeError, KeyError) as e:
-                # If parsing fails, create a simple context response
-                return {
-                    "error": f"Failed to parse context synthesis: {str(e)}",
-                    "raw_response": response_text[:500] + "..." if len(response_text) > 500 else response_text,
-                    "sources": [
-                        {
-                            "number": i+1,
-                            "title": result["title"],
-                            "link": result["link"]
-                        } for i, result in enumerate(search_results)
-                    ]
-                }
+            return self._parse_context_response(response_text, search_results)
                 
         except Exception as e:
             return {
                 "error": f"Context synthesis failed: {str(e)}",
-                "sources": [
-                    {
-                        "number": i+1,
-                        "title": result["title"],
-                        "link": result["link"]
-                    } for i, result in enumerate(search_results)
-                ] if search_results else []
+                "sources": self._source_list(search_results)
+            }
+
+    def fetch_context_stream(self, claim, search_results=None):
+        """
+        Streaming counterpart of fetch_context.
+
+        Search and source evaluation run as usual; the synthesis is streamed
+        and its fields (e.g. 'context_summary', then 'perspectives') are yielded
+        as soon as each one is complete.
+
+        Args:
+            claim (str): The claim to investigate
+            search_results (list, optional): Pre-fetched search results
+
+        Yields:
+            tuple: (field name, raw value) for each top-level field as it completes,
+                then ("result", context dict as returned by fetch_context)
+        """
+        if not search_results:
+            search_results = self.search_web(claim)
+
+        if isinstance(search_results, dict) and "error" in search_results:
+            yield "result", {
+                "error": search_results["error"],
+                "context": "Could not retrieve context due to search error."
+            }
+            return
+
+        if search_results and "reliability_score" not in search_results[0]:
+            search_results = self.evaluate_sources(search_results)
+
+        parser = IncrementalJSONParser()
+        try:
+            for delta in self.backend.stream(
+                self._build_context_messages(claim, search_results),
+                model=self.model,
+                temperature=0.3,
+                max_tokens=2500
+            ):
+                yield from parser.feed(delta)
+
+            # JSON mode isn't available while streaming, so validation and repair happen at the end
+            response_text = repair(self.backend, parser.buffer, CONTEXT_SCHEMA, "context", self.model, 2500)
+            context_data = self._parse_context_response(response_text, search_results)
+
+        except Exception as e:
+            context_data = {
+                "error": f"Context synthesis failed: {str(e)}",
+                "sources": self._source_list(search_results)
+            }
+
+        yield "result", context_data
+
+    async def afetch_context(self, claim, search_results=None):
+        """Async counterpart of fetch_context: search, evaluate and synthesize without blocking the loop."""
+        if not search_results:
+            search_results = await self.asearch_web(claim)
+
+        if isinstance(search_results, dict) and "error" in search_results:
+            return {
+                "error": search_results["error"],
+                "context": "Could not retrieve context due to search error."
+            }
+
+        if search_results and "reliability_score" not in search_results[0]:
+            search_results = await self.aevaluate_sources(search_results)
+
+        try:
+            response_text = await acomplete_json(
+                self.backend,
+                self._build_context_messages(claim, search_results),
+                CONTEXT_SCHEMA,
+                "context",
+                model=self.model,
+                temperature=0.3,
+                max_tokens=2500
+            )
+
+            return self._parse_context_response(response_text, search_results)
+
+        except Exception as e:
+            return {
+                "error": f"Context synthesis failed: {str(e)}",
+                "sources": self._source_list(search_results)
             }
     
     def format_context_for_display(self, context_data):
@@ -492,4 +687,20 @@ class WebContextAgent:
         # Return formatted or raw data
         if format_output:
             return self.format_context_for_display(context_data)
-        return context_data
\ No newline at end of file
+        return context_data
+
+    async def aanalyze_claim(self, claim, format_output=True):
+        """Async counterpart of analyze_claim."""
+        search_results = await self.asearch_web(claim)
+
+        if isinstance(search_results, dict) and "error" in search_results:
+            if format_output:
+                return f"Error searching for context: {search_results['error']}"
+            return {"error": search_results["error"]}
+
+        evaluated_results = await self.aevaluate_sources(search_results)
+        context_data = await self.afetch_context(claim, evaluated_results)
+
+        if format_output:
+            return self.format_context_for_display(context_data)
+        return context_data
@@ -0,0 +1,109 @@
+import time
+import threading
+import numpy as np
+import torch
+import whisper
+
+DEFAULT_WHISPER_MODEL = "tiny"
+
+
+class WhisperModelRegistry:
+    def __init__(self):
+        """
+        Process-wide cache of loaded Whisper models, keyed by (model name, device).
+
+        Models are loaded lazily on first use and then reused by every later
+        transcription, instead of being reloaded on each call.
+        """
+        self._models = {}
+        self._lock = threading.Lock()
+
+        # Cumulative timing, split into one-off model loads and per-call inference
+        self.stats = {
+            "loads": 0,
+            "load_seconds": 0.0,
+            "transcriptions": 0,
+            "inference_seconds": 0.0
+        }
+
+    @staticmethod
+    def _resolve_device(device=None):
+        """Pick the device Whisper would choose on its own when none is given."""
+        if device:
+            return device
+        return "cuda" if torch.cuda.is_available() else "cpu"
+
+    def get(self, name=DEFAULT_WHISPER_MODEL, device=None):
+        """
+        Return the loaded model for (name, device), loading it on first use.
+
+        Returns:
+            tuple: (model, load_seconds) where load_seconds is 0.0 on a cache hit
+        """
+        key = (name, self._resolve_device(device))
+
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                return model, 0.0
+
+            start = time.perf_counter()
+            model = whisper.load_model(name, device=key[1])
+            load_seconds = time.perf_counter() - start
+
+            self._models[key] = model
+            self.stats["loads"] += 1
+            self.stats["load_seconds"] += load_seconds
+            print(f"Loaded Whisper model '{name}' on {key[1]} in {load_seconds:.2f}s")
+
+        return model, load_seconds
+
+    def warm_up(self, name=DEFAULT_WHISPER_MODEL, device=None):
+        """Load a model ahead of time and run it once on a second of silence."""
+        model, _ = self.get(name, device)
+        model.transcribe(np.zeros(whisper.audio.SAMPLE_RATE, dtype=np.float32), language="en", verbose=None)
+
+    def unload(self, name=None, device=None):
+        """
+        Drop cached models so their memory can be reclaimed.
+
+        Args:
+            name (str, optional): Model to drop. Drops every model when omitted.
+            device (str, optional): Restrict to one device
+        """
+        with self._lock:
+            for key in list(self._models):
+                if (name is None or key[0] == name) and (device is None or key[1] == device):
+                    del self._models[key]
+
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def transcribe(self, audio, name=DEFAULT_WHISPER_MODEL, device=None, **kwargs):
+        """
+        Transcribe audio with a cached model.
+
+        Args:
+            audio (str or numpy.ndarray): Audio file path or 16 kHz mono float32 samples
+            name (str): Whisper model name
+            device (str, optional): Torch device; auto-selected when omitted
+            **kwargs: Passed through to model.transcribe
+
+        Returns:
+            tuple: (Whisper result dict, timing dict with load_seconds and inference_seconds)
+        """
+        model, load_seconds = self.get(name, device)
+
+        start = time.perf_counter()
+        result = model.transcribe(audio, **kwargs)
+        inference_seconds = time.perf_counter() - start
+
+        with self._lock:
+            self.stats["transcriptions"] += 1
+            self.stats["inference_seconds"] += inference_seconds
+
+        return result, {"load_seconds": load_seconds, "inference_seconds": inference_seconds}
+
+
+# Shared by every caller in the process
+whisper_registry = WhisperModelRegistry()
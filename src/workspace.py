@@ -0,0 +1,45 @@
+import os
+import shutil
+import tempfile
+
+# Directory under which job workspaces are created. Point it at a tmpfs mount
+# (e.g. /dev/shm) to keep intermediate video/audio/frames off disk.
+WORKSPACE_ROOT_ENV = "DEEPCONTEXT_WORKSPACE_ROOT"
+
+
+class JobWorkspace:
+    def __init__(self, root=None, keep=False):
+        """
+        Create an isolated scratch directory for one processing job.
+
+        Every job gets its own video, audio, frame and JSON paths, so concurrent
+        Streamlit sessions or CLI runs on one host never touch each other's files.
+
+        Args:
+            root (str, optional): Parent directory for the workspace. Defaults to
+                $DEEPCONTEXT_WORKSPACE_ROOT, then the system temp directory.
+            keep (bool): Keep the directory after the job (for debugging)
+        """
+        root = root or os.getenv(WORKSPACE_ROOT_ENV) or None
+        if root:
+            os.makedirs(root, exist_ok=True)
+
+        self.path = tempfile.mkdtemp(prefix="deepcontext-", dir=root)
+        self.keep = keep
+
+        self.video_file = os.path.join(self.path, "video.mp4")
+        self.audio_file = os.path.join(self.path, "audio.mp3")
+        self.frames_dir = os.path.join(self.path, "image_frames")
+        self.json_file = os.path.join(self.path, "data.json")
+
+    def cleanup(self):
+        """Delete the workspace directory and everything in it."""
+        if not self.keep:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cleanup()
+        return False
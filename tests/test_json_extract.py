@@ -0,0 +1,40 @@
+from json_extract import extract_json
+
+
+def test_plain_object():
+    assert extract_json('{"verdict": "true"}') == {"verdict": "true"}
+
+
+def test_fenced_object_with_prose():
+    text = 'Here is the analysis:\n```json\n{"verdict": "false", "score": 2}\n```\nHope this helps.'
+    assert extract_json(text) == {"verdict": "false", "score": 2}
+
+
+def test_braces_and_escaped_quotes_inside_strings():
+    text = '{"claim": "he said \\"{not json}\\"", "nested": {"a": "}"}}'
+    assert extract_json(text) == {"claim": 'he said "{not json}"', "nested": {"a": "}"}}
+
+
+def test_raw_newlines_inside_strings():
+    assert extract_json('{"summary": "line one\nline two"}') == {"summary": "line one\nline two"}
+
+
+def test_skips_candidate_that_does_not_decode():
+    assert extract_json('{"a": oops} then {"b": 1}') == {"b": 1}
+
+
+def test_stray_open_brace_in_prose_does_not_hide_the_object():
+    text = 'The post quotes {"facts" out of context. Result: {"verdict": "misleading"}'
+    assert extract_json(text) == {"verdict": "misleading"}
+
+
+def test_object_nested_in_a_bogus_candidate_is_found():
+    text = 'say {" then ```json\n{"a": {"b": "}"}}\n```'
+    assert extract_json(text) == {"a": {"b": "}"}}
+
+
+def test_truncated_or_missing_object():
+    assert extract_json('{"verdict": "true", "reason": "cut off') is None
+    assert extract_json("no json here {this} either") is None
+    assert extract_json("") is None
+    assert extract_json(None) is None
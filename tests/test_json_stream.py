@@ -0,0 +1,49 @@
+import json
+
+from json_stream import IncrementalJSONParser
+
+RESPONSE = '```json\n{"verdict": "false", "score": 0.9, "criteria": ["a", "b"], "nested": {"k": "}"}, "note": "say \\"hi\\", ok"}\n```'
+EXPECTED = json.loads(RESPONSE[RESPONSE.index("{"):RESPONSE.rindex("}") + 1])
+
+
+def feed_in_chunks(text, size):
+    parser = IncrementalJSONParser()
+    completed = []
+    for i in range(0, len(text), size):
+        completed.extend(parser.feed(text[i:i + size]))
+    return parser, completed
+
+
+def test_fields_match_full_parse_for_any_chunking():
+    for size in (1, 2, 7, len(RESPONSE)):
+        parser, completed = feed_in_chunks(RESPONSE, size)
+        assert parser.done
+        assert parser.fields == EXPECTED
+        assert [key for key, _ in completed] == list(EXPECTED)
+
+
+def test_field_is_reported_once_its_value_is_complete():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"verdict": "fal') == []
+    assert parser.feed('se", "score": 0.') == [("verdict", "false")]
+    assert parser.feed("9") == []  # the number may still continue
+    assert parser.feed("}") == [("score", 0.9)]
+    assert parser.done
+
+
+def test_text_after_the_object_is_ignored():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": 1} {"b": 2}')
+    assert parser.fields == {"a": 1}
+
+
+def test_malformed_value_is_skipped():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": tru, "b": 2}')
+    assert parser.fields == {"b": 2}
+
+
+def test_truncated_stream_keeps_completed_fields():
+    parser, _ = feed_in_chunks('{"verdict": "true", "explanation": "cut', 5)
+    assert not parser.done
+    assert parser.fields == {"verdict": "true"}
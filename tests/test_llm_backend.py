@@ -0,0 +1,19 @@
+import pytest
+
+from llm_backend import LLMBackend, StubBackend
+
+
+def test_backend_missing_an_attempt_method_fails_at_construction():
+    class SyncOnlyBackend(LLMBackend):
+        name = "stub"
+
+        def _complete(self, messages, model, temperature, max_tokens, timeout, options):
+            return ""
+
+    with pytest.raises(TypeError):
+        SyncOnlyBackend()
+
+
+def test_stub_backend_is_complete():
+    backend = StubBackend()
+    assert isinstance(backend.complete([{"role": "user", "content": "Is this true?"}]), str)
@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+import pytest
+
+from rate_limiter import RateLimiter, TokenBucket, limits_from_env
+
+
+def test_bucket_goes_negative_and_reports_the_wait():
+    bucket = TokenBucket(60)  # one per second
+    t0 = bucket.updated
+    assert bucket.reserve(60, now=t0) == 0.0
+    assert bucket.reserve(3, now=t0) == pytest.approx(3.0)
+    assert bucket.reserve(1, now=t0 + 1) == pytest.approx(3.0)  # 1s refilled, one more queued
+
+
+def test_bucket_refills_up_to_capacity():
+    bucket = TokenBucket(60)
+    t0 = bucket.updated
+    bucket.reserve(60, now=t0)
+    assert bucket.level(t0 + 30) == pytest.approx(30.0)
+    assert bucket.level(t0 + 600) == 60.0
+    bucket.refund(1000)
+    assert bucket.balance == 60.0
+
+
+def test_acquire_queues_once_the_budget_is_spent():
+    limiter = RateLimiter({("svc", "*"): {"rpm": 600}})  # 10 requests per second
+    for _ in range(600):
+        assert limiter.acquire("svc") == 0.0
+    start = time.monotonic()
+    waited = limiter.acquire("svc")
+    assert 0.05 < waited <= 0.1 and time.monotonic() - start >= waited - 0.01
+    assert limiter.stats[("svc", "*")]["waited"] == 1
+
+
+def test_async_acquire_queues_too():
+    limiter = RateLimiter({("svc", "m"): {"tpm": 600}})
+    limiter.acquire("svc", "m", tokens=600)
+    assert asyncio.run(limiter.aacquire("svc", "m", tokens=1)) > 0
+
+
+def test_per_model_limits_fall_back_to_the_provider_default():
+    limiter = RateLimiter({("svc", "big"): {"tpm": 60}, ("svc", "*"): {"tpm": 6000}})
+    limiter.acquire("svc", "big", tokens=60)
+    assert limiter.would_wait("svc", "big", tokens=10)
+    assert not limiter.would_wait("svc", "small", tokens=10)
+    assert not limiter.would_wait("other", "any", tokens=10**6)  # no limits configured
+
+
+def test_would_wait_reserves_nothing():
+    limiter = RateLimiter({("svc", "*"): {"rpm": 1, "tpm": 100}})
+    assert not limiter.would_wait("svc", tokens=100)
+    assert not limiter.would_wait("svc", tokens=100)
+    assert limiter.acquire("svc", tokens=100) == 0.0
+    assert limiter.would_wait("svc", tokens=0)  # the one request per minute is spent
+
+
+def test_refund_returns_unused_tokens():
+    limiter = RateLimiter({("svc", "*"): {"tpm": 100}})
+    limiter.acquire("svc", tokens=100)
+    assert limiter.would_wait("svc", tokens=40)
+    limiter.refund("svc", tokens=50)
+    assert not limiter.would_wait("svc", tokens=40)
+
+
+def test_limits_from_env(monkeypatch):
+    monkeypatch.setenv("DEEPCONTEXT_RATE_LIMITS", '{"groq:llama3-8b-8192": {"tpm": 1}, "serpapi": {"rpm": 2}}')
+    assert limits_from_env() == {("groq", "llama3-8b-8192"): {"tpm": 1}, ("serpapi", "*"): {"rpm": 2}}
+    monkeypatch.setenv("DEEPCONTEXT_RATE_LIMITS", "{not json")
+    assert limits_from_env() == {}
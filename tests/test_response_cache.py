@@ -0,0 +1,66 @@
+import pytest
+
+import response_cache
+from response_cache import ResponseCache, make_cache_key, normalize_text
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache, "time", clock)
+    return clock
+
+
+def test_round_trip_and_counters(tmp_path, clock):
+    cache = ResponseCache("test", cache_dir=str(tmp_path))
+    assert cache.get("k") is None
+    cache.set("k", {"verdict": True, "criteria": ["a"]})
+    assert cache.get("k") == {"verdict": True, "criteria": ["a"]}
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 1}
+
+
+def test_entries_expire_after_their_ttl(tmp_path, clock):
+    cache = ResponseCache("test", cache_dir=str(tmp_path), ttl_seconds=60)
+    cache.set("default", 1)
+    cache.set("short", 2, ttl_seconds=10)
+
+    clock.now += 30
+    assert cache.get("short") is None
+    assert cache.get("default") == 1
+
+    clock.now += 31
+    assert cache.get("default") is None
+    assert cache.stats()["entries"] == 0  # expired rows are deleted on lookup
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, clock):
+    cache = ResponseCache("test", cache_dir=str(tmp_path), max_entries=2)
+    cache.set("a", 1)
+    clock.now += 1
+    cache.set("b", 2)
+    clock.now += 1
+    cache.get("a")  # "b" is now the least recently used
+    clock.now += 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_entries_persist_across_instances(tmp_path, clock):
+    ResponseCache("test", cache_dir=str(tmp_path)).set("k", "v")
+    assert ResponseCache("test", cache_dir=str(tmp_path)).get("k") == "v"
+
+
+def test_cache_keys():
+    assert make_cache_key("model", normalize_text("a  b\n c")) == make_cache_key("model", "a b c")
+    assert make_cache_key({"x": 1, "y": 2}) == make_cache_key({"y": 2, "x": 1})
+    assert make_cache_key("model-a", "text") != make_cache_key("model-b", "text")
@@ -0,0 +1,181 @@
+import asyncio
+import time
+
+import pytest
+
+import retry
+from llm_backend import LLMBackend
+from rate_limiter import RateLimiter
+from retry import RetryPolicy, is_retryable, retry_after_seconds
+
+NETWORK_SECONDS = 0.05
+MESSAGES = [{"role": "system", "content": "x"}, {"role": "user", "content": "hello"}]
+
+
+class SlowNetworkBackend(LLMBackend):
+    """Fake backend whose requests need NETWORK_SECONDS and time out if given less."""
+
+    name = "stub"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.timeouts = []
+
+    def _request(self, timeout):
+        self.timeouts.append(timeout)
+        if timeout < NETWORK_SECONDS:
+            raise TimeoutError(f"timeout {timeout:.2f}s")
+        return "ok"
+
+    def _complete(self, messages, model, temperature, max_tokens, timeout, options):
+        reserved = self._acquire(messages, model, max_tokens)
+        time.sleep(NETWORK_SECONDS)
+        text = self._request(timeout)
+        self._settle(messages, model, reserved, text)
+        return text
+
+    async def _acomplete(self, messages, model, temperature, max_tokens, timeout, options):
+        reserved = await self._aacquire(messages, model, max_tokens)
+        await asyncio.sleep(NETWORK_SECONDS)
+        text = self._request(timeout)
+        self._settle(messages, model, reserved, text)
+        return text
+
+    def _stream(self, messages, model, temperature, max_tokens, timeout, options):
+        yield self._complete(messages, model, temperature, max_tokens, timeout, options)
+
+
+def drained_backend(deadline):
+    """Backend whose token budget is empty, so its next call queues ~1.5s (10 tokens/s)."""
+    limiter = RateLimiter({("stub", "*"): {"tpm": 600}})
+    limiter.acquire("stub", "stub", 600)
+    return SlowNetworkBackend(default_model="stub", limiter=limiter, retry_policy=RetryPolicy(max_attempts=1, deadline=deadline))
+
+
+def test_queue_wait_longer_than_deadline_still_succeeds():
+    backend = drained_backend(deadline=0.5)
+    start = time.monotonic()
+    assert backend.complete(MESSAGES, max_tokens=10) == "ok"
+    assert time.monotonic() - start > 1.0  # it really queued past the deadline
+    assert backend.timeouts[0] > 0.45  # the full timeout, not what was left after queueing
+
+
+def test_async_queue_wait_longer_than_deadline_still_succeeds():
+    backend = drained_backend(deadline=0.5)
+    assert asyncio.run(backend.acomplete(MESSAGES, max_tokens=10)) == "ok"
+    assert backend.timeouts[0] > 0.45
+
+
+def test_queue_wait_is_not_recorded_as_latency():
+    backend = drained_backend(deadline=5)
+    backend.complete(MESSAGES, max_tokens=10)
+    samples = list(backend.retry_policy.latencies._samples["stub"])
+    assert len(samples) == 1 and samples[0] < 0.5  # ~NETWORK_SECONDS, not the 1.5s queue
+
+
+def slow_then_fast():
+    """A call whose first attempt takes 0.5s and later ones answer at once."""
+    started = []
+
+    def call(timeout):
+        started.append(timeout)
+        if len(started) == 1:
+            time.sleep(0.5)
+            return "primary"
+        return "hedge"
+    return call, started
+
+
+def test_hedges_a_slow_call():
+    policy = RetryPolicy(hedge=True, hedge_delay=0.05)
+    call, started = slow_then_fast()
+    assert policy.call(call) == "hedge"
+    assert len(started) == 2 and policy.stats["hedges"] == 1
+
+
+def test_no_hedge_while_the_limiter_would_queue():
+    policy = RetryPolicy(hedge=True, hedge_delay=0.05)
+    call, started = slow_then_fast()
+    assert policy.call(call, can_hedge=lambda: False) == "primary"
+    assert len(started) == 1 and policy.stats["hedges"] == 0
+
+
+def test_no_hedge_when_the_pool_is_full(monkeypatch):
+    monkeypatch.setattr(retry, "HEDGE_WORKERS", 1)
+    policy = RetryPolicy(hedge=True, hedge_delay=0.05)
+    call, started = slow_then_fast()
+    assert policy.call(call) == "primary"
+    assert len(started) == 1 and policy.stats["hedges"] == 0
+
+
+def test_backend_skips_hedging_behind_a_drained_budget():
+    backend = drained_backend(deadline=5)
+    backend.retry_policy = RetryPolicy(max_attempts=1, hedge=True, hedge_delay=0.05)
+    assert backend.complete(MESSAGES, max_tokens=10) == "ok"
+    assert len(backend.timeouts) == 1 and backend.retry_policy.stats["hedges"] == 0
+
+
+class APIStatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type("Response", (), {"status_code": status_code, "headers": headers or {}})()
+
+
+def flaky(failures):
+    """A call that raises each of `failures` in turn, then returns "ok"."""
+    attempts = []
+
+    def call(timeout):
+        attempts.append(timeout)
+        if len(attempts) <= len(failures):
+            raise failures[len(attempts) - 1]
+        return "ok"
+    return call, attempts
+
+
+def test_retryable_errors():
+    assert is_retryable(APIStatusError(429)) and is_retryable(APIStatusError(503))
+    assert not is_retryable(APIStatusError(400)) and not is_retryable(APIStatusError(401))
+    assert is_retryable(TimeoutError()) and is_retryable(ConnectionError())
+    assert not is_retryable(ValueError())
+
+
+def test_retry_after_is_waited_out_in_full():
+    policy = RetryPolicy(base_delay=0.01, max_delay=0.01)
+    error = APIStatusError(429, {"retry-after": "7"})
+    assert retry_after_seconds(error) == 7.0
+    assert policy.backoff(1, error) == 7.0
+
+
+def test_transient_failures_are_retried():
+    policy = RetryPolicy(max_attempts=3, base_delay=0.01)
+    call, attempts = flaky([APIStatusError(503), TimeoutError()])
+    assert policy.call(call) == "ok"
+    assert len(attempts) == 3 and policy.stats["retries"] == 2
+
+
+def test_permanent_failure_is_not_retried():
+    policy = RetryPolicy(max_attempts=3, base_delay=0.01)
+    call, attempts = flaky([APIStatusError(400)])
+    with pytest.raises(APIStatusError):
+        policy.call(call)
+    assert len(attempts) == 1 and policy.stats["failures"] == 1
+
+
+def test_gives_up_when_retry_after_is_past_the_deadline():
+    policy = RetryPolicy(max_attempts=3, deadline=1.0)
+    call, attempts = flaky([APIStatusError(429, {"retry-after": "30"})])
+    with pytest.raises(APIStatusError):
+        policy.call(call)
+    assert len(attempts) == 1
+
+
+def test_async_transient_failures_are_retried():
+    policy = RetryPolicy(max_attempts=2, base_delay=0.01)
+    call, attempts = flaky([APIStatusError(502)])
+
+    async def acall(timeout):
+        return call(timeout)
+    assert asyncio.run(policy.acall(acall)) == "ok"
+    assert len(attempts) == 2
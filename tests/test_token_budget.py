@@ -0,0 +1,31 @@
+from token_budget import estimate_tokens, pack_batches
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens(None) == 0
+    assert estimate_tokens("a" * 400) == 101  # by characters: 400 / 4 + 1
+    assert estimate_tokens("! " * 40) == 31  # by symbols: 40 * 0.75 + 1
+
+
+def test_estimate_grows_with_text():
+    short = "Vaccines cause autism, a new study claims."
+    assert estimate_tokens(short * 10) > estimate_tokens(short)
+
+
+def test_pack_batches_respects_budget_and_order():
+    texts = ["a" * 36] * 5  # 10 tokens each
+    assert pack_batches(texts, token_budget=25, max_items=10) == [[0, 1], [2, 3], [4]]
+
+
+def test_pack_batches_respects_max_items():
+    assert pack_batches(["x"] * 5, token_budget=1000, max_items=2) == [[0, 1], [2, 3], [4]]
+
+
+def test_oversized_text_gets_its_own_batch():
+    texts = ["a" * 36, "a" * 4000, "a" * 36]
+    assert pack_batches(texts, token_budget=25, max_items=10) == [[0], [1], [2]]
+
+
+def test_pack_nothing():
+    assert pack_batches([], token_budget=100, max_items=4) == []
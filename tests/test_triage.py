@@ -0,0 +1,44 @@
+import pytest
+
+from triage import ClaimTriage, triage_report
+
+RECIPE = "Preheat the oven, whisk two cups of flour and bake. Delicious recipe! Follow for more."
+HEALTH_CLAIM = "A new study proves this tea cures diabetes. Doctors don't want you to know. 90% of people saw results."
+
+
+def test_benign_clip_is_skipped_and_claim_is_routed():
+    triage = ClaimTriage()
+    assert triage.needs_llm(RECIPE)[0] is False
+    assert triage.needs_llm(HEALTH_CLAIM)[0] is True
+    assert (triage.routed, triage.skipped) == (1, 1)
+
+
+def test_empty_text_scores_zero():
+    assert ClaimTriage().score("") == 0.0
+    assert ClaimTriage().score("   \n") == 0.0
+
+
+def test_benign_cues_cancel_at_most_half_the_claim_evidence():
+    triage = ClaimTriage()
+    claim = "This tea cures cancer."
+    assert triage.score(claim + " Recipe: whisk, stir, bake, delicious, yummy!") == pytest.approx(triage.score(claim) / 2, rel=0.2)
+
+
+def test_long_transcript_does_not_dilute_a_single_claim():
+    filler = " ".join(["and then we went to the park"] * 15)  # ~100 words
+    assert ClaimTriage().needs_llm(filler + " This supplement cures diabetes.")[0] is True
+
+
+def test_skipped_result_shape():
+    result = ClaimTriage(threshold=2.0).skipped_result(0.5, include_claims=True)
+    assert result["contains_misinformation"] is False
+    assert result["triage"] == {"skipped": True, "score": 0.5, "threshold": 2.0}
+    assert result["claims"] == [] and result["main_claim"] == ""
+    assert "claims" not in ClaimTriage().skipped_result(0.5)
+
+
+def test_triage_report():
+    rows = triage_report([0.0, 1.0, 3.0, 5.0], [False, True, False, True], thresholds=[0.0, 2.0, 6.0])
+    assert rows[0] == {"threshold": 0.0, "routed": 4, "skipped": 0, "precision": 0.5, "recall": 1.0, "skip_rate": 0.0}
+    assert (rows[1]["routed"], rows[1]["precision"], rows[1]["recall"]) == (2, 0.5, 0.5)
+    assert (rows[2]["routed"], rows[2]["precision"], rows[2]["recall"], rows[2]["skip_rate"]) == (0, 0.0, 0.0, 1.0)